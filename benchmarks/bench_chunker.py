@@ -0,0 +1,78 @@
+"""
+Throughput benchmark for promptscribe.chunker on large synthetic session logs.
+
+    python benchmarks/bench_chunker.py --size-mb 200 --max-tokens 3000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from promptscribe import chunker  # noqa: E402
+
+
+def write_log(path, size_mb, seed=1):
+    """Write a recorder-format log of roughly `size_mb` with repeated and giant outputs."""
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    repeated = "".join(f"resource.{i} will be updated in-place\n" for i in range(200))
+    ts = 1_700_000_000.0
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"meta": {"version": "2.2", "platform": "Linux", "start_time": ts}}) + "\n")
+        n = 0
+        while written < target:
+            n += 1
+            ts += rng.random()
+            cmd = rng.choice(["ls -la", "make test", "terraform plan", "cat big.log", "git status"])
+            f.write(json.dumps({"ts": round(ts, 6), "kind": "in", "data": f"{cmd} #{n}\n"}) + "\n")
+            if cmd == "terraform plan":
+                lines = repeated.splitlines(True)
+            elif cmd == "cat big.log":
+                lines = [f"{i:08d} " + "x" * rng.randint(20, 200) + "\n" for i in range(rng.randint(500, 5000))]
+            else:
+                lines = [f"line {i} of {cmd}\n" for i in range(rng.randint(1, 40))]
+            for ln in lines:
+                ts += 0.0001
+                rec = json.dumps({"ts": round(ts, 6), "kind": "out", "data": ln}, ensure_ascii=False) + "\n"
+                f.write(rec)
+                written += len(rec)
+    return os.path.getsize(path)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--size-mb", type=int, default=50)
+    ap.add_argument("--max-tokens", type=int, default=3000)
+    ap.add_argument("--tokenizer", default="heuristic", help="heuristic or tiktoken")
+    ap.add_argument("--no-dedupe", action="store_true")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.jsonl")
+        size = write_log(path, args.size_mb)
+        count = chunker.get_estimator(args.tokenizer)
+        t0 = time.perf_counter()
+        chunks = tokens = 0
+        biggest = 0
+        for c in chunker.chunk_session(path, args.max_tokens, count_tokens=count, dedupe=not args.no_dedupe):
+            chunks += 1
+            tokens += c.tokens
+            biggest = max(biggest, c.tokens)
+        elapsed = time.perf_counter() - t0
+
+    mb = size / (1024 * 1024)
+    print(f"input        {mb:10.1f} MB")
+    print(f"elapsed      {elapsed:10.2f} s")
+    print(f"throughput   {mb / elapsed:10.1f} MB/s")
+    print(f"chunks       {chunks:10d}")
+    print(f"tokens out   {tokens:10d}  (largest chunk {biggest}, budget {args.max_tokens})")
+
+
+if __name__ == "__main__":
+    main()
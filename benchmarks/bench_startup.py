@@ -0,0 +1,88 @@
+"""
+Startup-time check for the promptscribe CLI.
+
+    python benchmarks/bench_startup.py --budget-ms 150
+
+Imports promptscribe.cli under `-X importtime` in a fresh interpreter, fails
+if any heavy dependency is imported eagerly, and times `--version`/`--help`
+end to end. Exits non-zero on a regression so it can gate CI.
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# must only be imported by the subcommands that need them
+HEAVY = ("sqlalchemy", "rich", "tkinter", "openai", "rapidfuzz", "yaml", "termios")
+
+
+def _run(args):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    return subprocess.run([sys.executable] + args, cwd=ROOT, env=env, capture_output=True, text=True)
+
+
+def import_profile():
+    """[(cumulative_us, self_us, module)] for `import promptscribe.cli`, slowest first."""
+    proc = _run(["-X", "importtime", "-c", "import promptscribe.cli"])
+    if proc.returncode != 0:
+        raise SystemExit(f"import failed:\n{proc.stderr}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cum_us), int(self_us), name.strip()))
+    return sorted(rows, reverse=True)
+
+
+def eager_heavy_modules():
+    code = "import sys, promptscribe.cli; print(' '.join(sorted(sys.modules)))"
+    loaded = set(_run(["-c", code]).stdout.split())
+    return sorted(m for m in HEAVY if m in loaded)
+
+
+def wall_ms(args, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        proc = _run(["-m", "promptscribe.cli"] + args)
+        best = min(best, (time.perf_counter() - t0) * 1000)
+        if proc.returncode != 0:
+            raise SystemExit(f"promptscribe {' '.join(args)} failed:\n{proc.stderr}")
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--budget-ms", type=float, default=150.0,
+                    help="Max cumulative import time of promptscribe.cli.")
+    ap.add_argument("--repeat", type=int, default=5, help="Runs per wall-clock measurement (best is kept).")
+    ap.add_argument("--top", type=int, default=10, help="Slowest imports to list.")
+    args = ap.parse_args()
+
+    rows = import_profile()
+    total_ms = next((cum for cum, _, name in rows if name == "promptscribe.cli"), 0) / 1000
+    print(f"import promptscribe.cli: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for cum, own, name in rows[:args.top]:
+        print(f"  {cum / 1000:8.1f} ms cumulative {own / 1000:8.1f} ms self  {name}")
+    for cmd in (["--version"], ["--help"]):
+        print(f"promptscribe {cmd[0]}: {wall_ms(cmd, args.repeat):.1f} ms wall (best of {args.repeat})")
+
+    failures = []
+    heavy = eager_heavy_modules()
+    if heavy:
+        failures.append(f"heavy modules imported at startup: {', '.join(heavy)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+    for msg in failures:
+        print(f"FAIL: {msg}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Benchmark suite over a synthetic vault.
+
+    python benchmarks/suite.py --profile small
+    python benchmarks/suite.py --profile small --save-baseline
+
+Generates a deterministic vault (see synth.py), points promptscribe at it
+through PROMPTSCRIBE_CONFIG and runs every case in a fresh interpreter so
+peak RSS is per case. Results are compared with benchmarks/baseline.json;
+a case slower or larger than baseline by more than --tolerance fails the run.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+from synth import PROFILES, generate_vault  # noqa: E402
+
+BASELINE = os.path.join(HERE, "baseline.json")
+
+
+# --- Cases (run inside the child process) ---
+def _metas(vault):
+    out = []
+    meta_dir = os.path.join(vault, "metadata")
+    for name in sorted(os.listdir(meta_dir)):
+        with open(os.path.join(meta_dir, name), "r", encoding="utf-8") as f:
+            out.append(json.load(f))
+    return out
+
+
+def _logs(vault):
+    return [m["file"] for m in _metas(vault) if os.path.exists(m["file"])]
+
+
+def case_parse_session(vault):
+    from promptscribe import parser
+    paths = _logs(vault)
+    t0 = time.perf_counter()
+    events = sum(parser.parse_session(p)["summary"]["total_events"] for p in paths)
+    return time.perf_counter() - t0, events, "events", sum(map(os.path.getsize, paths))
+
+
+def case_compute_basic_stats(vault):
+    from promptscribe import parser, preprocess
+    parsed = [parser.parse_session(p) for p in _logs(vault)]
+    t0 = time.perf_counter()
+    commands = sum(preprocess.compute_basic_stats(p)["total_commands"] for p in parsed)
+    return time.perf_counter() - t0, commands, "commands", 0
+
+
+def case_aggregate_stats(vault):
+    from promptscribe import stats
+    t0 = time.perf_counter()
+    res = stats.aggregate_stats(limit=10**9)
+    return time.perf_counter() - t0, res["total_sessions"], "sessions", sum(map(os.path.getsize, _logs(vault)))
+
+
+def case_export_raw(vault):
+    from promptscribe import scraper
+    scraper.EXPORT_DIR = os.path.join(vault, "exports")
+    os.makedirs(scraper.EXPORT_DIR, exist_ok=True)
+    ids = [m["session_id"] for m in _metas(vault) if os.path.exists(m["file"])][:50]
+    t0 = time.perf_counter()
+    out = [scraper.export_raw(session_id=sid, reuse=False) for sid in ids]
+    elapsed = time.perf_counter() - t0
+    return elapsed, len(ids), "sessions", sum(map(os.path.getsize, out))
+
+
+def case_viewer_tail(vault):
+    from rich.console import Console
+    from promptscribe import viewer
+    metas = [m for m in _metas(vault) if os.path.exists(m["file"])]
+    metas.sort(key=lambda m: os.path.getsize(m["file"]), reverse=True)
+    metas = metas[:20]
+    with open(os.devnull, "w") as devnull:
+        viewer.console = Console(file=devnull, width=120)
+        t0 = time.perf_counter()
+        for m in metas:
+            viewer.display_session(m["session_id"], tail=50)
+        elapsed = time.perf_counter() - t0
+    return elapsed, len(metas), "sessions", sum(os.path.getsize(m["file"]) for m in metas)
+
+
+def case_insert_sessions(vault):
+    from promptscribe import db
+    meta_dir = os.path.join(vault, "metadata")
+    paths = [os.path.join(meta_dir, n) for n in sorted(os.listdir(meta_dir))]
+    t0 = time.perf_counter()
+    for p in paths:
+        db.insert_session(p)
+    db.insert_session_metas(_metas(vault))      # bulk re-upsert of the same rows
+    return time.perf_counter() - t0, 2 * len(paths), "rows", 0
+
+
+def case_clean_orphans(vault):
+    from promptscribe import db
+    t0 = time.perf_counter()
+    db.clean_orphans(remove=False)
+    return time.perf_counter() - t0, db.count_sessions(), "sessions", 0
+
+
+# name -> (function, needs a populated DB)
+CASES = {
+    "parse_session": (case_parse_session, False),
+    "compute_basic_stats": (case_compute_basic_stats, False),
+    "aggregate_stats": (case_aggregate_stats, True),
+    "export_raw": (case_export_raw, True),
+    "viewer_tail": (case_viewer_tail, True),
+    "insert_sessions": (case_insert_sessions, False),
+    "clean_orphans": (case_clean_orphans, True),
+}
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:          # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_child(name, vault):
+    from promptscribe import db
+    fn, seeded = CASES[name]
+    db.ensure_schema()
+    if seeded:
+        db.insert_session_metas(_metas(vault))
+    seconds, items, unit, nbytes = fn(vault)
+    print(json.dumps({
+        "seconds": round(seconds, 4), "items": items, "unit": unit,
+        "bytes": nbytes, "peak_rss_mb": _peak_rss_mb(),
+    }))
+
+
+# --- Driver ---
+def write_config(vault, name):
+    """Config for one case: shared logs/metadata, a private DB and analysis dir."""
+    import yaml
+    with open(os.path.join(ROOT, "config.yaml"), "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f) or {}
+    cfg["paths"] = {
+        "root": vault,
+        "logs": os.path.join(vault, "logs"),
+        "metadata": os.path.join(vault, "metadata"),
+        "analysis": os.path.join(vault, "work", name, "analysis"),
+        "database": os.path.join(vault, "work", name, "vault.db"),
+    }
+    path = os.path.join(vault, f"config-{name}.yaml")
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(cfg, f)
+    return path
+
+
+def run_case(name, vault):
+    shutil.rmtree(os.path.join(vault, "work", name), ignore_errors=True)
+    shutil.rmtree(os.path.join(vault, "exports"), ignore_errors=True)
+    env = dict(os.environ, PROMPTSCRIBE_CONFIG=write_config(vault, name),
+               PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.run([sys.executable, __file__, "--child", name, "--vault", vault],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"case {name} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance, min_delta=0.02):
+    """
+    Failure messages for cases slower or bigger than baseline * (1 + tolerance).
+    Slowdowns under `min_delta` seconds are timer noise and never fail.
+    """
+    failures = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        slower = res["seconds"] - base["seconds"]
+        if slower > min_delta and res["seconds"] > base["seconds"] * (1 + tolerance):
+            failures.append(f"{name}: {res['seconds']:.3f}s vs baseline {base['seconds']:.3f}s")
+        if base.get("peak_rss_mb") and res.get("peak_rss_mb") \
+                and res["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            failures.append(f"{name}: peak RSS {res['peak_rss_mb']} MB vs baseline {base['peak_rss_mb']} MB")
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="small")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--cases", default=",".join(CASES), help="Comma-separated subset of cases.")
+    ap.add_argument("--repeat", type=int, default=5, help="Runs per case (best time, max RSS kept).")
+    ap.add_argument("--tolerance", type=float, default=0.5,
+                    help="Allowed slowdown vs baseline (0.5 = 50%%; shared runners are noisy).")
+    ap.add_argument("--min-delta", type=float, default=0.02, help="Ignore slowdowns below this many seconds.")
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    ap.add_argument("--vault", default=None, help="Reuse or keep the vault in this directory.")
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        run_child(args.child, args.vault)
+        return
+
+    names = [n.strip() for n in args.cases.split(",") if n.strip()]
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        raise SystemExit(f"unknown cases: {', '.join(unknown)}")
+
+    vault = args.vault or tempfile.mkdtemp(prefix="promptscribe-bench-")
+    try:
+        if not os.path.isdir(os.path.join(vault, "logs")):
+            t0 = time.perf_counter()
+            generate_vault(vault, seed=args.seed, **PROFILES[args.profile])
+            print(f"generated {args.profile} vault in {time.perf_counter() - t0:.1f}s: {vault}")
+
+        results = {}
+        for name in names:
+            runs = [run_case(name, vault) for _ in range(max(1, args.repeat))]
+            best = min(runs, key=lambda r: r["seconds"])
+            rss = [r["peak_rss_mb"] for r in runs if r["peak_rss_mb"] is not None]
+            best["peak_rss_mb"] = max(rss) if rss else None
+            results[name] = best
+            rate = best["items"] / best["seconds"] if best["seconds"] else float("inf")
+            mbps = f"{best['bytes'] / 1e6 / best['seconds']:8.1f} MB/s" if best["bytes"] and best["seconds"] else " " * 13
+            print(f"{name:22s} {best['seconds']:8.3f}s {rate:12.0f} {best['unit']}/s {mbps}  "
+                  f"peak {best['peak_rss_mb']} MB")
+    finally:
+        if not args.vault:
+            shutil.rmtree(vault, ignore_errors=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get(args.profile, {})
+
+    if args.save_baseline:
+        data = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        data[args.profile] = dict(baseline, **results)
+        data.setdefault("_machine", {})[args.profile] = f"{platform.platform()} / Python {platform.python_version()}"
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    if not baseline:
+        print(f"no {args.profile} baseline in {args.baseline}; run with --save-baseline")
+        return
+    failures = compare(results, baseline, args.tolerance, args.min_delta)
+    for msg in failures:
+        print(f"FAIL: {msg}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Deterministic synthetic vault generator.
+
+    python benchmarks/synth.py --out /tmp/vault --sessions 300 --seed 7
+
+Writes logs in the recorder's JSONL schema (a {"meta": ...} header, then
+{"ts", "kind", "data"} events) plus matching .meta.json files, the way
+`session.start` lays them out. The same seed always yields byte-identical
+vaults, so benchmark numbers are comparable between runs.
+"""
+import os
+import sys
+import json
+import math
+import random
+import argparse
+
+BASE_TS = 1_700_000_000.0
+
+COMMANDS = ["ls -la", "git status", "make test", "pytest -q", "docker ps", "kubectl get pods",
+            "terraform plan", "npm run build", "cat app.log", "grep -R TODO ."]
+WORDS = ["alpha", "build", "cache", "deploy", "error", "fetch", "graph", "index", "kernel",
+         "layer", "module", "network", "object", "parser", "query", "render", "socket", "thread"]
+ANSI = ["\x1b[31m", "\x1b[32m", "\x1b[1;33m", "\x1b[0m", "\x1b[2K", "\x1b[1A", "\x1b[38;5;208m", "\r"]
+
+# named size profiles used by the suite; anything can be overridden on the command line
+PROFILES = {
+    "small": {"sessions": 120, "commands": (5, 60), "median_lines": 8, "max_lines": 2000},
+    "default": {"sessions": 300, "commands": (5, 120), "median_lines": 10, "max_lines": 5000},
+    "large": {"sessions": 2000, "commands": (10, 300), "median_lines": 12, "max_lines": 20000},
+}
+
+
+def _output_lines(rng, cmd, median_lines, max_lines, ansi_ratio):
+    # log-normal line counts: mostly short outputs with a long tail of huge ones
+    n = min(max_lines, max(0, int(rng.lognormvariate(math.log(max(median_lines, 1)), 1.2))))
+    for i in range(n):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 14)))
+        if rng.random() < ansi_ratio:
+            text = f"{rng.choice(ANSI)}{cmd.split()[0]}[{i}]{rng.choice(ANSI)} {text}\x1b[0m"
+        yield text + "\n"
+
+
+def _corrupt(rng, line):
+    kind = rng.randrange(3)
+    if kind == 0:
+        return line[:max(1, len(line) // 2)] + "\n"          # truncated JSON (crash mid-write)
+    if kind == 1:
+        return "\x00\x01garbage\xff" + "\n"                   # binary noise
+    return "{not json at all}\n"
+
+
+def write_session(path, start_ts, rng, commands=(5, 120), median_lines=10, max_lines=5000,
+                  ansi_ratio=0.2, corrupt_ratio=0.001):
+    """Write one session log; returns (end_ts, bytes written, events)."""
+    ts = start_ts
+    events = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as fh:
+        fh.write(json.dumps({"meta": {"version": "2.2", "platform": "Linux", "start_time": start_ts}}) + "\n")
+        for _ in range(rng.randint(*commands)):
+            ts += rng.uniform(0.5, 30.0)
+            cmd = rng.choice(COMMANDS)
+            lines = [json.dumps({"ts": round(ts, 6), "kind": "in", "data": cmd + "\n"}, ensure_ascii=False) + "\n"]
+            for out in _output_lines(rng, cmd, median_lines, max_lines, ansi_ratio):
+                ts += rng.expovariate(200.0)
+                lines.append(json.dumps({"ts": round(ts, 6), "kind": "out", "data": out}, ensure_ascii=False) + "\n")
+            if corrupt_ratio:
+                lines = [_corrupt(rng, ln) if rng.random() < corrupt_ratio else ln for ln in lines]
+            fh.writelines(lines)
+            events += len(lines)
+        ts += 0.5
+        fh.write(json.dumps({"ts": round(ts, 6), "kind": "session_end", "data": ""}) + "\n")
+    return ts, os.path.getsize(path), events + 2
+
+
+def generate_vault(root, sessions=300, seed=7, commands=(5, 120), median_lines=10, max_lines=5000,
+                   ansi_ratio=0.2, corrupt_ratio=0.001, missing_ratio=0.05):
+    """
+    Create root/logs and root/metadata with `sessions` sessions.
+    A `missing_ratio` share of sessions keep their metadata but lose the log,
+    like sessions deleted by hand. Returns the list of meta dicts.
+    """
+    rng = random.Random(seed)
+    logs = os.path.join(root, "logs")
+    metas_dir = os.path.join(root, "metadata")
+    os.makedirs(logs, exist_ok=True)
+    os.makedirs(metas_dir, exist_ok=True)
+    metas = []
+    for n in range(sessions):
+        start_ts = BASE_TS + n * 3600 + rng.uniform(0, 600)
+        sid = f"S-BENCH-{n:06d}"
+        name = f"{rng.choice(WORDS)}-{rng.choice(WORDS)}"
+        path = os.path.join(logs, f"{sid}__{name}.jsonl")
+        end_ts, _, _ = write_session(path, start_ts, rng, commands, median_lines, max_lines,
+                                     ansi_ratio, corrupt_ratio)
+        meta = {
+            "session_id": sid,
+            "name": name,
+            "user_description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 6))) or None,
+            "start_ts": start_ts,
+            "end_ts": end_ts,
+            "file": path,
+        }
+        with open(os.path.join(metas_dir, f"{sid}.meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        if rng.random() < missing_ratio:
+            os.remove(path)
+        metas.append(meta)
+    return metas
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--out", required=True, help="Vault directory to create.")
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="default")
+    ap.add_argument("--sessions", type=int, default=None)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--ansi-ratio", type=float, default=0.2, help="Share of output lines with escape codes.")
+    ap.add_argument("--corrupt-ratio", type=float, default=0.001, help="Share of lines that are not valid JSON.")
+    ap.add_argument("--missing-ratio", type=float, default=0.05, help="Share of sessions whose log is deleted.")
+    args = ap.parse_args()
+
+    prof = dict(PROFILES[args.profile])
+    if args.sessions is not None:
+        prof["sessions"] = args.sessions
+    metas = generate_vault(args.out, seed=args.seed, ansi_ratio=args.ansi_ratio,
+                           corrupt_ratio=args.corrupt_ratio, missing_ratio=args.missing_ratio, **prof)
+    size = sum(os.path.getsize(m["file"]) for m in metas if os.path.exists(m["file"]))
+    print(f"wrote {len(metas)} sessions, {size / 1e6:.1f} MB to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,80 +3,513 @@ import os
 import json
 import time
 import uuid
+import heapq
+import hashlib
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from promptscribe import blobstore, instrument, logio
 from promptscribe.config import CONFIG
-from promptscribe.utils import safe_write_json
+from promptscribe.utils import safe_write_json, file_stat_key
 
 ANALYSIS_DIR = CONFIG["paths"]["analysis"]
 os.makedirs(ANALYSIS_DIR, exist_ok=True)
 
-def run_analysis(session_paths, merge=False):
+# Bump whenever the analysis output changes so stale cache entries stop matching.
+ANALYZER_VERSION = "2"
+
+CACHE_CFG = CONFIG.get("analysis_cache") or {}
+ANALYSIS_CFG = CONFIG.get("analysis") or {}
+
+
+class AnalysisCancelled(Exception):
+    """Raised when run_analysis is cancelled before all sessions were mapped."""
+
+
+def run_analysis(session_paths, merge=False, use_cache=True, workers=None,
+                 progress=None, cancel=None, max_inflight=None, summarize=False):
     """
     session_paths: tuple/list of session file paths or basenames.
     merge: if True create single combined analysis, else create per-session analysis.
+    use_cache: reuse a previous analysis of identical inputs when available.
+    workers: process pool size (default: analysis.workers, 0 = CPU count).
+    progress: optional callable(done, total) invoked as sessions are mapped.
+    cancel: optional threading.Event; setting it aborts outstanding work.
+    max_inflight: cap on partial results held before they are reduced.
+    summarize: add an LLM-written summary (see summarizer.Summarizer).
+    Returns the list of analysis JSON paths (new or reused).
     """
     # normalize inputs
     paths = []
     for p in session_paths:
-        if os.path.isabs(p) and os.path.exists(p):
+        if os.path.isabs(p) and logio.exists(p):
             paths.append(p)
             continue
         alt = os.path.join(CONFIG["paths"]["logs"], p)
-        if os.path.exists(alt):
+        if logio.exists(alt):
             paths.append(alt)
             continue
         # try with extension
         if not p.endswith(".jsonl"):
             alt2 = alt + ".jsonl"
-            if os.path.exists(alt2):
+            if logio.exists(alt2):
                 paths.append(alt2)
                 continue
+        # dated layout (logs/YYYY/MM/DD/)
+        from promptscribe import layout
+        found = layout.find("logs", os.path.basename(p)) or \
+            (layout.find("logs", os.path.basename(p) + ".jsonl") if not p.endswith(".jsonl") else None)
+        if found:
+            paths.append(found)
 
     if not paths:
         print("No valid session files found for analysis.")
-        return
+        return []
 
-    if merge:
-        _create_merged_analysis(paths)
-    else:
-        for p in paths:
-            _create_single_analysis(p)
+    use_cache = use_cache and CACHE_CFG.get("enabled", True)
+    cache = _AnalysisCache() if use_cache else None
+    pool_opts = {
+        "workers": workers if workers is not None else ANALYSIS_CFG.get("workers", 0),
+        "max_inflight": max_inflight or ANALYSIS_CFG.get("max_inflight", 64),
+        "progress": progress,
+        "cancel": cancel,
+    }
+    top_k = int(ANALYSIS_CFG.get("top_k", 10))
+    llm = None
+    if summarize:
+        from promptscribe.summarizer import Summarizer
+        llm = Summarizer()
+    try:
+        with instrument.span("analyzer.run_analysis"):
+            if merge:
+                return [_run_merged(paths, cache, top_k, pool_opts, llm)]
+            return _run_per_session(paths, cache, top_k, pool_opts, llm)
+    finally:
+        if cache:
+            cache.close()
 
-def _create_single_analysis(path):
-    aid = f"A-{time.strftime('%Y%m%d')}-{uuid.uuid4().hex[:6]}"
-    out_json = os.path.join(ANALYSIS_DIR, f"{aid}.json")
-    meta_json = os.path.join(ANALYSIS_DIR, f"{aid}.meta.json")
-    # simple mock analysis: count lines, extract first/last ts
-    count = 0
+
+def _llm_params(llm):
+    return {"model": llm.model, "chunk_tokens": llm.chunk_tokens} if llm else None
+
+
+def _run_per_session(paths, cache, top_k, pool_opts, llm=None):
+    params = {"merge": False, "top_k": top_k, "llm": _llm_params(llm)}
+    results = {}
+    todo = []
+    for p in paths:
+        hit = cache.lookup_stat([p], params) if cache else None
+        if hit:
+            results[p] = hit
+        else:
+            todo.append(p)
+
+    to_summarize = []
+    for part in _map_sessions(todo, top_k, **pool_opts):
+        p = part["path"]
+        hit = cache.lookup_content([p], [part["sha256"]], params) if cache else None
+        if hit:
+            results[p] = hit
+            continue
+        llm_summary = cache.llm_summary_of([part["sha256"]], params) if cache and llm else None
+        if llm and llm_summary is None:
+            to_summarize.append(part)
+            continue
+        with instrument.span("analyzer.write"):
+            aid, summary, out_json = _create_single_analysis(part, llm_summary)
+        if cache:
+            cache.store(aid, summary, out_json, [p], [part["sha256"]], params)
+        results[p] = out_json
+
+    if to_summarize:
+        # all sessions' chunks go out in one batch so they share the concurrency budget
+        with instrument.span("analyzer.summarize"):
+            llm_summaries = llm.summarize_sessions([part["path"] for part in to_summarize])
+        for part in to_summarize:
+            p = part["path"]
+            with instrument.span("analyzer.write"):
+                aid, summary, out_json = _create_single_analysis(part, llm_summaries.get(p))
+            if cache:
+                cache.store(aid, summary, out_json, [p], [part["sha256"]], params)
+            results[p] = out_json
+
+    if cache:
+        cache.evict(keep=set(results.values()))
+    return [results[p] for p in paths if p in results]
+
+
+def _run_merged(paths, cache, top_k, pool_opts, llm=None):
+    params = {"merge": True, "top_k": top_k, "llm": _llm_params(llm)}
+    hit = cache.lookup_stat(paths, params) if cache else None
+    if hit:
+        return hit
+
+    merged = None
+    digests = {}
+    for part in _map_sessions(paths, top_k, **pool_opts):
+        digests[part["path"]] = part["sha256"]
+        merged = _reduce_partials(merged, part, top_k)
+
+    shas = [digests[p] for p in paths]
+    hit = cache.lookup_content(paths, shas, params) if cache else None
+    if hit:
+        return hit
+    llm_summary = cache.llm_summary_of(shas, params) if cache and llm else None
+    if llm and llm_summary is None:
+        with instrument.span("analyzer.summarize"):
+            llm_summary = llm.summarize_merged(paths)
+    with instrument.span("analyzer.write"):
+        aid, summary, out_json = _create_merged_analysis(paths, merged, llm_summary)
+    if cache:
+        cache.store(aid, summary, out_json, paths, shas, params)
+        cache.evict(keep={out_json})
+    return out_json
+
+
+# --- Map / reduce ---
+def _map_session(path, top_k):
+    """Single read pass over one log: content digest plus a small partial result."""
+    h = hashlib.sha256()
+    lines = 0
+    events = 0
     first_ts = None
     last_ts = None
-    with open(path, "r", encoding="utf-8") as f:
-        for ln in f:
+    kinds = Counter()
+    out_chars = 0
+    top = []
+    cmd_input, cmd_out = None, 0
+
+    def _push_cmd():
+        if cmd_input is None and not cmd_out:
+            return
+        item = (cmd_out, (cmd_input or "").strip()[:80], path)
+        if len(top) < top_k:
+            heapq.heappush(top, item)
+        elif item > top[0]:
+            heapq.heapreplace(top, item)
+
+    with logio.open_log(path) as f:
+        for raw in f:
+            h.update(raw)
+            lines += 1
             try:
-                obj = json.loads(ln)
-                ts = obj.get("ts")
+                obj = json.loads(raw)
+            except Exception:
+                continue
+            if not isinstance(obj, dict):
+                continue
+            events += 1
+            ts = obj.get("ts")
+            if ts is not None:
                 if first_ts is None:
                     first_ts = ts
                 last_ts = ts
-                count += 1
-            except Exception:
+            kind = obj.get("kind")
+            if kind is None:
                 continue
-    summary = f"Session {os.path.basename(path)}: {count} output events from {first_ts} to {last_ts}"
-    analysis = {"analysis_id": aid, "summary": summary, "input": [path]}
-    safe_write_json(out_json, analysis)
-    safe_write_json(meta_json, {"analysis_id": aid, "input_sessions": [path], "output_file": out_json})
-    print("Saved analysis:", out_json)
+            if "blob" in obj:
+                expanded = blobstore.expand(obj)
+                events += len(expanded) - 1
+                kinds[kind] += len(expanded) - 1
+                last_ts = expanded[-1].get("ts", last_ts)
+                data = "".join(e.get("data", "") for e in expanded)
+            else:
+                data = obj.get("data") or ""
+            kinds[kind] += 1
+            if kind == "out":
+                out_chars += len(data)
+                cmd_out += len(data)
+            elif kind == "in":
+                _push_cmd()
+                cmd_input, cmd_out = data, 0
+    _push_cmd()
+
+    return {
+        "path": path,
+        "sha256": h.hexdigest(),
+        "sessions": 1,
+        "lines": lines,
+        "events": events,
+        "first_ts": first_ts,
+        "last_ts": last_ts,
+        "kinds": dict(kinds),
+        "out_chars": out_chars,
+        "top_outputs": sorted(top, reverse=True),
+    }
+
+
+def _reduce_partials(acc, part, top_k):
+    """Fold one partial into the running aggregate (associative, order-independent)."""
+    if acc is None:
+        acc = {"sessions": 0, "lines": 0, "events": 0, "first_ts": None, "last_ts": None,
+               "kinds": {}, "out_chars": 0, "top_outputs": []}
+    acc["sessions"] += part["sessions"]
+    acc["lines"] += part["lines"]
+    acc["events"] += part["events"]
+    acc["out_chars"] += part["out_chars"]
+    for k in ("first_ts", "last_ts"):
+        v = part[k]
+        if v is None:
+            continue
+        cur = acc[k]
+        if cur is None or (v < cur if k == "first_ts" else v > cur):
+            acc[k] = v
+    kinds = acc["kinds"]
+    for k, n in part["kinds"].items():
+        kinds[k] = kinds.get(k, 0) + n
+    acc["top_outputs"] = heapq.nlargest(
+        top_k, [tuple(t) for t in acc["top_outputs"]] + [tuple(t) for t in part["top_outputs"]]
+    )
+    return acc
+
+
+def _map_sessions(paths, top_k, workers=0, max_inflight=64, progress=None, cancel=None):
+    """
+    Yield partials for `paths` in completion order.
+    At most `max_inflight` tasks are submitted at once, which bounds the number
+    of partials buffered while the caller reduces.
+    """
+    total = len(paths)
+    if not total:
+        return
+    workers = int(workers or 0) or os.cpu_count() or 1
+    workers = min(workers, total)
+    cancel = cancel or threading.Event()
+    done = 0
+
+    if workers == 1:
+        for p in paths:
+            if cancel.is_set():
+                raise AnalysisCancelled(f"cancelled after {done}/{total} sessions")
+            with instrument.span("analyzer.map"):
+                part = _map_session(p, top_k)
+            instrument.add("analyzer.events_decoded", part["events"])
+            yield part
+            done += 1
+            if progress:
+                progress(done, total)
+        return
+
+    max_inflight = max(int(max_inflight), workers)
+    pending = set()
+    queue = iter(paths)
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for p in queue:
+            pending.add(pool.submit(_map_session, p, top_k))
+            if len(pending) >= max_inflight:
+                break
+        while pending:
+            if cancel.is_set():
+                raise AnalysisCancelled(f"cancelled after {done}/{total} sessions")
+            with instrument.span("analyzer.map"):   # waiting on the worker pool
+                finished, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                part = fut.result()
+                instrument.add("analyzer.events_decoded", part["events"])
+                yield part
+                done += 1
+                if progress:
+                    progress(done, total)
+                nxt = next(queue, None)
+                if nxt is not None:
+                    pending.add(pool.submit(_map_session, nxt, top_k))
+    finally:
+        pool.shutdown(wait=not pending, cancel_futures=True)
+
 
-def _create_merged_analysis(paths):
+# --- Output ---
+def _new_analysis_paths():
     aid = f"A-{time.strftime('%Y%m%d')}-{uuid.uuid4().hex[:6]}"
     out_json = os.path.join(ANALYSIS_DIR, f"{aid}.json")
     meta_json = os.path.join(ANALYSIS_DIR, f"{aid}.meta.json")
-    total = 0
-    for p in paths:
-        with open(p, "r", encoding="utf-8") as f:
-            for _ in f:
-                total += 1
-    summary = f"Merged analysis of {len(paths)} sessions. {total} total events."
-    analysis = {"analysis_id": aid, "summary": summary, "input": paths}
+    return aid, out_json, meta_json
+
+
+def _stats_of(part):
+    return {k: part[k] for k in ("sessions", "lines", "events", "first_ts", "last_ts",
+                                 "kinds", "out_chars", "top_outputs")}
+
+
+def _create_single_analysis(part, llm_summary=None):
+    path = part["path"]
+    aid, out_json, meta_json = _new_analysis_paths()
+    summary = (f"Session {os.path.basename(path)}: {part['events']} output events "
+               f"from {part['first_ts']} to {part['last_ts']}")
+    analysis = {"analysis_id": aid, "summary": summary, "input": [path], "stats": _stats_of(part)}
+    if llm_summary is not None:
+        analysis["llm_summary"] = llm_summary
+    safe_write_json(out_json, analysis)
+    safe_write_json(meta_json, {"analysis_id": aid, "input_sessions": [path], "output_file": out_json})
+    print("Saved analysis:", out_json)
+    return aid, summary, out_json
+
+
+def _create_merged_analysis(paths, merged, llm_summary=None):
+    aid, out_json, meta_json = _new_analysis_paths()
+    summary = f"Merged analysis of {len(paths)} sessions. {merged['lines']} total events."
+    analysis = {"analysis_id": aid, "summary": summary, "input": paths, "stats": _stats_of(merged)}
+    if llm_summary is not None:
+        analysis["llm_summary"] = llm_summary
     safe_write_json(out_json, analysis)
     safe_write_json(meta_json, {"analysis_id": aid, "input_sessions": paths, "output_file": out_json})
     print("Saved merged analysis:", out_json)
+    return aid, summary, out_json
+
+
+# --- Analysis cache ---
+def _digest(obj):
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _stat_key(paths, params):
+    """Cheap pre-check key built from path, size and mtime of every input."""
+    inputs = [[os.path.abspath(p), *file_stat_key(p)] for p in paths]
+    return _digest({"v": ANALYZER_VERSION, "params": params, "inputs": inputs})
+
+
+def _content_key(shas, params):
+    """Content-addressed key: identical log contents hit regardless of mtime."""
+    return _digest({"v": ANALYZER_VERSION, "params": params, "inputs": list(shas)})
+
+
+def _session_ids(paths):
+    return json.dumps([os.path.abspath(p) for p in paths])
+
+
+def _artifact_size(out_json):
+    total = 0
+    for p in (out_json, os.path.splitext(out_json)[0] + ".meta.json"):
+        try:
+            total += logio.log_size(p)
+        except OSError:
+            pass
+    return total
+
+
+class _AnalysisCache:
+    """Analysis results indexed in the `analysis` table, keyed by input digest."""
+
+    def __init__(self):
+        from promptscribe import db
+        self.db = db
+        self.DB = None
+        try:
+            db.ensure_schema()
+            self.DB = db.SessionLocal()
+        except Exception as e:
+            print(f"Analysis cache unavailable ({e}); computing without cache.")
+
+    def close(self):
+        if self.DB is not None:
+            self.DB.close()
+
+    def lookup_stat(self, paths, params):
+        if self.DB is None:
+            return None
+        return self._hit(self.db.AnalysisEntry.stat_key == _stat_key(paths, params))
+
+    def lookup_content(self, paths, shas, params):
+        """
+        Analysis of identical contents at the same paths (e.g. a touched log).
+        Artifacts name their inputs, so the same contents under another path
+        (a renamed or migrated log) get an analysis of their own.
+        """
+        if self.DB is None:
+            return None
+        AnalysisEntry = self.db.AnalysisEntry
+        return self._hit((AnalysisEntry.cache_key == _content_key(shas, params))
+                         & (AnalysisEntry.session_ids == _session_ids(paths)),
+                         stat_key=_stat_key(paths, params))
+
+    def llm_summary_of(self, shas, params):
+        """Model-written summary of an analysis of identical contents at any path, or None."""
+        if self.DB is None:
+            return None
+        for e in self.DB.query(self.db.AnalysisEntry).filter(
+                self.db.AnalysisEntry.cache_key == _content_key(shas, params)).all():
+            try:
+                with open(e.file, "r", encoding="utf-8") as f:
+                    summary = json.load(f).get("llm_summary")
+            except (OSError, ValueError, TypeError):
+                continue
+            if summary is not None:
+                print("Reusing cached summary from:", e.file)
+                return summary
+        return None
+
+    def _hit(self, criterion, stat_key=None):
+        entry = None
+        for e in self.DB.query(self.db.AnalysisEntry).filter(criterion).all():
+            if e.file and os.path.exists(e.file):
+                entry = e
+                break
+            # artifact deleted behind our back: forget it
+            self.DB.delete(e)
+        if entry is not None:
+            if stat_key:
+                entry.stat_key = stat_key
+            entry.last_used_ts = time.time()
+            entry.hits = (entry.hits or 0) + 1
+            print("Reusing cached analysis:", entry.file)
+        self.DB.commit()
+        return entry.file if entry is not None else None
+
+    def store(self, aid, summary, out_json, paths, shas, params):
+        if self.DB is None:
+            return
+        now = time.time()
+        self.DB.add(self.db.AnalysisEntry(
+            id=aid,
+            session_ids=_session_ids(paths),
+            summary=summary,
+            file=out_json,
+            cache_key=_content_key(shas, params),
+            stat_key=_stat_key(paths, params),
+            size_bytes=_artifact_size(out_json),
+            created_ts=now,
+            last_used_ts=now,
+            hits=0,
+        ))
+        self.DB.commit()
+
+    def evict(self, keep=()):
+        """
+        Drop least-recently-used cached analyses beyond the configured entry/byte
+        limits. Entries whose file is in `keep` (the results of the current run)
+        are never dropped, though they still count against the limits.
+        """
+        if self.DB is None:
+            return
+        AnalysisEntry = self.db.AnalysisEntry
+        max_entries = int(CACHE_CFG.get("max_entries", 500))
+        max_bytes = int(CACHE_CFG.get("max_bytes", 100 * 1024 * 1024))
+        entries = (
+            self.DB.query(AnalysisEntry)
+            .filter(AnalysisEntry.cache_key.isnot(None))
+            .order_by(AnalysisEntry.last_used_ts.desc())
+            .all()
+        )
+        pinned = [e for e in entries if e.file in keep]
+        kept = len(pinned)
+        used = sum(e.size_bytes or 0 for e in pinned)
+        evicted = 0
+        for e in entries:
+            if e.file in keep:
+                continue
+            size = e.size_bytes or 0
+            if kept < max_entries and used + size <= max_bytes:
+                kept += 1
+                used += size
+                continue
+            for p in (e.file, os.path.splitext(e.file or "")[0] + ".meta.json"):
+                try:
+                    if p:
+                        os.remove(p)
+                except OSError:
+                    pass
+            self.DB.delete(e)
+            evicted += 1
+        if evicted:
+            self.DB.commit()
+            print(f"Evicted {evicted} cached analyses.")
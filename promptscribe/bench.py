@@ -0,0 +1,169 @@
+# promptscribe/bench.py
+"""
+Recorder overhead benchmark.
+
+Each canned workload is run bare (output discarded) and through
+`recorder._run_command` writing a real log, so the difference is what
+recording adds to the command's wall time. Every event write+flush is timed
+to build a latency histogram.
+"""
+import os
+import sys
+import time
+import shlex
+import tempfile
+import contextlib
+import subprocess
+
+
+def _python(code):
+    return f"{shlex.quote(sys.executable)} -c {shlex.quote(code)}"
+
+
+# name -> (description, shell command, runs per measurement)
+WORKLOADS = {
+    "line_rate": ("200k short lines",
+                  _python("import sys\nw = sys.stdout.write\nfor i in range(200000): w('line %d of build output\\n' % i)"), 1),
+    "huge_lines": ("16 lines of 1 MB",
+                   _python("import sys\nfor i in range(16): sys.stdout.write('x' * (1 << 20) + '\\n')"), 1),
+    "ansi": ("50k colored lines",
+             _python("import sys\nw = sys.stdout.write\n"
+                     "for i in range(50000): w('\\x1b[32mok\\x1b[0m \\x1b[1mtest_%d\\x1b[0m passed\\n' % i)"), 1),
+    "binary": ("4 MB of random bytes",
+               _python("import sys, random\nsys.stdout.buffer.write(random.Random(0).randbytes(4 << 20))"), 1),
+    "tiny_commands": ("500 `echo` commands", "echo ok", 500),
+}
+
+
+class _TimedFile:
+    """File wrapper timing each recorder write+flush pair (one event)."""
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.latencies = []
+        self.bytes = 0
+        self.errors = 0
+        self._t0 = None
+
+    def write(self, s):
+        self._t0 = time.perf_counter()
+        self.bytes += len(s.encode("utf-8", "replace"))
+        if '"kind": "error"' in s:
+            self.errors += 1
+        return self.fh.write(s)
+
+    def flush(self):
+        self.fh.flush()
+        if self._t0 is not None:
+            self.latencies.append(time.perf_counter() - self._t0)
+            self._t0 = None
+
+
+def percentile(sorted_vals, q):
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(q / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+def histogram(latencies):
+    """[(upper_bound_us, count)] over power-of-two microsecond buckets."""
+    buckets = {}
+    for lat in latencies:
+        us = lat * 1e6
+        bound = 1
+        while bound < us:
+            bound <<= 1
+        buckets[bound] = buckets.get(bound, 0) + 1
+    return sorted(buckets.items())
+
+
+def run_workload(name, log_dir, repeat=3):
+    """Median bare vs recorded wall time plus event/byte rates and write latencies."""
+    from promptscribe import recorder
+
+    _, cmd, runs = WORKLOADS[name]
+    bare, recorded = [], []
+    latencies, events, nbytes, errors = [], 0, 0, 0
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        for _ in range(runs):
+            subprocess.run(cmd, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+        bare.append(time.perf_counter() - t0)
+
+        fd, path = tempfile.mkstemp(prefix="bench-", suffix=".jsonl", dir=log_dir)
+        os.close(fd)
+        try:
+            with open(path, "w", encoding="utf-8") as raw, open(os.devnull, "w") as devnull:
+                fh = _TimedFile(raw)
+                with contextlib.redirect_stdout(devnull):
+                    t0 = time.perf_counter()
+                    for _ in range(runs):
+                        recorder._run_command(cmd, fh)
+                    recorded.append(time.perf_counter() - t0)
+        finally:
+            os.remove(path)
+        latencies.extend(fh.latencies)
+        events += len(fh.latencies)
+        nbytes += fh.bytes
+        errors += fh.errors
+    bare.sort()
+    recorded.sort()
+    latencies.sort()
+    t_bare, t_rec = bare[len(bare) // 2], recorded[len(recorded) // 2]
+    n = max(1, repeat)
+    return {
+        "workload": name,
+        "bare_s": t_bare,
+        "recorded_s": t_rec,
+        "added_s": t_rec - t_bare,
+        "overhead_pct": (t_rec - t_bare) / t_bare * 100 if t_bare else 0.0,
+        "events": events // n,
+        "bytes": nbytes // n,
+        "events_per_s": (events / n) / t_rec if t_rec else 0.0,
+        "bytes_per_s": (nbytes / n) / t_rec if t_rec else 0.0,
+        "p50_us": percentile(latencies, 50) * 1e6,
+        "p90_us": percentile(latencies, 90) * 1e6,
+        "p99_us": percentile(latencies, 99) * 1e6,
+        "max_us": (latencies[-1] if latencies else 0.0) * 1e6,
+        "errors": errors // n,
+        "histogram": histogram(latencies),
+    }
+
+
+def _fmt_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.1f} {unit}"
+        n /= 1024.0
+
+
+def run_recorder_bench(names=None, repeat=3, log_dir=None, show_histogram=False, echo=print):
+    """Run the selected workloads (all by default), print a report and return the results."""
+    names = list(names or WORKLOADS)
+    unknown = [n for n in names if n not in WORKLOADS]
+    if unknown:
+        raise ValueError(f"Unknown workload(s): {', '.join(unknown)} (choose from {', '.join(WORKLOADS)})")
+    if log_dir is None:
+        from promptscribe.config import CONFIG
+        log_dir = CONFIG["paths"]["logs"]
+    os.makedirs(log_dir, exist_ok=True)
+
+    echo(f"Recorder overhead, median of {repeat} run(s), logs written to {log_dir}")
+    echo(f"{'workload':14s} {'bare':>8s} {'recorded':>9s} {'added':>17s} {'events/s':>10s} "
+         f"{'bytes/s':>11s} {'p50':>7s} {'p90':>7s} {'p99':>7s} {'max':>8s}")
+    results = []
+    for name in names:
+        r = run_workload(name, log_dir, repeat)
+        results.append(r)
+        echo(f"{name:14s} {r['bare_s']:7.3f}s {r['recorded_s']:8.3f}s "
+             f"{r['added_s']:+8.3f}s ({r['overhead_pct']:+5.0f}%) "
+             f"{r['events_per_s']:10.0f} {_fmt_bytes(r['bytes_per_s']) + '/s':>11s} "
+             f"{r['p50_us']:5.0f}us {r['p90_us']:5.0f}us {r['p99_us']:5.0f}us {r['max_us']:6.0f}us")
+        if r["errors"]:
+            echo(f"  {r['errors']} error event(s) recorded: output was not fully captured")
+        if show_histogram:
+            peak = max((c for _, c in r["histogram"]), default=1)
+            for bound, count in r["histogram"]:
+                echo(f"  <= {bound:>8d}us {count:9d} {'#' * max(1, count * 40 // peak)}")
+    return results
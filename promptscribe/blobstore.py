@@ -0,0 +1,337 @@
+# promptscribe/blobstore.py
+"""
+Content-defined chunk store for repeated command output.
+
+`pack_log` rewrites a finished session log so that each long run of "out"
+events (one command's output, at least `blobstore.threshold` bytes) becomes a
+single event referencing chunks:
+
+    {"ts": 1700000000.1, "kind": "out", "blob": {"c": [chunk ids], "n": bytes, "dt": [us, ...]}}
+
+`dt` keeps every line's timestamp as a microsecond offset from `ts`, so the
+original events can be rebuilt exactly. Chunk boundaries are content-defined
+(FastCDC-style normalized chunking with min/avg/max sizes), so the same
+output recorded again maps to the same chunks even when surrounded by
+different lines; each chunk is stored once, zlib-compressed, under
+`paths.blobs/<id[:2]>/<id>`. Readers call `expand()` on events carrying a
+"blob" key; `gc()` deletes chunks that no log references anymore.
+"""
+import os
+import json
+import zlib
+import time
+import hashlib
+from collections import OrderedDict
+
+MIN_CHUNK = 2 * 1024
+AVG_CHUNK = 8 * 1024
+MAX_CHUNK = 64 * 1024
+# normalized chunking: cuts are this many times less likely before the
+# average size and more likely after it
+_NORMALIZE = 4
+DEFAULT_THRESHOLD = 64 * 1024
+CACHE_CHUNKS = 256
+
+_store = None
+
+
+def _cfg():
+    from promptscribe.config import CONFIG
+    return CONFIG.get("blobstore") or {}
+
+
+def default_store():
+    """Store at CONFIG["paths"]["blobs"] (or <root>/blobs)."""
+    global _store
+    if _store is None:
+        from promptscribe.config import CONFIG
+        paths = CONFIG["paths"]
+        _store = BlobStore(paths.get("blobs") or os.path.join(paths["root"], "blobs"))
+    return _store
+
+
+def _line_hash(line):
+    return zlib.crc32(line) * 0x9E3779B1 & 0xFFFFFFFF
+
+
+def chunk_lines(lines, min_size=MIN_CHUNK, avg_size=AVG_CHUNK, max_size=MAX_CHUNK):
+    """
+    Split encoded lines into chunks (bytes). Cut points fall after a line
+    whose hash is below a threshold proportional to its length (about one
+    cut per `avg_size` bytes), so they depend on content, not position;
+    a line longer than `max_size` is cut at fixed offsets.
+    """
+    buf = []
+    size = 0
+    for line in lines:
+        while len(line) > max_size:
+            if buf:
+                yield b"".join(buf)
+                buf, size = [], 0
+            yield line[:max_size]
+            line = line[max_size:]
+        buf.append(line)
+        size += len(line)
+        if size < min_size:
+            continue
+        if size < avg_size:
+            limit = (len(line) << 32) // (avg_size * _NORMALIZE)
+        else:
+            limit = (len(line) << 32) * _NORMALIZE // avg_size
+        if size >= max_size or _line_hash(line) < limit:
+            yield b"".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield b"".join(buf)
+
+
+class BlobStore:
+    """Chunks on disk keyed by their BLAKE2b digest."""
+
+    def __init__(self, root):
+        self.root = root
+        self._cache = OrderedDict()     # chunk id -> bytes, most recently used last
+
+    def _path(self, cid):
+        return os.path.join(self.root, cid[:2], cid)
+
+    def put_chunk(self, data):
+        """Store `data` unless present; returns (chunk id, bytes newly written)."""
+        cid = hashlib.blake2b(data, digest_size=16).hexdigest()
+        path = self._path(cid)
+        if os.path.exists(path):
+            os.utime(path)  # fresh mtime: a concurrent gc() must not take a chunk being re-referenced
+            return cid, 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        packed = zlib.compress(data, 6)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(packed)
+        os.replace(tmp, path)
+        return cid, len(packed)
+
+    def get_chunk(self, cid):
+        data = self._cache.get(cid)
+        if data is not None:
+            self._cache.move_to_end(cid)
+            return data
+        with open(self._path(cid), "rb") as f:
+            data = zlib.decompress(f.read())
+        self._cache[cid] = data
+        if len(self._cache) > CACHE_CHUNKS:
+            self._cache.popitem(last=False)
+        return data
+
+    def read(self, chunk_ids):
+        return b"".join(self.get_chunk(c) for c in chunk_ids)
+
+    def iter_chunks(self):
+        """(chunk id, path) of every stored chunk."""
+        if not os.path.isdir(self.root):
+            return
+        for sub in os.listdir(self.root):
+            d = os.path.join(self.root, sub)
+            if len(sub) != 2 or not os.path.isdir(d):
+                continue
+            for name in os.listdir(d):
+                if not name.endswith(".tmp"):
+                    yield name, os.path.join(d, name)
+
+
+# --- Reading ---
+def expand(evt, store=None):
+    """
+    The original "out" events behind a blob reference. Events after the first
+    carry "_cont": True: they share one log line, so a reader must not resume
+    at them by byte offset.
+    """
+    ref = evt["blob"]
+    store = store or default_store()
+    try:
+        text = store.read(ref["c"]).decode("utf-8", "replace")
+    except (OSError, zlib.error) as e:
+        return [{"ts": evt.get("ts"), "kind": "error", "data": f"blob_missing:{e!r}"}]
+    parts = text.split("\n")
+    lines = [p + "\n" for p in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    ts0 = evt.get("ts") or 0.0
+    dts = ref.get("dt") or []
+    if len(dts) != len(lines) - 1:
+        return [{"ts": ts0, "kind": "out", "data": text}]
+    out = [{"ts": ts0, "kind": "out", "data": lines[0]}]
+    for dt, line in zip(dts, lines[1:]):
+        out.append({"ts": round(ts0 + dt / 1e6, 6), "kind": "out", "data": line, "_cont": True})
+    return out
+
+
+def resolve_data(evt, store=None):
+    """Full text of an event, resolving a blob reference."""
+    if "blob" not in evt:
+        return evt.get("data", "")
+    return "".join(e.get("data", "") for e in expand(evt, store))
+
+
+# --- Packing ---
+def _packable(evt):
+    if not isinstance(evt, dict) or evt.get("kind") != "out" or "blob" in evt:
+        return False
+    data = evt.get("data")
+    return isinstance(data, str) and data.endswith("\n") and data.count("\n") == 1 \
+        and isinstance(evt.get("ts"), (int, float))
+
+
+def _pack_run(run, store, stats):
+    """One blob event for a run of single-line "out" events."""
+    run = [e for e, _ in run]
+    encoded = [e["data"].encode("utf-8") for e in run]
+    ids = []
+    for chunk in chunk_lines(encoded):
+        cid, written = store.put_chunk(chunk)
+        ids.append(cid)
+        stats["stored_bytes"] += written
+        stats["chunks_new" if written else "chunks_reused"] += 1
+    ts0 = run[0]["ts"]
+    dts = [int(round((e["ts"] - ts0) * 1e6)) for e in run[1:]]
+    return {"ts": ts0, "kind": "out", "blob": {"c": ids, "n": sum(map(len, encoded)), "dt": dts}}
+
+
+def pack_log(path, store=None, threshold=None):
+    """
+    Rewrite `path` with long output runs moved into the chunk store.
+    Returns stats (bytes_before, bytes_after, runs, chunks_new, chunks_reused, stored_bytes).
+    """
+    store = store or default_store()
+    threshold = threshold or int(_cfg().get("threshold") or DEFAULT_THRESHOLD)
+    stats = {"bytes_before": 0, "bytes_after": 0, "runs": 0,
+             "chunks_new": 0, "chunks_reused": 0, "stored_bytes": 0}
+    if not os.path.isfile(path):
+        return stats    # segmented and packed logs are compressed already and are not rewritten
+    stats["bytes_before"] = os.path.getsize(path)
+    tmp = f"{path}.{os.getpid()}.pack"
+    run, run_size = [], 0
+
+    def flush(out):
+        nonlocal run, run_size
+        if run_size >= threshold and len(run) > 1:
+            out.write(json.dumps(_pack_run(run, store, stats), ensure_ascii=False) + "\n")
+            stats["runs"] += 1
+        else:
+            out.flush()
+            out.buffer.writelines(raw for _, raw in run)
+        run, run_size = [], 0
+
+    try:
+        with open(path, "rb") as src, open(tmp, "w", encoding="utf-8", newline="\n") as out:
+            for raw in src:
+                try:
+                    evt = json.loads(raw) if raw.endswith(b"\n") else None
+                except (ValueError, UnicodeDecodeError):
+                    evt = None
+                if evt is not None and _packable(evt):
+                    run.append((evt, raw))
+                    run_size += len(raw)
+                    continue
+                flush(out)
+                out.flush()
+                out.buffer.write(raw)   # everything else is copied byte for byte
+            flush(out)
+        if not stats["runs"]:
+            os.remove(tmp)
+            stats["bytes_after"] = stats["bytes_before"]
+            return stats
+        st = os.stat(path)
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    stats["bytes_after"] = os.path.getsize(path)
+    return stats
+
+
+def pack_sessions(session_ids=None, store=None, threshold=None):
+    """
+    Pack the logs of the given sessions (all indexed sessions by default).
+    Yields (session id, stats or None if the log is missing).
+    """
+    from promptscribe import db
+    s = db.SessionLocal()
+    try:
+        query = s.query(db.SessionEntry.id, db.SessionEntry.file)
+        if session_ids:
+            query = query.filter(db.SessionEntry.id.in_(session_ids))
+        rows = query.all()
+    finally:
+        s.close()
+    for sid, path in rows:
+        from promptscribe import logio
+        if not logio.exists(path):
+            yield sid, None
+            continue
+        yield sid, pack_log(path, store, threshold)
+
+
+# --- Garbage collection ---
+def referenced_chunks(paths):
+    """Chunk ids referenced by the given logs."""
+    from promptscribe import logio
+    refs = set()
+    for path in paths:
+        try:
+            with logio.open_log(path) as f:
+                for raw in f:
+                    if b'"blob"' not in raw:
+                        continue
+                    try:
+                        evt = json.loads(raw)
+                    except (ValueError, UnicodeDecodeError):
+                        continue
+                    if isinstance(evt, dict) and isinstance(evt.get("blob"), dict):
+                        refs.update(evt["blob"].get("c") or ())
+        except OSError:
+            continue
+    return refs
+
+
+def _all_logs():
+    from promptscribe import db
+    from promptscribe.config import CONFIG
+    paths = set()
+    for root, dirs, files in os.walk(CONFIG["paths"]["logs"]):
+        paths.update(os.path.join(root, f) for f in files if f.endswith(".jsonl"))
+        segmented = [d for d in dirs if d.endswith(".jsonl")]
+        paths.update(os.path.join(root, d) for d in segmented)
+        dirs[:] = [d for d in dirs if d not in segmented]
+    for batch in db.iter_session_records(include_missing=False, batch_size=1000):
+        paths.update(r["file"] for r in batch if r["file"])
+    return paths
+
+
+def gc(dry_run=False, grace_seconds=3600, store=None):
+    """
+    Delete chunks referenced by no log (in the logs dir or the DB). Chunks
+    younger than `grace_seconds` are kept, since a pack may be in progress.
+    Returns (chunks removed, bytes freed, chunks kept).
+    """
+    store = store or default_store()
+    refs = referenced_chunks(_all_logs())
+    cutoff = time.time() - grace_seconds
+    removed = freed = kept = 0
+    for cid, path in store.iter_chunks():
+        if cid in refs:
+            kept += 1
+            continue
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if st.st_mtime > cutoff:
+            kept += 1
+            continue
+        removed += 1
+        freed += st.st_size
+        if not dry_run:
+            os.remove(path)
+    return removed, freed, kept
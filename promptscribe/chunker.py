@@ -0,0 +1,167 @@
+# promptscribe/chunker.py
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from promptscribe import parser
+
+# Rough chars-per-token ratio for English text and shell output.
+CHARS_PER_TOKEN = 4
+
+# Remembered output digests for cross-chunk deduplication.
+DEDUPE_WINDOW = 4096
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate; good enough to stay under a model's context budget."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def get_estimator(tokenizer: Optional[str] = None, model: Optional[str] = None) -> Callable[[str], int]:
+    """
+    Return a token counting function.
+    tokenizer="tiktoken" uses the model's real encoding when tiktoken is
+    installed; anything else (or a missing package) falls back to the heuristic.
+    """
+    if tokenizer == "tiktoken":
+        try:
+            import tiktoken
+            try:
+                enc = tiktoken.encoding_for_model(model or "")
+            except KeyError:
+                enc = tiktoken.get_encoding("cl100k_base")
+            return lambda text: len(enc.encode(text, disallowed_special=()))
+        except ImportError:
+            pass
+    return estimate_tokens
+
+
+@dataclass
+class Chunk:
+    text: str
+    tokens: int
+    first_command: int
+    last_command: int
+
+
+def render_command(cmd: Dict[str, Any]) -> str:
+    """Render one parsed command the way it appeared in the terminal."""
+    inp = cmd.get("input", "").rstrip("\n")
+    out = cmd.get("output", "")
+    text = f"$ {inp}\n" if inp else ""
+    if out:
+        text += out if out.endswith("\n") else out + "\n"
+    return text
+
+
+def elide_output(output: str, max_chars: int, keep_ratio: float = 0.5) -> str:
+    """Keep the head and tail of an oversized output, replacing the middle with a marker."""
+    if len(output) <= max_chars:
+        return output
+    head_chars = int(max_chars * keep_ratio)
+    tail_chars = max_chars - head_chars
+    # cut on line boundaries where possible so the kept parts stay readable
+    head = output[:head_chars]
+    nl = head.rfind("\n")
+    if nl > head_chars // 2:
+        head = head[:nl + 1]
+    tail = output[len(output) - tail_chars:]
+    nl = tail.find("\n")
+    if 0 <= nl < tail_chars // 2:
+        tail = tail[nl + 1:]
+    dropped = output[len(head):len(output) - len(tail)]
+    marker = f"... [{dropped.count(chr(10))} lines / {len(dropped)} chars elided] ...\n"
+    return head + marker + tail
+
+
+def _fit(text: str, cost: int, max_tokens: int, count_tokens: Callable[[str], int]):
+    """
+    Cut `text` (costing `cost` tokens) until it fits `max_tokens`, re-measuring
+    each time: dense text such as code or CJK packs more tokens per character
+    than CHARS_PER_TOKEN assumes. Returns (text, cost).
+    """
+    full = text
+    chars = min(len(full), max_tokens * CHARS_PER_TOKEN)
+    while cost > max_tokens and chars > 0:
+        chars = min(chars - 1, chars * max_tokens // cost)
+        text = elide_output(full, chars)
+        cost = count_tokens(text)
+    # budget too small even for the elision marker: plain truncation
+    while cost > max_tokens and text:
+        text = text[:min(len(text) - 1, len(text) * max_tokens // cost)]
+        cost = count_tokens(text)
+    return text, cost
+
+
+class _SeenOutputs:
+    """Bounded LRU of output digests -> index of the command that first produced them."""
+
+    def __init__(self, size=DEDUPE_WINDOW):
+        self.size = size
+        self.seen: "OrderedDict[bytes, int]" = OrderedDict()
+
+    def check(self, output: str, idx: int) -> Optional[int]:
+        key = hashlib.blake2b(output.encode("utf-8", "replace"), digest_size=16).digest()
+        prev = self.seen.get(key)
+        if prev is not None:
+            self.seen.move_to_end(key)
+            return prev
+        self.seen[key] = idx
+        if len(self.seen) > self.size:
+            self.seen.popitem(last=False)
+        return None
+
+
+def iter_chunks(commands: Iterable[Dict[str, Any]], max_tokens: int,
+                count_tokens: Callable[[str], int] = estimate_tokens,
+                max_output_tokens: Optional[int] = None,
+                dedupe: bool = True, min_dedupe_chars: int = 256) -> Iterator[Chunk]:
+    """
+    Stream commands into chunks of at most `max_tokens`.
+    - Chunks only split between commands.
+    - Outputs above `max_output_tokens` (default: half the budget) keep head and tail.
+    - Outputs repeated verbatim are replaced by a reference to the first command.
+    """
+    if max_output_tokens is None:
+        max_output_tokens = max_tokens // 2
+    max_output_chars = max_output_tokens * CHARS_PER_TOKEN
+    seen = _SeenOutputs() if dedupe else None
+
+    parts: List[str] = []
+    used = 0
+    first = 0
+    for idx, cmd in enumerate(commands):
+        output = cmd.get("output", "")
+        if seen is not None and len(output) >= min_dedupe_chars:
+            prev = seen.check(output, idx)
+            if prev is not None:
+                output = f"[output identical to command #{prev}, {len(output)} chars]\n"
+        if len(output) > max_output_chars:
+            output = elide_output(output, max_output_chars)
+        text = render_command({"input": cmd.get("input", ""), "output": output})
+        if not text:
+            continue
+        cost = count_tokens(text)
+        if cost > max_tokens:
+            # long input line, dense text or a budget too small for the marker: hard cut
+            text, cost = _fit(text, cost, max_tokens, count_tokens)
+        if parts and used + cost > max_tokens:
+            yield Chunk("".join(parts), used, first, idx - 1)
+            parts, used = [], 0
+        if not parts:
+            first = idx
+        parts.append(text)
+        used += cost
+    if parts:
+        yield Chunk("".join(parts), used, first, idx)
+
+
+def chunk_commands(commands: Iterable[Dict[str, Any]], max_tokens: int, **kwargs) -> Iterator[str]:
+    """Text-only view of iter_chunks."""
+    for chunk in iter_chunks(commands, max_tokens, **kwargs):
+        yield chunk.text
+
+
+def chunk_session(path: str, max_tokens: int, **kwargs) -> Iterator[Chunk]:
+    """Stream a session log from disk into chunks without loading it whole."""
+    return iter_chunks(parser.iter_commands(parser.iter_events(path)), max_tokens, **kwargs)
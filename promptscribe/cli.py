@@ -3,8 +3,10 @@ import click
 import traceback
 import os
 import sys
-from promptscribe import db, __version__
-from promptscribe.session import start as start_session
+from promptscribe import __version__
+
+# Heavy modules (sqlalchemy via db, rich, tkinter, openai, rapidfuzz) are
+# imported inside the commands that use them so --help/--version stay fast.
 
 CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
 
@@ -12,7 +14,8 @@ CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
 # --- Utility: Ensure database file exists --- #
 def ensure_db_exists():
     try:
-        db_path = getattr(db, "DB_PATH", os.path.join("data", "promptscribe.db"))
+        from promptscribe.config import database_path
+        db_path = database_path()
         if not os.path.exists(db_path):
             click.echo(f"Database missing at: {db_path}")
             click.echo("Run 'promptscribe initdb' before using other commands.")
@@ -22,16 +25,47 @@ def ensure_db_exists():
         sys.exit(1)
 
 
+def _start_profiling(ctx, pstats_path=None, trace_path=None):
+    """Enable instrumentation now and report when the command finishes."""
+    from promptscribe import instrument
+    instrument.enable(trace=bool(trace_path))
+    profiler = None
+    if pstats_path:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    def finish():
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(pstats_path)
+        instrument.report()
+        if pstats_path:
+            click.echo(f"pstats written to {pstats_path} (python -m pstats {pstats_path})", err=True)
+        if trace_path:
+            instrument.write_chrome_trace(trace_path)
+            click.echo(f"Chrome trace written to {trace_path}", err=True)
+
+    ctx.call_on_close(finish)
+
+
 @click.group(context_settings=CONTEXT_SETTINGS, invoke_without_command=True)
 @click.option("--version", is_flag=True, help="Show current PromptScribe version and exit.")
 @click.option("--debug", is_flag=True, help="Enable verbose debug mode for troubleshooting.")
+@click.option("--profile", is_flag=True, help="Print a per-phase timing breakdown to stderr on exit.")
+@click.option("--pstats", "pstats_path", default=None, metavar="FILE",
+              help="With --profile: also run cProfile and save pstats data to FILE.")
+@click.option("--trace", "trace_path", default=None, metavar="FILE",
+              help="With --profile: also write a Chrome trace (chrome://tracing, Perfetto) to FILE.")
 @click.pass_context
-def main(ctx, version, debug):
+def main(ctx, version, debug, profile, pstats_path, trace_path):
     """
     PromptScribe CLI - Record, manage, and analyze terminal sessions.
     """
     ctx.ensure_object(dict)
     ctx.obj["DEBUG"] = debug
+    if profile or pstats_path or trace_path:
+        _start_profiling(ctx, pstats_path, trace_path)
 
     if version:
         click.echo(f"PromptScribe v{__version__}")
@@ -47,6 +81,7 @@ def main(ctx, version, debug):
 def initdb(ctx):
     """Initialize or repair the local database."""
     try:
+        from promptscribe import db
         click.echo("Initializing database...")
         db.init_db()
         click.echo("Database initialized successfully.")
@@ -63,6 +98,7 @@ def insert(ctx, meta_path):
     """Insert session metadata into the database."""
     ensure_db_exists()
     try:
+        from promptscribe import db
         click.echo(f"Inserting session from: {meta_path}")
         db.insert_session(meta_path)
         click.echo("Session inserted successfully.")
@@ -80,6 +116,7 @@ def list(ctx, limit, show_missing):
     """List recorded sessions stored in the database."""
     ensure_db_exists()
     try:
+        from promptscribe import db
         click.echo(f"Listing last {limit} sessions:")
         db.list_entries(limit=limit, show_missing=show_missing)
     except Exception as e:
@@ -120,6 +157,7 @@ def record(ctx, name, desc):
     """Start a new recording session."""
     ensure_db_exists()
     try:
+        from promptscribe.session import start as start_session
         click.echo("Starting recording session...")
         start_session(name=name, user_description=desc, register_db=True)
     except Exception as e:
@@ -132,12 +170,28 @@ def record(ctx, name, desc):
 @click.argument("session_id")
 @click.option("--summary", is_flag=True, help="Show only command outputs.")
 @click.option("--tail", type=int, default=None, help="Show last N events.")
+@click.option("--follow", "-f", is_flag=True, help="Keep watching a session that is still recording.")
+@click.option("--pager", "-p", "use_pager", is_flag=True,
+              help="Page through the session interactively (jump, search) instead of printing it.")
+@click.option("--replay", "do_replay", is_flag=True, help="Play the session back with its original timing.")
+@click.option("--speed", default="1x", help="With --replay: playback speed, e.g. 4x or 0.5x.")
+@click.option("--max-idle", default=None, help="With --replay: cap pauses, e.g. 2s.")
+@click.option("--from", "start", default=None, help="With --replay: start at a session time, e.g. 00:10:00.")
 @click.pass_context
-def view(ctx, session_id, summary, tail):
+def view(ctx, session_id, summary, tail, follow, use_pager, do_replay, speed, max_idle, start):
     """View or replay a recorded session."""
     ensure_db_exists()
     try:
         from promptscribe import viewer
+        if follow:
+            viewer.follow_session(session_id, summary=summary, tail=tail)
+            return
+        if do_replay:
+            viewer.replay_session(session_id, speed=speed, max_idle=max_idle, start=start)
+            return
+        if use_pager:
+            viewer.page_session(session_id, summary=summary, tail=tail)
+            return
         viewer.display_session(session_id, summary=summary, tail=tail)
     except Exception as e:
         click.echo(f"View failed: {e}")
@@ -152,8 +206,7 @@ def view(ctx, session_id, summary, tail):
 def preprocess(ctx, session_id, update_db):
     """Preprocess and summarize a session log."""
     ensure_db_exists()
-    import os
-    from promptscribe import preprocess
+    from promptscribe import db, preprocess
 
     try:
         db_session = db.SessionLocal()
@@ -164,8 +217,9 @@ def preprocess(ctx, session_id, update_db):
             click.echo(f"No session found with ID: {session_id}")
             return
 
+        from promptscribe import logio
         path = entry.file
-        if not os.path.exists(path):
+        if not logio.exists(path):
             click.echo(f"Log file missing: {path}")
             return
 
@@ -183,17 +237,60 @@ def preprocess(ctx, session_id, update_db):
 @click.option("--name", default=None, help="Custom name for the exported file.")
 @click.option("--desc", default=None, help="Add or override description in export header.")
 @click.option("--out", "out_path", default=None, help="Custom output file path.")
+@click.option("--compress", type=click.Choice(["none", "gzip", "zstd"]), default="none",
+              help="Compress the export while writing it.")
+@click.option("--format", "fmt", type=click.Choice(["txt", "cast"]), default="txt",
+              help="txt transcript or asciinema v2 .cast recording with timing.")
+@click.option("--max-idle", type=float, default=None, help="With --format cast: cap pauses at N seconds.")
+@click.option("--coalesce-ms", type=float, default=0.0,
+              help="With --format cast: merge events closer than N milliseconds.")
+@click.option("--no-reuse", is_flag=True, help="Render from scratch even if an up-to-date export exists.")
+@click.option("--archive", "archive_path", default=None,
+              help="Bulk export into one archive (.tar, .tar.gz, .tar.zst or .zip).")
+@click.option("--all", "all_sessions", is_flag=True, help="With --archive: export every recorded session.")
+@click.option("--since", default=None, help="With --archive: sessions started since a date or age (e.g. 90d).")
+@click.option("--ids", default=None, help="With --archive: comma-separated session IDs.")
+@click.option("--workers", type=int, default=None, help="With --archive: render worker processes.")
 @click.pass_context
-def scrape(ctx, session_id, name, desc, out_path):
-    """Export raw terminal transcript for a session."""
+def scrape(ctx, session_id, name, desc, out_path, compress, fmt, max_idle, coalesce_ms, no_reuse,
+           archive_path, all_sessions, since, ids, workers):
+    """Export raw terminal transcript for a session (or many, with --archive)."""
+    if archive_path and (compress != "none" or name or out_path):
+        raise click.UsageError("--compress, --name and --out do not apply to --archive "
+                               "(the archive extension sets compression).")
     ensure_db_exists()
     from promptscribe import scraper
     try:
+        if archive_path:
+            from promptscribe.utils import parse_time_spec
+            id_list = [i.strip() for i in ids.split(",") if i.strip()] if ids else []
+            if session_id:
+                id_list.append(session_id)
+            if not (all_sessions or since or id_list):
+                click.echo("Choose sessions with --all, --since or --ids.")
+                return
+            out, manifest = scraper.export_archive(
+                archive_path,
+                session_ids=id_list or None,
+                since=parse_time_spec(since) if since else None,
+                workers=workers,
+                fmt=fmt,
+                override_desc=desc,
+                max_idle=max_idle,
+                coalesce=coalesce_ms / 1000.0,
+            )
+            click.echo(f"Exported {len(manifest['sessions'])} sessions to: {out}")
+            return
         out = scraper.export_raw(
             session_id=session_id,
             name=name,
             out_path=out_path,
-            override_desc=desc
+            override_desc=desc,
+            compress=compress,
+            fmt=fmt,
+            max_idle=max_idle,
+            coalesce=coalesce_ms / 1000.0,
+            reuse=not no_reuse,
         )
         click.echo(f"Exported raw log to: {out}")
     except Exception as e:
@@ -202,6 +299,33 @@ def scrape(ctx, session_id, name, desc, out_path):
             traceback.print_exc()
 
 
+@main.command()
+@click.argument("query", nargs=-1, required=True)
+@click.option("--limit", default=20, help="Number of matches to show.")
+@click.option("--min-score", default=60.0, help="Minimum match score (0-100).")
+@click.pass_context
+def find(ctx, query, limit, min_score):
+    """
+    Fuzzy-search sessions by name, description and ID.
+
+    Scoring uses every CPU core when numpy is installed
+    (pip install "promptscribe[fast]"), otherwise a single thread.
+    """
+    ensure_db_exists()
+    try:
+        from promptscribe import finder
+        hits = finder.load_finder().search(" ".join(query), limit=limit, score_cutoff=min_score)
+        if not hits:
+            click.echo("No matching sessions.")
+            return
+        for row, score in hits:
+            click.echo(f"{score:5.1f}\t{row['id']}\t{row['name']}\t{row['description']}")
+    except Exception as e:
+        click.echo(f"Search failed: {e}")
+        if ctx.obj.get("DEBUG"):
+            traceback.print_exc()
+
+
 # --------------------- ANALYTICS COMMANDS --------------------- #
 @main.command()
 @click.option("--limit", default=200, help="Scan last N sessions (DB order).")
@@ -221,6 +345,182 @@ def stats(ctx, limit, top, csv_out, csv_path):
             traceback.print_exc()
 
 
+@main.command()
+@click.argument("sessions", nargs=-1, required=True)
+@click.option("--merge", is_flag=True, help="Create one combined analysis instead of one per session.")
+@click.option("--workers", type=int, default=None, help="Worker processes (default: one per CPU core).")
+@click.option("--no-cache", is_flag=True, help="Always recompute, ignoring cached analyses.")
+@click.option("--summarize", is_flag=True, help="Add an AI-written summary using the 'ai' config section.")
+@click.pass_context
+def analyze(ctx, sessions, merge, workers, no_cache, summarize):
+    """Analyze one or more session logs (paths or basenames)."""
+    ensure_db_exists()
+    from promptscribe import analyzer
+
+    def progress(done, total):
+        click.echo(f"\rAnalyzed {done}/{total} sessions", nl=(done == total), err=True)
+
+    try:
+        analyzer.run_analysis(sessions, merge=merge, use_cache=not no_cache,
+                              workers=workers, progress=progress, summarize=summarize)
+    except KeyboardInterrupt:
+        click.echo("\nAnalysis cancelled.")
+    except Exception as e:
+        click.echo(f"Analysis failed: {e}")
+        if ctx.obj.get("DEBUG"):
+            traceback.print_exc()
+
+
+@main.command()
+@click.option("--all", "show_all", is_flag=True, help="Also list stale entries of recorders that died.")
+@click.pass_context
+def status(ctx, show_all):
+    """List active recording sessions with their throughput."""
+    try:
+        from promptscribe import metrics
+        metrics.show_status(include_stale=show_all)
+    except Exception as e:
+        click.echo(f"Status failed: {e}")
+        if ctx.obj.get("DEBUG"):
+            traceback.print_exc()
+
+
+@main.group()
+def bench():
+    """Measure PromptScribe's own overhead on this host."""
+
+
+@bench.command("recorder")
+@click.option("--workload", "workloads", multiple=True,
+              help="Workload to run (repeatable): line_rate, huge_lines, ansi, binary, tiny_commands.")
+@click.option("--repeat", default=3, help="Runs per workload; the median is reported.")
+@click.option("--dir", "log_dir", default=None, help="Where to write the benchmark logs (default: the logs dir).")
+@click.option("--histogram", is_flag=True, help="Print the per-event write latency histogram.")
+@click.option("--json", "as_json", is_flag=True, help="Print results as JSON instead of a table.")
+@click.pass_context
+def bench_recorder(ctx, workloads, repeat, log_dir, histogram, as_json):
+    """Compare canned workloads run bare vs. through the recorder."""
+    try:
+        import json
+        from promptscribe import bench as bench_mod
+        echo = (lambda *_: None) if as_json else click.echo
+        results = bench_mod.run_recorder_bench(workloads or None, repeat=repeat, log_dir=log_dir,
+                                               show_histogram=histogram, echo=echo)
+        if as_json:
+            click.echo(json.dumps(results, indent=2))
+    except Exception as e:
+        click.echo(f"Benchmark failed: {e}")
+        if ctx.obj.get("DEBUG"):
+            traceback.print_exc()
+
+
+@main.command()
+@click.option("--older-than", default="30d", show_default=True,
+              help="Compact sessions that ended before this (age like 30d, or YYYY-MM-DD).")
+@click.option("--pack-older-than", default=None,
+              help="Also move sessions older than this into monthly pack files.")
+@click.option("--workers", default=None, type=int, help="Worker processes (default: compact.workers, 0 = CPUs).")
+@click.option("--keep-redraws", is_flag=True, help="Keep every progress-bar redraw line.")
+@click.option("--dry-run", is_flag=True, help="Only report what would be compacted.")
+@click.pass_context
+def compact(ctx, older_than, pack_older_than, workers, keep_redraws, dry_run):
+    """Convert old sessions into compressed archives and monthly packs."""
+    ensure_db_exists()
+    try:
+        from promptscribe import compact as compact_mod
+        from promptscribe.utils import parse_time_spec
+        summary = compact_mod.run_compaction(
+            parse_time_spec(older_than),
+            pack_older_than=parse_time_spec(pack_older_than) if pack_older_than else None,
+            workers=workers, redraws=False if keep_redraws else None, dry_run=dry_run, echo=click.echo)
+        if not dry_run:
+            click.echo(f"Compacted {summary['converted']} session(s): "
+                       f"{summary['bytes_before']} -> {summary['bytes_after']} bytes, "
+                       f"{summary['redraws_dropped']} redraw line(s) dropped; "
+                       f"packed {summary['packed']}; {summary['failed']} failed.")
+    except Exception as e:
+        click.echo(f"Compaction failed: {e}")
+        if ctx.obj.get("DEBUG"):
+            traceback.print_exc()
+
+
+@main.command("migrate-layout")
+@click.option("--workers", default=8, show_default=True, help="Parallel renames.")
+@click.option("--batch-size", default=500, show_default=True, help="Files moved per DB transaction.")
+@click.option("--dry-run", is_flag=True, help="Only count the files that would move.")
+@click.pass_context
+def migrate_layout(ctx, workers, batch_size, dry_run):
+    """Move flat logs and metadata into dated (YYYY/MM/DD) directories."""
+    ensure_db_exists()
+    try:
+        from promptscribe import layout
+        summary = layout.migrate(workers=workers, batch_size=batch_size, dry_run=dry_run, echo=click.echo)
+        if not dry_run:
+            click.echo(f"Moved {summary['logs']} log(s) and {summary['metadata']} metadata file(s), "
+                       f"{summary['rows']} DB row(s) updated, {summary['skipped']} skipped.")
+    except Exception as e:
+        click.echo(f"Migration failed: {e}")
+        if ctx.obj.get("DEBUG"):
+            traceback.print_exc()
+
+
+@main.group()
+def blobs():
+    """Deduplicated storage for long command output."""
+
+
+@blobs.command("pack")
+@click.argument("session_ids", nargs=-1)
+@click.option("--all", "pack_all", is_flag=True, help="Pack every indexed session.")
+@click.option("--threshold", default=None, type=int, help="Min bytes of consecutive output to pack.")
+@click.pass_context
+def blobs_pack(ctx, session_ids, pack_all, threshold):
+    """Move long output runs of finished sessions into the chunk store."""
+    ensure_db_exists()
+    if not session_ids and not pack_all:
+        click.echo("Give session IDs or --all.")
+        return
+    try:
+        from promptscribe import blobstore
+        before = after = stored = runs = 0
+        for sid, st in blobstore.pack_sessions(session_ids or None, threshold=threshold):
+            if st is None:
+                click.echo(f"{sid}: log file missing")
+                continue
+            before += st["bytes_before"]
+            after += st["bytes_after"]
+            stored += st["stored_bytes"]
+            runs += st["runs"]
+            if st["runs"]:
+                click.echo(f"{sid}: {st['runs']} run(s), {st['bytes_before']} -> {st['bytes_after']} bytes, "
+                           f"{st['chunks_new']} new / {st['chunks_reused']} reused chunk(s)")
+        saved = before - after - stored
+        click.echo(f"Packed {runs} run(s): logs {before} -> {after} bytes, {stored} bytes of new chunks, "
+                   f"{saved} bytes saved.")
+    except Exception as e:
+        click.echo(f"Pack failed: {e}")
+        if ctx.obj.get("DEBUG"):
+            traceback.print_exc()
+
+
+@blobs.command("gc")
+@click.option("--dry-run", is_flag=True, help="Only report what would be removed.")
+@click.option("--grace", default=3600, help="Keep unreferenced chunks younger than this many seconds.")
+@click.pass_context
+def blobs_gc(ctx, dry_run, grace):
+    """Delete chunks no session log references anymore."""
+    ensure_db_exists()
+    try:
+        from promptscribe import blobstore
+        removed, freed, kept = blobstore.gc(dry_run=dry_run, grace_seconds=grace)
+        verb = "Would remove" if dry_run else "Removed"
+        click.echo(f"{verb} {removed} chunk(s), {freed} bytes; {kept} kept.")
+    except Exception as e:
+        click.echo(f"GC failed: {e}")
+        if ctx.obj.get("DEBUG"):
+            traceback.print_exc()
+
+
 # --------------------- INTERFACE COMMAND --------------------- #
 @main.command()
 @click.pass_context
@@ -0,0 +1,347 @@
+# promptscribe/compact.py
+"""
+Background compaction and tiered retention of old sessions.
+
+Tiers, by session age (end time, or start time if it never ended):
+  hot   plain .jsonl logs as recorded
+  warm  older than `--older-than`: rewritten as a segmented, compressed log
+        (see logio) under paths.archive/YYYY/MM/, with progress-bar redraws
+        collapsed to their final line
+  cold  older than `--pack-older-than`: frames copied into the monthly pack
+        paths.archive/YYYY-MM.pack; the log path becomes <pack>/<log name>
+
+Conversions run in a process pool. The DB is updated in batches, each in one
+transaction that only moves rows still pointing at the old location; the
+old files are removed after the commit, so an interrupted run leaves every
+session readable and can simply be run again.
+"""
+import os
+import re
+import json
+import time
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from promptscribe import db, logio
+from promptscribe.config import CONFIG
+from promptscribe.utils import safe_write_json
+
+try:
+    import fcntl
+except ImportError:     # Windows: a single compact run at a time is assumed
+    fcntl = None
+
+REDRAW_GAP = 2.0    # seconds between two redraws of the same progress line
+BATCH_SIZE = 200
+
+_CURSOR_MOVES = re.compile(r"\x1b\[[0-9;?]*[ABCDEFGHJKfsu]")    # redraw control; colors (SGR) are kept
+_PROGRESS = re.compile(r"\d+(?:\.\d+)?\s?%|\[[#=>\-. ]{5,}\]|[█▉▊▋▌▍▎▏░▒▓━]{2,}")
+_BAR_FILL = re.compile(r"\[[#=>\-. ]{5,}\]|[█▉▊▋▌▍▎▏░▒▓━](?:[█▉▊▋▌▍▎▏░▒▓━ ]*[█▉▊▋▌▍▎▏░▒▓━])?")
+_NUMBER = re.compile(r"(?<![\w.])\d+(?:\.\d+)?")     # standalone numbers, not part of names like obj3.o
+_SPACES = re.compile(r"[ \t]+")    # padding shifts as numbers and bars grow
+
+
+def _cfg():
+    return CONFIG.get("compact") or {}
+
+
+def archive_dir():
+    paths = CONFIG["paths"]
+    return paths.get("archive") or os.path.join(paths["root"], "archive")
+
+
+# --- Redraw noise ---
+def _collapse_cr(text):
+    """Terminal semantics for lines redrawn with a bare \\r: keep what was left on screen."""
+    if "\r" not in text and "\x1b[" not in text:
+        return text
+    text = _CURSOR_MOVES.sub("", text).replace("\r\n", "\n")
+    lines = []
+    for line in text.split("\n"):
+        if "\r" in line:
+            parts = [p for p in line.split("\r") if p]
+            line = parts[-1] if parts else ""
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _redraw_shape(text):
+    """Progress-bar line with numbers and bar fill normalized, or None for ordinary output."""
+    if len(text) > 512 or text.count("\n") > 1 or not _PROGRESS.search(text):
+        return None
+    return _SPACES.sub("", _NUMBER.sub("0", _BAR_FILL.sub("~", text)))
+
+
+def drop_redraws(events, stats):
+    """
+    Collapse runs of consecutive progress-bar lines (same shape, at most
+    REDRAW_GAP apart) to their last line, preceded by a `redraws_dropped:N`
+    info event. Bare \\r redraws inside one event are resolved as well.
+    """
+    run = []
+    shape = None
+
+    def flush():
+        if len(run) > 1:
+            stats["redraws_dropped"] += len(run) - 1
+            yield {"ts": run[-1].get("ts"), "kind": "info", "data": f"redraws_dropped:{len(run) - 1}"}
+        yield from run[-1:]
+        run.clear()
+
+    for evt in events:
+        data = evt.get("data") if evt.get("kind") == "out" else None
+        if isinstance(data, str):
+            data = evt["data"] = _collapse_cr(data)
+            s = _redraw_shape(data)
+            if s is not None:
+                ts = evt.get("ts")
+                if run and s == shape and isinstance(ts, (int, float)) \
+                        and isinstance(run[-1].get("ts"), (int, float)) and ts - run[-1]["ts"] <= REDRAW_GAP:
+                    run.append(evt)
+                    continue
+                yield from flush()
+                run.append(evt)
+                shape = s
+                continue
+        yield from flush()
+        yield evt
+    yield from flush()
+
+
+# --- Warm tier: one segmented log per session ---
+def _iter_log(path):
+    """Events and meta lines of a log, in order (corrupt or partial lines are dropped)."""
+    with logio.open_log(path) as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                evt = json.loads(raw)
+            except (ValueError, UnicodeDecodeError):
+                continue
+            if isinstance(evt, dict):
+                yield evt
+
+
+def _convert(job):
+    """Worker: rewrite one plain log as a segmented log at `dest`."""
+    sid, src, dest, codec, level, redraws = job
+    stats = {"events": 0, "redraws_dropped": 0}
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    shutil.rmtree(tmp, ignore_errors=True)
+    try:
+        events = _iter_log(src)
+        if redraws:
+            events = drop_redraws(events, stats)
+        with logio.SegmentWriter(tmp, codec=codec, level=level, frame_seconds=0,
+                                 segment_bytes=int(_cfg().get("segment_max_bytes") or logio.SEGMENT_BYTES)) as w:
+            for evt in events:
+                w.write(json.dumps(evt, ensure_ascii=False) + "\n")
+                stats["events"] += 1
+        if os.path.isdir(dest):
+            shutil.rmtree(dest)     # left over by an interrupted run
+        os.replace(tmp, dest)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    stats.update(session_id=sid, src=src, dest=dest,
+                 bytes_before=logio.disk_size(src), bytes_after=logio.disk_size(dest))
+    return stats
+
+
+# --- DB moves ---
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.isfile(path):
+        os.remove(path)
+    # drop month directories of the archive once their last log moved into a pack
+    root = os.path.abspath(archive_dir())
+    parent = os.path.dirname(os.path.abspath(path))
+    while parent.startswith(root + os.sep):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+
+
+def _update_meta(sid, old, new):
+    from promptscribe import layout
+    meta_path = layout.meta_path(sid)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return
+    if meta.get("file") == old:
+        meta["file"] = new
+        safe_write_json(meta_path, meta)
+
+
+def apply_moves(moves):
+    """
+    Point sessions at their new log in one transaction, for rows that still
+    reference the old one, then delete the old copies. Returns moves applied.
+    """
+    if not moves:
+        return []
+    s = db.SessionLocal()
+    try:
+        done = []
+        for sid, old, new in moves:
+            n = s.query(db.SessionEntry) \
+                .filter(db.SessionEntry.id == sid, db.SessionEntry.file == old) \
+                .update({db.SessionEntry.file: new}, synchronize_session=False)
+            if n:
+                done.append((sid, old, new))
+        s.commit()
+    finally:
+        s.close()
+    moved = set(done)
+    for sid, old, new in moves:
+        if (sid, old, new) in moved:
+            _update_meta(sid, old, new)
+            if logio.split_pack(old) is None:
+                _remove(old)
+        elif logio.split_pack(new) is None:
+            _remove(new)    # the row changed meanwhile: keep the original
+    return done
+
+
+# --- Cold tier: monthly packs ---
+def _lock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def pack_logs(pack, items, codec="gzip"):
+    """
+    Append the frames of segmented logs `items` [(session id, path)] to
+    `pack` and publish them in its index. Returns [(session id, old, new)].
+    """
+    os.makedirs(os.path.dirname(pack), exist_ok=True)
+    moves = []
+    with open(pack, "ab") as f:
+        _lock(f)
+        index = logio.read_pack_index(pack)
+        index = {"version": 1, "sessions": dict(index.get("sessions") or {})}
+        off = f.seek(0, os.SEEK_END)
+        for sid, src in items:
+            member = os.path.basename(src)
+            frames = []
+            for frame_codec, frame, rlen in logio.iter_frames(src):
+                frame = logio.recompress(frame_codec, frame, codec)
+                f.write(frame)
+                frames.append([off, len(frame), rlen])
+                off += len(frame)
+            index["sessions"][member] = {"codec": codec, "frames": frames}
+            moves.append((sid, src, os.path.join(pack, member)))
+        f.flush()
+        os.fsync(f.fileno())
+        safe_write_json(pack + logio.INDEX_SUFFIX, index)   # publish only once the frames are on disk
+    return moves
+
+
+# --- Driver ---
+def _session_age_ts(row):
+    return row.end_ts or row.start_ts or 0
+
+
+def _month(ts):
+    return time.strftime("%Y-%m", time.gmtime(ts))
+
+
+def _select(cutoff):
+    from promptscribe import metrics
+    live = {s.get("session_id") for s in metrics.active_sessions()}
+    s = db.SessionLocal()
+    try:
+        rows = s.query(db.SessionEntry).filter(db.SessionEntry.file.isnot(None)).all()
+    finally:
+        s.close()
+    return [r for r in rows
+            if r.id not in live and _session_age_ts(r) and _session_age_ts(r) < cutoff
+            and r.file.endswith(".jsonl")]
+
+
+def _fmt_bytes(n):
+    return f"{n / (1 << 20):.1f} MB" if n >= 1 << 20 else f"{n / 1024:.1f} KB"
+
+
+def run_compaction(older_than, pack_older_than=None, workers=None, redraws=None,
+                   codec=None, dry_run=False, echo=print):
+    """
+    Compact sessions that ended before the `older_than` timestamp, and pack
+    those before `pack_older_than` (if given). Returns a summary dict.
+    """
+    cfg = _cfg()
+    codec = codec or cfg.get("codec") or "gzip"
+    level = cfg.get("compress_level")
+    redraws = cfg.get("drop_redraws", True) if redraws is None else redraws
+    workers = int(workers if workers is not None else cfg.get("workers") or 0) or os.cpu_count() or 1
+    batch_size = int(cfg.get("batch_size") or BATCH_SIZE)
+    archive = archive_dir()
+    summary = {"converted": 0, "packed": 0, "failed": 0, "redraws_dropped": 0,
+               "bytes_before": 0, "bytes_after": 0}
+
+    # warm tier
+    rows = _select(max(older_than, pack_older_than or 0))
+    jobs = []
+    for r in rows:
+        if os.path.isfile(r.file) and _session_age_ts(r) < older_than:
+            t = time.gmtime(r.start_ts or _session_age_ts(r))
+            dest = os.path.join(archive, f"{t.tm_year:04d}", f"{t.tm_mon:02d}", os.path.basename(r.file))
+            jobs.append((r.id, r.file, dest, codec, level, redraws))
+    if dry_run:
+        size = sum(os.path.getsize(j[1]) for j in jobs)
+        echo(f"Would compact {len(jobs)} session(s), {_fmt_bytes(size)} of plain logs.")
+    elif jobs:
+        pending = []
+
+        def collect(stats):
+            summary["converted"] += 1
+            summary["redraws_dropped"] += stats["redraws_dropped"]
+            summary["bytes_before"] += stats["bytes_before"]
+            summary["bytes_after"] += stats["bytes_after"]
+            pending.append((stats["session_id"], stats["src"], stats["dest"]))
+            if len(pending) >= batch_size:
+                apply_moves(pending)
+                pending.clear()
+                echo(f"Compacted {summary['converted']}/{len(jobs)} sessions")
+
+        workers = min(workers, len(jobs))
+        if workers == 1:
+            for job in jobs:
+                try:
+                    collect(_convert(job))
+                except Exception as e:
+                    summary["failed"] += 1
+                    echo(f"{job[0]}: compaction failed ({e})")
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(_convert, job): job for job in jobs}
+                for fut in as_completed(futures):
+                    try:
+                        collect(fut.result())
+                    except Exception as e:
+                        summary["failed"] += 1
+                        echo(f"{futures[fut][0]}: compaction failed ({e})")
+        apply_moves(pending)
+
+    # cold tier
+    if pack_older_than:
+        months = {}
+        for r in _select(pack_older_than):
+            if logio.is_segmented(r.file):
+                months.setdefault(_month(r.start_ts or _session_age_ts(r)), []).append((r.id, r.file))
+        if dry_run:
+            n = sum(len(v) for v in months.values())
+            echo(f"Would pack {n} session(s) into {len(months)} monthly pack(s).")
+        for month, items in sorted(months.items()):
+            if dry_run:
+                continue
+            pack = os.path.join(archive, f"{month}{logio.PACK_SUFFIX}")
+            for i in range(0, len(items), batch_size):
+                summary["packed"] += len(apply_moves(pack_logs(pack, items[i:i + batch_size], codec)))
+    return summary
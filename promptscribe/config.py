@@ -1,24 +1,55 @@
 # promptscribe/config.py
+"""
+Configuration, parsed on first use and cached.
+
+`from promptscribe.config import CONFIG` still works: the attribute is
+resolved lazily, so importing this module costs nothing until a command
+actually needs the settings. Set PROMPTSCRIBE_CONFIG to use another file.
+"""
 import os
 import pathlib
-import yaml
 from promptscribe.constants import DEFAULT_CONFIG
 
 ROOT = pathlib.Path(__file__).resolve().parents[1]
-CFG_PATH = ROOT / DEFAULT_CONFIG
+CFG_PATH = pathlib.Path(os.environ.get("PROMPTSCRIBE_CONFIG") or ROOT / DEFAULT_CONFIG)
+
+_config = None
+
+
+def load_config():
+    """Parse the YAML config once; later calls return the cached dict."""
+    global _config
+    if _config is not None:
+        return _config
+    import yaml
 
-if not CFG_PATH.exists():
-    raise FileNotFoundError(f"Missing config file: {CFG_PATH}")
+    if not CFG_PATH.exists():
+        raise FileNotFoundError(f"Missing config file: {CFG_PATH}")
 
-with open(CFG_PATH, "r", encoding="utf-8") as f:
-    CONFIG = yaml.safe_load(f)
+    with open(CFG_PATH, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
 
-# Normalize paths and ensure only parent directories exist
-for key, val in CONFIG.get("paths", {}).items():
-    p = (ROOT / val).resolve() if not os.path.isabs(val) else pathlib.Path(val)
-    CONFIG["paths"][key] = str(p)
-    parent = p.parent  # only ensure directory, not the file itself
+    # Normalize paths (relative to the repo root) and ensure only parent directories exist
+    for key, val in config.get("paths", {}).items():
+        p = (ROOT / val).resolve() if not os.path.isabs(val) else pathlib.Path(val)
+        config["paths"][key] = str(p)
+        parent = p.parent  # only ensure directory, not the file itself
+        try:
+            parent.mkdir(parents=True, exist_ok=True)
+        except Exception:
+            pass
+    _config = config
+    return _config
+
+
+def database_path():
     try:
-        parent.mkdir(parents=True, exist_ok=True)
-    except Exception:
-        pass
+        return load_config()["paths"]["database"]
+    except (KeyError, TypeError):
+        return os.path.expanduser("~/Tools/promptscribe/data/database/vault.db")
+
+
+def __getattr__(name):
+    if name == "CONFIG":
+        return load_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
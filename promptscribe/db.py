@@ -3,21 +3,41 @@ import os
 import json
 import sqlalchemy as sa
 from sqlalchemy.orm import declarative_base, sessionmaker
-from promptscribe.config import CONFIG
+from promptscribe import instrument, logio
+from promptscribe.config import database_path
 
-# --- Step 1: Determine safe DB path ---
-try:
-    raw_path = CONFIG["paths"]["database"]
-except Exception:
-    raw_path = os.path.expanduser("~/Tools/promptscribe/data/database/vault.db")
+# --- Step 1/2: DB path and engine, created on first use ---
+_engine = None
+_session_factory = None
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        path = database_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _engine = sa.create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    return _engine
+
+
+def SessionLocal():
+    """New ORM session bound to the (lazily created) engine."""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(bind=get_engine())
+    return _session_factory()
+
+
+def __getattr__(name):
+    # keep the old module attributes working without creating them at import time
+    if name == "DB_PATH":
+        return database_path()
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-DB_PATH = raw_path
-os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
-# --- Step 2: Configure SQLAlchemy ---
-engine = sa.create_engine(f"sqlite:///{DB_PATH}", connect_args={"check_same_thread": False})
 Base = declarative_base()
-SessionLocal = sessionmaker(bind=engine)
 
 # --- Step 3: Tables ---
 class SessionEntry(Base):
@@ -34,26 +54,127 @@ class AnalysisEntry(Base):
     session_ids = sa.Column(sa.String)
     summary = sa.Column(sa.Text)
     file = sa.Column(sa.String)
+    # analysis cache bookkeeping (see analyzer.run_analysis)
+    cache_key = sa.Column(sa.String, index=True, nullable=True)
+    stat_key = sa.Column(sa.String, index=True, nullable=True)
+    size_bytes = sa.Column(sa.Integer, nullable=True)
+    created_ts = sa.Column(sa.Float, nullable=True)
+    last_used_ts = sa.Column(sa.Float, nullable=True)
+    hits = sa.Column(sa.Integer, nullable=True)
+
+class ExportEntry(Base):
+    """Rendered export artifacts keyed by source log fingerprint + export options."""
+    __tablename__ = "exports"
+    key = sa.Column(sa.String, primary_key=True)
+    origin_session_id = sa.Column(sa.String, index=True)
+    export_session_id = sa.Column(sa.String)
+    file = sa.Column(sa.String)
+    src_path = sa.Column(sa.String)
+    src_size = sa.Column(sa.Integer)        # bytes of complete lines rendered so far
+    src_total = sa.Column(sa.Integer)       # file size when last rendered (may include a partial line)
+    src_mtime_ns = sa.Column(sa.Integer)
+    src_sha256 = sa.Column(sa.String)       # digest of the rendered prefix, chained across appends
+    anchor_sha256 = sa.Column(sa.String)    # digest of the window just before src_size
+    state = sa.Column(sa.Text)              # renderer state for resuming an append
+    updated_ts = sa.Column(sa.Float)
 
 # --- Step 4: Utilities ---
-def init_db():
-    print(f"Initializing database at: {DB_PATH}")
+def ensure_schema():
+    """Create missing tables and add columns introduced after a DB was created."""
+    engine = get_engine()
     Base.metadata.create_all(bind=engine)
+    insp = sa.inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in existing:
+                    continue
+                col_type = col.type.compile(dialect=engine.dialect)
+                conn.execute(sa.text(f'ALTER TABLE "{table.name}" ADD COLUMN "{col.name}" {col_type}'))
+
+def init_db():
+    print(f"Initializing database at: {database_path()}")
+    ensure_schema()
 
 def insert_session(meta_path):
     with open(meta_path, "r", encoding="utf-8") as f:
         meta = json.load(f)
+    insert_session_metas([meta])
+
+def insert_session_metas(metas):
+    """Upsert many session metadata dicts in a single transaction."""
+    db = SessionLocal()
+    try:
+        with instrument.span("db.insert_sessions"):
+            for meta in metas:
+                entry = SessionEntry(
+                    id=meta["session_id"],
+                    name=meta.get("name"),
+                    start_ts=meta.get("start_ts"),
+                    end_ts=meta.get("end_ts"),
+                    file=meta.get("file"),
+                )
+                db.merge(entry)
+            db.commit()
+        instrument.add("db.rows_written", len(metas))
+    finally:
+        db.close()
+
+def count_sessions():
     db = SessionLocal()
     try:
-        entry = SessionEntry(
-            id=meta["session_id"],
-            name=meta.get("name"),
-            start_ts=meta.get("start_ts"),
-            end_ts=meta.get("end_ts"),
-            file=meta.get("file"),
-        )
-        db.merge(entry)
-        db.commit()
+        return db.query(sa.func.count(SessionEntry.id)).scalar() or 0
+    finally:
+        db.close()
+
+def read_description(log_file):
+    """User description from the session's .meta.json, or ""."""
+    try:
+        meta_file = os.path.splitext(log_file or "")[0] + ".meta.json"
+        if meta_file and os.path.exists(meta_file):
+            with open(meta_file, "r", encoding="utf-8") as mf:
+                meta = json.load(mf)
+                return meta.get("user_description") or meta.get("description") or ""
+    except Exception:
+        pass
+    return ""
+
+def iter_session_records(include_missing=False, batch_size=250, cancel=None, since=None):
+    """
+    Yield session dicts (id, name, description, file, timestamp, missing) in
+    batches, newest first. Rows are streamed from the DB and each one costs a
+    stat and a meta read, so UIs should run this off their main thread.
+    Stops early once `cancel` (a threading.Event) is set. With `since`, only
+    sessions with start_ts >= since are read.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(SessionEntry.id, SessionEntry.name, SessionEntry.file, SessionEntry.start_ts)
+        if since is not None:
+            query = query.filter(SessionEntry.start_ts >= since)
+        entries = query.order_by(SessionEntry.start_ts.desc()).yield_per(1000)
+        batch = []
+        for e in entries:
+            if cancel is not None and cancel.is_set():
+                return
+            instrument.add("db.rows_fetched")
+            missing = not logio.exists(e.file)
+            if missing and not include_missing:
+                continue
+            batch.append({
+                "id": e.id or "",
+                "name": e.name or "",
+                "description": read_description(e.file),
+                "file": e.file or "",
+                "timestamp": e.start_ts or 0,
+                "missing": missing
+            })
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
     finally:
         db.close()
 
@@ -62,14 +183,15 @@ def list_entries(limit=50, show_missing=False):
     """List recent session entries."""
     db = SessionLocal()
     try:
-        q = db.query(SessionEntry).order_by(SessionEntry.start_ts.desc()).limit(limit)
-        rows = q.all()
+        with instrument.span("db.list_entries"):
+            rows = db.query(SessionEntry).order_by(SessionEntry.start_ts.desc()).limit(limit).all()
+        instrument.add("db.rows_fetched", len(rows))
         if not rows:
             print("No sessions indexed.")
             return
 
         for r in rows:
-            file_exists = bool(r.file and os.path.exists(r.file))
+            file_exists = logio.exists(r.file)
             marker = "" if file_exists else " [MISSING]"
             if file_exists or show_missing:
                 start = r.start_ts if r.start_ts else 0
@@ -82,9 +204,11 @@ def clean_orphans(remove=False):
     db = SessionLocal()
     orphans = []
     try:
-        q = db.query(SessionEntry).all()
+        with instrument.span("db.fetch_sessions"):
+            q = db.query(SessionEntry).all()
+        instrument.add("db.rows_fetched", len(q))
         for e in q:
-            if not e.file or not os.path.exists(e.file):
+            if not logio.exists(e.file):
                 orphans.append({
                     "id": e.id,
                     "name": e.name,
@@ -93,7 +217,8 @@ def clean_orphans(remove=False):
                 if remove:
                     db.delete(e)
         if remove and orphans:
-            db.commit()
+            with instrument.span("db.delete_orphans"):
+                db.commit()
     finally:
         db.close()
     return orphans
@@ -0,0 +1,125 @@
+# promptscribe/finder.py
+"""
+Fuzzy session finder.
+
+Sessions are ranked with rapidfuzz's WRatio against one preprocessed
+"name description id" string per session, which tolerates typos and
+reordered words. Choices are built once and updated in place; the CLI keeps
+them in an on-disk cache and only reads sessions newer than the cached ones.
+"""
+import os
+import json
+from rapidfuzz import fuzz, process, utils as rf_utils
+from promptscribe import db
+from promptscribe.config import CONFIG
+
+try:
+    import numpy as np  # rapidfuzz's multi-threaded cdist returns numpy arrays
+except ImportError:
+    np = None
+
+CACHE_VERSION = 1
+FIELDS = ("id", "name", "description", "file", "timestamp")
+
+
+def _cache_path():
+    return os.path.join(CONFIG["paths"]["analysis"], "finder_cache.json")
+
+
+def _choice(row):
+    return rf_utils.default_process(f"{row.get('name', '')} {row.get('description', '')} {row['id']}")
+
+
+def _top_scores(query, choices, limit, score_cutoff):
+    """(index, score) of the best matches, best first."""
+    if np is None:
+        hits = process.extract(query, choices, scorer=fuzz.WRatio, processor=None,
+                               limit=limit, score_cutoff=score_cutoff)
+        return [(idx, score) for _, score, idx in hits]
+    # cdist scores on every core; pick the top `limit` without a full sort
+    scores = process.cdist([query], choices, scorer=fuzz.WRatio, processor=None,
+                           score_cutoff=score_cutoff, dtype=np.float32, workers=-1)[0]
+    if limit and limit < len(scores):
+        top = np.argpartition(-scores, limit)[:limit]
+    else:
+        top = np.arange(len(scores))
+    top = [int(i) for i in top if scores[i] >= score_cutoff and scores[i] > 0]
+    top.sort(key=lambda i: (-scores[i], i))
+    return [(i, float(scores[i])) for i in top]
+
+
+class FuzzyFinder:
+    """Ranked fuzzy search over session name, description and ID."""
+
+    def __init__(self):
+        self.rows = []
+        self.choices = []
+        self.pos = {}           # session id -> position
+        self.max_ts = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def update(self, rows, choices=None):
+        """Add or replace sessions (matched by id); `choices` skips preprocessing when cached."""
+        for n, row in enumerate(rows):
+            choice = choices[n] if choices is not None else _choice(row)
+            i = self.pos.get(row["id"])
+            if i is None:
+                self.pos[row["id"]] = len(self.rows)
+                self.rows.append(row)
+                self.choices.append(choice)
+            else:
+                self.rows[i] = row
+                self.choices[i] = choice
+            ts = row.get("timestamp") or 0
+            if self.max_ts is None or ts > self.max_ts:
+                self.max_ts = ts
+
+    def search(self, query, limit=20, score_cutoff=60.0):
+        """[(row, score)] best first. Safe to call from a worker thread while the UI adds rows."""
+        query = rf_utils.default_process(query or "")
+        rows, choices = self.rows[:], self.choices[:]
+        if not query or not choices:
+            return []
+        return [(rows[i], score) for i, score in _top_scores(query, choices, limit, score_cutoff)]
+
+
+def load_finder(use_cache=True):
+    """
+    Finder over every recorded session. The cached choices are reused and only
+    sessions with start_ts >= the newest cached one are read from the DB; if
+    the row count still disagrees (deletions, missing start times) the cache
+    is rebuilt from scratch.
+    """
+    finder = FuzzyFinder()
+    path = _cache_path()
+    if use_cache and os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                finder.update([dict(zip(FIELDS, r)) for r in data["rows"]], data["choices"])
+        except (OSError, ValueError, KeyError, TypeError):
+            finder = FuzzyFinder()
+
+    total = db.count_sessions()
+    cached = len(finder)
+    since = finder.max_ts if cached else None
+    for batch in db.iter_session_records(include_missing=True, since=since):
+        finder.update(batch)
+    if len(finder) != total:
+        finder = FuzzyFinder()
+        for batch in db.iter_session_records(include_missing=True):
+            finder.update(batch)
+    if len(finder) != cached or since is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": CACHE_VERSION,
+                "rows": [[r.get(k) for k in FIELDS] for r in finder.rows],
+                "choices": finder.choices,
+            }, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+    return finder
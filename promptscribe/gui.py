@@ -1,51 +1,254 @@
 # promptscribe/gui.py
 import os
-import json
+import bisect
 import csv
+import time
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+from collections import OrderedDict
 from datetime import datetime
-from promptscribe import db
+from promptscribe import db, logio
+from promptscribe.finder import FuzzyFinder
 
 
 # ---------- Utility ----------
 def _load_metadata(include_missing=False):
-    sessions = []
-    DB = db.SessionLocal()
-    try:
-        entries = DB.query(db.SessionEntry).order_by(db.SessionEntry.start_ts.desc()).all()
-        for e in entries:
-            missing = not e.file or not os.path.exists(e.file)
-            if missing and not include_missing:
-                continue
-            desc = ""
-            try:
-                meta_file = os.path.splitext(e.file or "")[0] + ".meta.json"
-                if meta_file and os.path.exists(meta_file):
-                    with open(meta_file, "r", encoding="utf-8") as mf:
-                        meta = json.load(mf)
-                        desc = meta.get("user_description") or meta.get("description") or ""
-            except Exception:
-                pass
-            sessions.append({
-                "id": e.id or "",
-                "name": e.name or "",
-                "description": desc or "",
-                "file": e.file or "",
-                "timestamp": e.start_ts or 0,
-                "missing": missing
-            })
-    finally:
-        DB.close()
-    return sessions
-
-
-def _read_text_file(path):
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return f.read()
-    except Exception as e:
-        return f"[Error reading file: {e}]"
+    return [s for batch in db.iter_session_records(include_missing=include_missing) for s in batch]
+
+
+# ---------- Virtualized log viewer ----------
+VIEW_WINDOW = 2000               # lines held in a tab's Text widget at once
+VIEW_MARGIN = 400                # shift the window when the view gets this close to an edge
+MAX_LINE_CHARS = 4000            # longer lines are cut for display
+TAB_MEMORY_CAP = 48 * 1024 * 1024  # loaded text across all tabs; least recently used tabs are unloaded
+INDEX_STEP_BYTES = 4 * 1024 * 1024
+
+
+class _LineIndex:
+    """Sparse line-offset index (one entry per STRIDE lines), extended on demand."""
+    STRIDE = 512
+
+    def __init__(self, path):
+        self.path = path
+        self.size = logio.log_size(path)
+        self.offsets = [0]
+        self.lines = 0
+        self.offset = 0
+        self.complete = self.size == 0
+
+    def scan(self, max_bytes=INDEX_STEP_BYTES):
+        """Index up to `max_bytes` more of the file."""
+        if self.complete:
+            return
+        with logio.open_log(self.path) as f:
+            f.seek(self.offset)
+            buf = f.read(max_bytes)
+        if len(buf) < max_bytes:
+            buf += b"" if buf.endswith(b"\n") or not buf else b"\n"  # count a final unterminated line
+        stride, offsets, lines = self.STRIDE, self.offsets, self.lines
+        pos = buf.find(b"\n")
+        last = -1
+        while pos >= 0:
+            lines += 1
+            last = pos
+            if lines % stride == 0:
+                offsets.append(self.offset + pos + 1)
+            pos = buf.find(b"\n", pos + 1)
+        if last < 0 and len(buf) >= max_bytes:
+            self.scan(max_bytes * 2)  # one line longer than the step
+            return
+        self.lines = lines
+        self.offset += last + 1
+        if self.offset >= self.size:
+            self.offset = self.size
+            self.complete = True
+
+    def ensure(self, n):
+        while not self.complete and self.lines < n:
+            self.scan()
+
+    def estimate_total(self):
+        if self.complete or not self.lines:
+            return max(self.lines, 1)
+        return max(self.lines, int(self.size * self.lines / self.offset))
+
+    def read(self, start, count):
+        """Decoded lines [start, start + count), each cut to MAX_LINE_CHARS."""
+        self.ensure(start + count)
+        start = max(0, min(start, self.lines))
+        block = start // self.STRIDE
+        out = []
+        with logio.open_log(self.path) as f:
+            f.seek(self.offsets[block])
+            line = block * self.STRIDE
+            while line < start + count and line < self.lines:
+                raw = f.readline(MAX_LINE_CHARS * 4)
+                if not raw.endswith(b"\n") and len(raw) == MAX_LINE_CHARS * 4:
+                    f.readline()  # skip the rest of an oversized line
+                    raw += b" ..."
+                if line >= start:
+                    out.append(raw.decode("utf-8", "replace").rstrip("\r\n")[:MAX_LINE_CHARS])
+                line += 1
+        return out
+
+
+class _TabMemory:
+    """LRU accounting of text loaded into viewer tabs, unloading the coldest ones over the cap."""
+
+    def __init__(self, cap=TAB_MEMORY_CAP):
+        self.cap = cap
+        self.viewers = OrderedDict()  # viewer -> loaded chars
+
+    def touch(self, viewer, size):
+        self.viewers[viewer] = size
+        self.viewers.move_to_end(viewer)
+        total = sum(self.viewers.values())
+        for other in list(self.viewers):
+            if total <= self.cap or other is viewer:
+                break
+            total -= self.viewers.pop(other)
+            other.unload()
+
+    def discard(self, viewer):
+        self.viewers.pop(viewer, None)
+
+
+class _LogViewer:
+    """
+    Text widget that holds only a window of VIEW_WINDOW lines around the
+    visible region. The scrollbar is driven by the line index, so it spans the
+    whole file; the window is reloaded in one batched insert whenever the
+    view nears its edges. The index grows in the background via `after`.
+    """
+
+    def __init__(self, parent, path, memory):
+        self.path = path
+        self.memory = memory
+        self.index = _LineIndex(path)
+        self.start = 0          # first file line held in the widget
+        self.count = 0          # lines held in the widget
+        self.top = 0            # first visible file line
+        self.loaded = False
+        self.shift_pending = False
+        self.index_job = None
+
+        x_scroll = ttk.Scrollbar(parent, orient="horizontal")
+        self.y_scroll = ttk.Scrollbar(parent, orient="vertical", command=self._on_scrollbar)
+        self.text = tk.Text(
+            parent,
+            wrap="none",
+            bg="#1e1e1e",
+            fg="#cccccc",
+            insertbackground="white",
+            xscrollcommand=x_scroll.set,
+            yscrollcommand=self._on_text_scrolled
+        )
+        x_scroll.config(command=self.text.xview)
+        self.y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.text.tag_configure("cmd", foreground="#00ff66", font=("Consolas", 10, "bold"))
+        self.text.tag_configure("out", foreground="#aaaaaa", font=("Consolas", 10))
+
+        self.load_around(0)
+        self.index_job = self.text.after(50, self._index_more)
+
+    # --- window management ---
+    def load_around(self, line):
+        """Fill the widget with the window around `line` and scroll it to the top of the view."""
+        start = max(0, line - VIEW_WINDOW // 2)
+        lines = self.index.read(start, VIEW_WINDOW)
+        if not lines and start > 0:
+            start = max(0, self.index.lines - VIEW_WINDOW)
+            lines = self.index.read(start, VIEW_WINDOW)
+        # group runs of equally tagged lines into one insert call
+        args = []
+        run, run_tag = [], None
+        for ln in lines:
+            tag = "cmd" if ln.startswith("$") else "out"
+            if tag != run_tag and run:
+                args += ["\n".join(run) + "\n", run_tag]
+                run = []
+            run.append(ln)
+            run_tag = tag
+        if run:
+            args += ["\n".join(run), run_tag]
+        self.text.config(state="normal")
+        self.text.delete("1.0", "end")
+        if args:
+            self.text.insert("end", *args)
+        self.text.config(state="disabled")
+        self.start, self.count, self.loaded = start, len(lines), True
+        self.top = max(start, min(line, start + max(0, len(lines) - 1)))
+        if self.count:
+            self.text.yview_moveto((self.top - start) / self.count)
+        self.memory.touch(self, sum(len(ln) for ln in lines))
+
+    def unload(self):
+        """Drop the widget contents; they are reloaded when the tab is shown again."""
+        if not self.loaded:
+            return
+        self.text.config(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.config(state="disabled")
+        self.loaded, self.count = False, 0
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            self.load_around(self.top)
+        else:
+            self.memory.touch(self, self.memory.viewers.get(self, 0))
+
+    def close(self):
+        if self.index_job:
+            self.text.after_cancel(self.index_job)
+            self.index_job = None
+        self.memory.discard(self)
+
+    # --- scrolling ---
+    def _update_scrollbar(self, first, last):
+        total = self.index.estimate_total()
+        visible = (last - first) * self.count
+        self.y_scroll.set(self.top / total, min(1.0, (self.top + visible) / total))
+        return visible
+
+    def _on_text_scrolled(self, first, last):
+        if not self.loaded or not self.count:
+            self.y_scroll.set(0.0, 1.0)
+            return
+        first, last = float(first), float(last)
+        self.top = self.start + int(first * self.count)
+        visible = self._update_scrollbar(first, last)
+        near_top = self.start > 0 and self.top - self.start < VIEW_MARGIN
+        end = self.start + self.count
+        near_end = (end < self.index.lines or not self.index.complete) and end - (self.top + visible) < VIEW_MARGIN
+        moved = max(0, self.top - VIEW_WINDOW // 2) != self.start
+        if (near_top or near_end) and moved and not self.shift_pending:
+            self.shift_pending = True
+            self.text.after_idle(self._shift)
+
+    def _shift(self):
+        self.shift_pending = False
+        if self.loaded:
+            self.load_around(self.top)
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            target = int(float(args[1]) * self.index.estimate_total())
+            self.load_around(max(0, target))
+        else:
+            self.ensure_loaded()
+            self.text.yview(*args)
+
+    def _index_more(self):
+        self.index_job = None
+        if not self.index.complete:
+            self.index.scan()
+            if self.loaded and self.count:
+                self._update_scrollbar(*map(float, self.text.yview()))
+            self.index_job = self.text.after(20, self._index_more)
 
 
 # ---------- Tooltip ----------
@@ -75,7 +278,81 @@ class Tooltip:
             self.tipwindow = None
 
 
+# ---------- Background loading ----------
+class _BackgroundLoader:
+    """
+    Runs a batch generator on a worker thread and hands the batches to the Tk
+    thread through a bounded queue polled with `root.after`. Each poll spends
+    at most `budget` seconds in `on_batch`, so the UI keeps handling events.
+    """
+
+    def __init__(self, root, produce, on_batch, on_done, poll_ms=25, budget=0.02):
+        self.root = root
+        self.produce = produce      # produce(cancel_event) -> iterable of batches
+        self.on_batch = on_batch
+        self.on_done = on_done      # on_done(error=None, cancelled=False)
+        self.poll_ms = poll_ms
+        self.budget = budget
+        self.queue = queue.Queue(maxsize=64)
+        self.cancelled = threading.Event()
+        self.finished = False
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self.root.after(self.poll_ms, self._drain)
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def _put(self, item):
+        while not self.cancelled.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self):
+        try:
+            for batch in self.produce(self.cancelled):
+                if self.cancelled.is_set():
+                    return
+                self._put(("batch", batch))
+            self._put(("done", None))
+        except Exception as e:
+            self._put(("error", e))
+
+    def _finish(self, error=None, cancelled=False):
+        self.finished = True
+        self.on_done(error=error, cancelled=cancelled)
+
+    def _drain(self):
+        if self.finished:
+            return
+        if self.cancelled.is_set():
+            self._finish(cancelled=True)
+            return
+        deadline = time.perf_counter() + self.budget
+        while time.perf_counter() < deadline:
+            try:
+                kind, payload = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "batch":
+                self.on_batch(payload)
+            else:
+                self._finish(error=payload if kind == "error" else None)
+                return
+        self.root.after(self.poll_ms, self._drain)
+
+
 # ---------- Filtering ----------
+FILTER_DEBOUNCE_MS = 150    # wait for a pause in typing before filtering
+POPULATE_CHUNK = 500        # tree rows inserted per event-loop turn
+FUZZY_LIMIT = 500           # best fuzzy matches considered before the other filters
+
+
 def _apply_filters(sessions, filters):
     results = []
     for s in sessions:
@@ -100,6 +377,110 @@ def _apply_filters(sessions, filters):
     return results
 
 
+class _SessionIndex:
+    """
+    In-memory session cache for as-you-type filtering. Lowercase search keys
+    are built once per row; queries run over parallel newest-first arrays
+    (bisect on timestamps for date ranges, an extension -> positions index for
+    the file type). A query whose text filters only got longer narrows the
+    previous result instead of rescanning.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self.pos = {}           # session id -> position in rows
+        self.max_ts = None
+        self._view = None       # newest-first arrays, rebuilt after changes
+        self._last = None       # (non-text filters, keyword, desc_kw, positions)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, batch):
+        """Insert or replace sessions (matched by id)."""
+        for s in batch:
+            s = dict(s, _key=(s["name"] + s["id"]).lower(), _desc=s["description"].lower(),
+                     _ext=os.path.splitext(s["file"])[1].lower())
+            i = self.pos.get(s["id"])
+            if i is None:
+                self.pos[s["id"]] = len(self.rows)
+                self.rows.append(s)
+            else:
+                self.rows[i] = s
+            ts = s.get("timestamp") or 0
+            if self.max_ts is None or ts > self.max_ts:
+                self.max_ts = ts
+        if batch:
+            self._view = self._last = None
+
+    def get(self, sid):
+        i = self.pos.get(sid)
+        return self.rows[i] if i is not None else None
+
+    def set_missing(self, sid, missing=True):
+        i = self.pos.get(sid)
+        if i is not None and self.rows[i]["missing"] != missing:
+            self.rows[i] = dict(self.rows[i], missing=missing)
+            self._view = self._last = None
+
+    def _build(self):
+        if self._view is None:
+            # rows arrive newest first, so this sort is usually a linear pass
+            rows = sorted(self.rows, key=lambda r: -(r.get("timestamp") or 0))
+            by_ext = {}
+            for j, r in enumerate(rows):
+                by_ext.setdefault(r["_ext"], []).append(j)
+            self._view = {
+                "rows": rows,
+                "neg_ts": [-(r.get("timestamp") or 0) for r in rows],
+                "keys": [r["_key"] for r in rows],
+                "desc": [r["_desc"] for r in rows],
+                "missing": [r["missing"] for r in rows],
+                "by_ext": by_ext,
+            }
+        return self._view
+
+    def extensions(self):
+        return sorted(e for e in self._build()["by_ext"] if e)
+
+    def filter(self, filters):
+        """Sessions matching `filters` (same semantics as _apply_filters), newest first."""
+        v = self._build()
+        kw = (filters["keyword"] or "").lower()
+        desc_kw = (filters["desc_kw"] or "").lower()
+        filetype = filters["filetype"] if filters["filetype"] and filters["filetype"] != "All" else ""
+        fixed = (filetype.lower(), filters["missing"], filters["date_from"], filters["date_to"])
+
+        last = self._last
+        if last and last[0] == fixed and kw.startswith(last[1]) and desc_kw.startswith(last[2]):
+            cand, new_kw, new_desc = last[3], kw != last[1], desc_kw != last[2]
+        else:
+            neg_ts = v["neg_ts"]
+            # newest first: ts >= date_from is a prefix, ts <= date_to a suffix
+            hi = bisect.bisect_right(neg_ts, -filters["date_from"]) if filters["date_from"] else len(neg_ts)
+            lo = bisect.bisect_left(neg_ts, -filters["date_to"]) if filters["date_to"] else 0
+            if filetype:
+                positions = v["by_ext"].get(filetype.lower(), [])
+                cand = positions[bisect.bisect_left(positions, lo):bisect.bisect_left(positions, hi)]
+            else:
+                cand = range(lo, max(lo, hi))
+            if filters["missing"] in ("Missing", "Available"):
+                want, missing = filters["missing"] == "Missing", v["missing"]
+                cand = [j for j in cand if missing[j] == want]
+            new_kw = new_desc = True
+        if kw and new_kw:
+            keys = v["keys"]
+            cand = [j for j in cand if kw in keys[j]]
+        if desc_kw and new_desc:
+            keys = v["desc"]
+            cand = [j for j in cand if desc_kw in keys[j]]
+        self._last = (fixed, kw, desc_kw, cand)
+        rows = v["rows"]
+        if isinstance(cand, range):
+            return rows[cand.start:cand.stop]
+        return [rows[j] for j in cand]
+
+
 # ---------- Main GUI ----------
 def launch_gui():
     root = tk.Tk()
@@ -113,6 +494,8 @@ def launch_gui():
     ttk.Label(top_frame, text="Keyword:").pack(side=tk.LEFT, padx=4)
     search_var = tk.StringVar()
     ttk.Entry(top_frame, textvariable=search_var, width=20).pack(side=tk.LEFT, padx=4)
+    fuzzy_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(top_frame, text="Fuzzy", variable=fuzzy_var).pack(side=tk.LEFT, padx=2)
 
     ttk.Label(top_frame, text="File Type:").pack(side=tk.LEFT, padx=4)
     filetype_combo = ttk.Combobox(top_frame, width=10, state="readonly")
@@ -138,13 +521,20 @@ def launch_gui():
     btn_frame = ttk.Frame(root, padding=(8, 4))
     btn_frame.pack(side=tk.TOP, fill=tk.X)
     def spacer(): ttk.Label(btn_frame, text="  ").pack(side=tk.LEFT)
-    ttk.Button(btn_frame, text="Apply Filters", command=lambda: refresh_sessions()).pack(side=tk.LEFT)
+    ttk.Button(btn_frame, text="Refresh", command=lambda: refresh_sessions()).pack(side=tk.LEFT)
     spacer()
     ttk.Button(btn_frame, text="Open", command=lambda: open_selected()).pack(side=tk.LEFT)
     spacer()
     ttk.Button(btn_frame, text="Export CSV", command=lambda: export_csv()).pack(side=tk.LEFT)
     spacer()
-    ttk.Button(btn_frame, text="Exit", command=root.destroy).pack(side=tk.RIGHT)
+    ttk.Button(btn_frame, text="Exit", command=lambda: close()).pack(side=tk.RIGHT)
+    cancel_btn = ttk.Button(btn_frame, text="Cancel", command=lambda: cancel_loading())
+    cancel_btn.pack(side=tk.RIGHT, padx=6)
+    cancel_btn.state(["disabled"])
+    progress = ttk.Progressbar(btn_frame, length=180, mode="determinate")
+    progress.pack(side=tk.RIGHT, padx=6)
+    status_var = tk.StringVar()
+    ttk.Label(btn_frame, textvariable=status_var).pack(side=tk.RIGHT, padx=6)
 
     # --- Main Split Layout ---
     main_pane = ttk.Panedwindow(root, orient=tk.VERTICAL)
@@ -194,6 +584,8 @@ def launch_gui():
     main_pane.add(table_frame, weight=2)
     main_pane.add(notebook, weight=3)
 
+    tab_memory = _TabMemory()
+
     # --- Filters ---
     filters = {"keyword": "", "filetype": "", "desc_kw": "", "missing": "All", "date_from": None, "date_to": None}
 
@@ -213,24 +605,147 @@ def launch_gui():
         return filters
 
     # ---- Actions ----
-    def refresh_sessions():
+    tree.tag_configure("missing", background="#f8d7da", foreground="#721c24")
+    loading = {"loader": None}
+
+    def cancel_loading():
+        if loading["loader"]:
+            loading["loader"].cancel()
+
+    def close():
+        cancel_loading()
+        root.destroy()
+
+    # Rows reach the tree through one queue drained in chunks, so a large
+    # result never blocks the event loop and newer results replace older ones.
+    index = _SessionIndex()
+    finder = FuzzyFinder()
+    view = {"filters": dict(get_filters()), "pending": [], "pos": 0, "job": None, "debounce": None,
+            "fuzzy": None}
+
+    def fuzzy_active():
+        return fuzzy_var.get() and bool(view["filters"]["keyword"])
+
+    def insert_row(s):
+        tag = "missing" if s["missing"] else ""
+        tree.insert("", "end", values=(s["id"], s["name"], s["description"], s["file"]), tags=(tag,))
+
+    def drain_rows():
+        view["job"] = None
+        pending, i = view["pending"], view["pos"]
+        for s in pending[i:i + POPULATE_CHUNK]:
+            insert_row(s)
+        view["pos"] = min(len(pending), i + POPULATE_CHUNK)
+        if view["pos"] < len(pending):
+            view["job"] = root.after(1, drain_rows)
+
+    def queue_rows(rows):
+        view["pending"].extend(rows)
+        if view["job"] is None:
+            drain_rows()
+
+    def show_rows(rows):
+        if view["job"] is not None:
+            root.after_cancel(view["job"])
+            view["job"] = None
         tree.delete(*tree.get_children())
-        sessions = _load_metadata(include_missing=True)
-        # populate file type dropdown dynamically
-        exts = sorted({os.path.splitext(s["file"])[1].lower() for s in sessions if s["file"]})
-        filetype_combo["values"] = ["All"] + exts
-        if not filetype_combo.get():
-            filetype_combo.set("All")
-
-        active_filters = get_filters()
-        sessions = _apply_filters(sessions, active_filters)
-        for s in sessions:
-            tag = "missing" if s["missing"] else ""
-            tree.insert("", "end", values=(s["id"], s["name"], s["description"], s["file"]), tags=(tag,))
-        tree.tag_configure("missing", background="#f8d7da", foreground="#721c24")
+        view["pending"], view["pos"] = [], 0
+        queue_rows(rows)
+
+    def run_fuzzy(active_filters):
+        """Rank by fuzzy match on a worker thread, then apply the remaining filters to the hits."""
+        if view["fuzzy"]:
+            view["fuzzy"].cancel()
+        query = active_filters["keyword"]
+        rest = dict(active_filters, keyword="")
+
+        def on_hits(hits):
+            if view["filters"] != active_filters:
+                return  # the user kept typing
+            rows = [index.get(row["id"]) for row, _ in hits]
+            rows = _apply_filters([r for r in rows if r], rest)
+            show_rows(rows)
+            if not loading["loader"]:
+                status_var.set(f"{len(rows)} fuzzy matches in {len(index)} sessions")
+
+        def on_done(error=None, cancelled=False):
+            if error is not None:
+                status_var.set(f"Fuzzy search failed: {error}")
+
+        view["fuzzy"] = _BackgroundLoader(
+            root, lambda cancel: [finder.search(query, limit=FUZZY_LIMIT)], on_hits, on_done).start()
+
+    def apply_filters():
+        view["debounce"] = None
+        view["filters"] = dict(get_filters())
+        if fuzzy_active():
+            run_fuzzy(view["filters"])
+            return
+        rows = index.filter(view["filters"])
+        show_rows(rows)
+        if not loading["loader"]:
+            status_var.set(f"{len(rows)} of {len(index)} sessions")
+
+    def schedule_filters(*_):
+        if view["debounce"] is not None:
+            root.after_cancel(view["debounce"])
+        view["debounce"] = root.after(FILTER_DEBOUNCE_MS, apply_filters)
+
+    def refresh_sessions(full=False):
+        """Load sessions in the background; after the first load only rows newer than the cache are read."""
+        nonlocal index, finder
+        cancel_loading()
+        total = db.count_sessions()
+        incremental = not full and len(index) > 0
+        since = index.max_ts if incremental else None
+        if not incremental:
+            index, finder = _SessionIndex(), FuzzyFinder()
+            show_rows([])
+        loaded = []
+        progress.configure(maximum=max(1, total - (len(index) if incremental else 0)), value=0)
+        status_var.set("Checking for new sessions..." if incremental else f"Loading 0/{total}...")
+        cancel_btn.state(["!disabled"])
+
+        def on_batch(batch):
+            loaded.extend(batch)
+            index.add(batch)
+            finder.update(batch)
+            if not incremental and not fuzzy_active():
+                queue_rows(_apply_filters(batch, view["filters"]))
+                status_var.set(f"Loading {len(loaded)}/{total}...")
+            progress["value"] = len(loaded)
+
+        def on_done(error=None, cancelled=False):
+            if loading["loader"] is not loader:
+                return  # superseded by a newer refresh
+            loading["loader"] = None
+            cancel_btn.state(["disabled"])
+            if incremental and not (error or cancelled) and len(index) != total:
+                refresh_sessions(full=True)  # rows were deleted or lack a start time: reload everything
+                return
+            # populate file type dropdown dynamically
+            filetype_combo["values"] = ["All"] + index.extensions()
+            if not filetype_combo.get():
+                filetype_combo.set("All")
+            if (incremental and loaded) or fuzzy_active():
+                apply_filters()
+            shown = len(view["pending"])
+            if error is not None:
+                status_var.set(f"Load failed after {len(loaded)} sessions")
+                messagebox.showerror("Load failed", str(error))
+            elif cancelled:
+                status_var.set(f"Cancelled: {shown} shown ({len(index)}/{total} loaded)")
+            else:
+                status_var.set(f"{shown} of {len(index)} sessions")
+
+        loader = _BackgroundLoader(
+            root, lambda cancel: db.iter_session_records(include_missing=True, cancel=cancel, since=since),
+            on_batch, on_done)
+        loading["loader"] = loader
+        loader.start()
 
     def export_csv():
-        sessions = _apply_filters(_load_metadata(include_missing=True), get_filters())
+        sessions = index.filter(get_filters())
         if not sessions:
             messagebox.showinfo("No data", "No sessions found.")
             return
@@ -259,9 +774,10 @@ def launch_gui():
             messagebox.showinfo("Select", "Select a session first.")
             return
         sid, name, desc, path = tree.item(sel[0])["values"]
-        if not path or not os.path.exists(path):
+        if not logio.exists(path):
             messagebox.showerror("Missing", f"Log file not found: {path}")
-            refresh_sessions()
+            index.set_missing(str(sid))
+            apply_filters()
             return
         _open_session_tab(sid, name, desc, path)
 
@@ -276,41 +792,44 @@ def launch_gui():
         header_frame = ttk.Frame(tab)
         header_frame.pack(fill=tk.X, padx=4, pady=4)
         ttk.Label(header_frame, text=f"ID: {sid}    Name: {name}", anchor="w").pack(side=tk.LEFT, anchor="w")
-        ttk.Button(header_frame, text="×", width=3, command=lambda: notebook.forget(tab)).pack(side=tk.RIGHT)
+        ttk.Button(header_frame, text="×", width=3, command=lambda: close_tab(str(tab))).pack(side=tk.RIGHT)
         ttk.Label(tab, text=f"Description: {desc}", anchor="w").pack(fill=tk.X, padx=6)
 
         viewer_frame = ttk.Frame(tab)
         viewer_frame.pack(fill=tk.BOTH, expand=True, padx=4, pady=4)
-        x_scroll = ttk.Scrollbar(viewer_frame, orient="horizontal")
-        y_scroll = ttk.Scrollbar(viewer_frame, orient="vertical")
-        text_area = tk.Text(
-            viewer_frame,
-            wrap="none",
-            bg="#1e1e1e",
-            fg="#cccccc",
-            insertbackground="white",
-            xscrollcommand=x_scroll.set,
-            yscrollcommand=y_scroll.set
-        )
-        x_scroll.config(command=text_area.xview)
-        y_scroll.config(command=text_area.yview)
-        y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
-        text_area.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-        text_area.tag_configure("cmd", foreground="#00ff66", font=("Consolas", 10, "bold"))
-        text_area.tag_configure("out", foreground="#aaaaaa", font=("Consolas", 10))
-        content = _read_text_file(file_path)
-        for line in content.splitlines():
-            tag = "cmd" if line.startswith("$") else "out"
-            text_area.insert("end", line + "\n", tag)
-        text_area.config(state="disabled")
+        tab.viewer = _LogViewer(viewer_frame, file_path, tab_memory)
 
         notebook.add(tab, text=(name or sid[:8]))
         notebook.select(tab)
 
+    def close_tab(tab_id):
+        if not tab_id:
+            return
+        tab = root.nametowidget(tab_id)
+        viewer = getattr(tab, "viewer", None)
+        if viewer:
+            viewer.close()
+        notebook.forget(tab_id)
+        tab.destroy()
+
+    def on_tab_changed(event):
+        tab_id = notebook.select()
+        viewer = getattr(root.nametowidget(tab_id), "viewer", None) if tab_id else None
+        if viewer:
+            viewer.ensure_loaded()
+
     tree.bind("<Double-1>", lambda e: open_selected())
-    root.bind("<Control-w>", lambda e: notebook.forget(notebook.select()))
+    notebook.bind("<<NotebookTabChanged>>", on_tab_changed)
+    root.bind("<Control-w>", lambda e: close_tab(notebook.select()))
+
+    # filters apply as the user types
+    search_var.trace_add("write", schedule_filters)
+    fuzzy_var.trace_add("write", schedule_filters)
+    for widget in (desc_entry, date_from_entry, date_to_entry):
+        widget.bind("<KeyRelease>", schedule_filters)
+    for combo in (filetype_combo, missing_combo):
+        combo.bind("<<ComboboxSelected>>", schedule_filters)
+    root.protocol("WM_DELETE_WINDOW", close)
 
     refresh_sessions()
     root.mainloop()
@@ -0,0 +1,128 @@
+# promptscribe/instrument.py
+"""
+Lightweight phase timing and counters.
+
+Disabled by default: `span()` then returns a shared no-op context manager and
+`add()` returns after one flag check, so the calls can stay in hot paths.
+`promptscribe --profile` enables collection and prints `report()` on exit;
+with `trace=True` every span is also kept as a Chrome trace event
+(chrome://tracing, Perfetto).
+"""
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+ENABLED = False
+
+_lock = threading.Lock()
+_spans = {}         # name -> [calls, total_seconds]
+_counters = {}      # name -> value
+_trace = None       # list of Chrome trace events when tracing
+_t_start = None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+def enable(trace=False):
+    """Start collecting (and reset anything collected so far)."""
+    global ENABLED, _trace, _t_start
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _trace = [] if trace else None
+        _t_start = time.perf_counter()
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+@contextmanager
+def _timed_span(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        t1 = time.perf_counter()
+        with _lock:
+            rec = _spans.get(name)
+            if rec is None:
+                rec = _spans[name] = [0, 0.0]
+            rec[0] += 1
+            rec[1] += t1 - t0
+            if _trace is not None:
+                _trace.append({
+                    "name": name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                    "ts": (t0 - _t_start) * 1e6, "dur": (t1 - t0) * 1e6,
+                })
+
+
+def span(name):
+    """Context manager timing one phase; free when instrumentation is off."""
+    if not ENABLED:
+        return _NULL
+    return _timed_span(name)
+
+
+def add(name, n=1):
+    """Increment counter `name` by `n` (bytes read, events decoded, rows fetched...)."""
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def snapshot():
+    """{"spans": {name: (calls, seconds)}, "counters": {...}, "wall": seconds}."""
+    with _lock:
+        return {
+            "spans": {k: (v[0], v[1]) for k, v in _spans.items()},
+            "counters": dict(_counters),
+            "wall": time.perf_counter() - _t_start if _t_start is not None else 0.0,
+        }
+
+
+def report(out=None):
+    """Print the per-phase breakdown, slowest first. Nested spans overlap, so shares can sum past 100%."""
+    out = out or sys.stderr
+    snap = snapshot()
+    wall = snap["wall"] or 1e-9
+    print(f"\n--- profile: {snap['wall'] * 1000:.1f} ms wall ---", file=out)
+    if snap["spans"]:
+        print(f"{'phase':32s} {'calls':>7s} {'total ms':>10s} {'avg ms':>9s} {'share':>6s}", file=out)
+        for name, (calls, secs) in sorted(snap["spans"].items(), key=lambda kv: -kv[1][1]):
+            print(f"{name:32s} {calls:7d} {secs * 1000:10.1f} {secs * 1000 / calls:9.2f} "
+                  f"{secs / wall * 100:5.0f}%", file=out)
+    if snap["counters"]:
+        print(f"{'counter':32s} {'value':>17s}", file=out)
+        for name, value in sorted(snap["counters"].items()):
+            print(f"{name:32s} {value:17,}", file=out)
+
+
+def write_chrome_trace(path):
+    """Dump collected spans (and final counters) as Chrome trace JSON."""
+    with _lock:
+        events = list(_trace or [])
+        counters = dict(_counters)
+        now = (time.perf_counter() - _t_start) * 1e6 if _t_start is not None else 0.0
+    if counters:
+        events.append({"name": "counters", "ph": "C", "pid": os.getpid(), "ts": now, "args": counters})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return path
@@ -0,0 +1,202 @@
+# promptscribe/layout.py
+"""
+Where session logs and metadata files live.
+
+With `storage.layout: date`, new sessions go to logs/YYYY/MM/DD/ and
+metadata/YYYY/MM/DD/ (UTC day the session started), so no directory grows
+without bound; "flat" keeps everything in one directory as before. Lookups
+try the dated location first and fall back to the flat one, so sessions
+recorded before the switch keep working until `promptscribe migrate-layout`
+moves them.
+"""
+import os
+import json
+import time
+import calendar
+from concurrent.futures import ThreadPoolExecutor
+from promptscribe.config import CONFIG
+
+BATCH_SIZE = 500
+
+
+def scheme():
+    return (CONFIG.get("storage") or {}).get("layout") or "flat"
+
+
+def sid_ts(sid):
+    """Start time encoded in a session id (S-YYYYMMDD_HHMMSSZ-xxxxxx), or None."""
+    try:
+        return float(calendar.timegm(time.strptime(sid.split("-")[1], "%Y%m%d_%H%M%SZ")))
+    except (IndexError, ValueError):
+        return None
+
+
+def _sid_of(name):
+    """Session id of a log or meta file name."""
+    base = name.split("__", 1)[0]
+    for suffix in (".meta.json", ".jsonl"):
+        if base.endswith(suffix):
+            return base[:-len(suffix)]
+    return base
+
+
+def shard(ts):
+    t = time.gmtime(ts)
+    return os.path.join(f"{t.tm_year:04d}", f"{t.tm_mon:02d}", f"{t.tm_mday:02d}")
+
+
+def session_dir(kind, ts=None, create=True):
+    """Directory for new files of `kind` ("logs" or "metadata") of a session started at `ts`."""
+    base = CONFIG["paths"][kind]
+    path = os.path.join(base, shard(time.time() if ts is None else ts)) if scheme() == "date" else base
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _candidates(kind, name):
+    base = CONFIG["paths"][kind]
+    ts = sid_ts(_sid_of(name))
+    dated = os.path.join(base, shard(ts), name) if ts is not None else None
+    flat = os.path.join(base, name)
+    if scheme() == "date":
+        return [p for p in (dated, flat) if p]
+    return [p for p in (flat, dated) if p]
+
+
+def find(kind, name):
+    """Existing path of file `name` under `kind`, dated or flat, or None."""
+    from promptscribe import logio
+    for path in _candidates(kind, name):
+        if logio.exists(path):
+            return path
+    return None
+
+
+def meta_path(sid):
+    """Metadata file of a session: where it is, or where a new one goes."""
+    name = f"{sid}.meta.json"
+    return find("metadata", name) or _candidates("metadata", name)[0]
+
+
+# --- Migration of flat directories ---
+def _flat_entries(base, suffix):
+    """Names directly in `base` (files, or segmented log dirs) ending with `suffix`."""
+    try:
+        with os.scandir(base) as it:
+            return sorted(e.name for e in it if e.name.endswith(suffix) and not e.name.endswith(".tmp"))
+    except FileNotFoundError:
+        return []
+
+
+def _entry_ts(path, sid):
+    ts = sid_ts(sid)
+    if ts is None:
+        try:
+            with open(meta_path(sid), "r", encoding="utf-8") as f:
+                ts = json.load(f).get("start_ts")
+        except (OSError, ValueError):
+            ts = None
+    return ts if ts is not None else os.stat(path).st_mtime
+
+
+def _move(job):
+    """Worker: rename one file into its dated directory; returns (old, new) or (old, None)."""
+    kind, name = job
+    old = os.path.join(CONFIG["paths"][kind], name)
+    try:
+        new = os.path.join(CONFIG["paths"][kind], shard(_entry_ts(old, _sid_of(name))), name)
+        if os.path.exists(new):
+            return old, None
+        os.makedirs(os.path.dirname(new), exist_ok=True)
+        os.rename(old, new)
+        return old, new
+    except OSError:
+        return old, None
+
+
+def _rewrite_meta(meta_file, moved):
+    """Point a metadata file at its log's new location."""
+    try:
+        with open(meta_file, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return
+    new = moved.get(meta.get("file"))
+    if new:
+        from promptscribe.utils import safe_write_json
+        meta["file"] = new
+        safe_write_json(meta_file, meta)
+
+
+def _update_db(pairs):
+    """Rewrite SessionEntry.file for (old, new) pairs in one transaction."""
+    import sqlalchemy as sa
+    from promptscribe import db
+    if not pairs:
+        return 0
+    table = db.SessionEntry.__table__
+    stmt = table.update().where(table.c.file == sa.bindparam("old")).values(file=sa.bindparam("new"))
+    with db.get_engine().begin() as conn:
+        result = conn.execute(stmt, [{"old": o, "new": n} for o, n in pairs])
+    return result.rowcount
+
+
+def _repair_db():
+    """Re-point rows whose flat log path is gone but whose dated copy exists (an interrupted run)."""
+    from promptscribe import db, logio
+    logs = CONFIG["paths"]["logs"]
+    s = db.SessionLocal()
+    try:
+        rows = s.query(db.SessionEntry.file).filter(db.SessionEntry.file.like(os.path.join(logs, "%"))).all()
+    finally:
+        s.close()
+    pairs = []
+    for (path,) in rows:
+        if os.path.dirname(path) == logs and not logio.exists(path):
+            found = find("logs", os.path.basename(path))
+            if found:
+                pairs.append((path, found))
+    return _update_db(pairs)
+
+
+def migrate(workers=8, batch_size=BATCH_SIZE, dry_run=False, echo=print):
+    """
+    Move flat logs and metadata into dated directories. Renames run on a
+    thread pool a batch at a time; each batch's DB rows are rewritten in one
+    transaction right after its files moved. Returns a summary dict.
+    """
+    logs = _flat_entries(CONFIG["paths"]["logs"], ".jsonl")
+    metas = _flat_entries(CONFIG["paths"]["metadata"], ".meta.json")
+    summary = {"logs": 0, "metadata": 0, "skipped": 0, "rows": 0}
+    if dry_run:
+        echo(f"Would move {len(logs)} log(s) and {len(metas)} metadata file(s) into dated directories.")
+        return summary
+    moved = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for i in range(0, len(logs), batch_size):
+            pairs = []
+            for old, new in pool.map(_move, [("logs", n) for n in logs[i:i + batch_size]]):
+                if new is None:
+                    summary["skipped"] += 1
+                    continue
+                pairs.append((old, new))
+                moved[old] = new
+            summary["logs"] += len(pairs)
+            summary["rows"] += _update_db(pairs)
+            echo(f"Moved {summary['logs']}/{len(logs)} logs")
+        moved_meta = {}
+        for i in range(0, len(metas), batch_size):
+            for old, new in pool.map(_move, [("metadata", n) for n in metas[i:i + batch_size]]):
+                if new is None:
+                    summary["skipped"] += 1
+                    continue
+                summary["metadata"] += 1
+                moved_meta[_sid_of(os.path.basename(old))] = new
+        # metadata files (moved or not) still naming a flat log path
+        if moved:
+            sids = {_sid_of(os.path.basename(old)) for old in moved}
+            meta_files = [moved_meta.get(sid) or meta_path(sid) for sid in sids]
+            list(pool.map(lambda m: _rewrite_meta(m, moved), meta_files))
+    summary["rows"] += _repair_db()
+    return summary
@@ -0,0 +1,116 @@
+# promptscribe/llm_stub.py
+"""
+Minimal OpenAI-compatible chat completions server for offline runs.
+
+    python -m promptscribe.llm_stub --port 8089 --latency 0.2
+
+then point `ai.base_url` (or OPENAI_BASE_URL) at http://127.0.0.1:8089/v1.
+Responses are deterministic so summaries and cache behaviour are reproducible.
+"""
+import json
+import time
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _stub_answer(messages):
+    text = "\n".join(m.get("content", "") for m in messages if m.get("role") == "user")
+    commands = [ln[2:].strip() for ln in text.splitlines() if ln.startswith("$ ")]
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:8]
+    if commands:
+        shown = ", ".join(commands[:5]) + (" ..." if len(commands) > 5 else "")
+        return f"- ran {len(commands)} commands: {shown}\n- {len(text)} chars of input [{digest}]"
+    return f"- merged {text.count('---') + 1} summaries, {len(text)} chars [{digest}]"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "promptscribe-llm-stub/1"
+
+    def log_message(self, fmt, *args):  # keep benchmark output clean
+        pass
+
+    def _send(self, code, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+        else:
+            self._send(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": {"message": "not found"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            req = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send(400, {"error": {"message": "invalid JSON"}})
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.requests += 1
+        messages = req.get("messages") or []
+        answer = _stub_answer(messages)
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        self._send(200, {
+            "id": f"chatcmpl-stub-{self.server.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": req.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": answer},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(answer) // 4,
+                "total_tokens": prompt_tokens + len(answer) // 4,
+            },
+        })
+
+
+def make_server(host="127.0.0.1", port=0, latency=0.0):
+    """Create (but do not start) a stub server; port 0 picks a free port."""
+    srv = ThreadingHTTPServer((host, port), _Handler)
+    srv.daemon_threads = True
+    srv.latency = latency
+    srv.requests = 0
+    srv.lock = threading.Lock()
+    return srv
+
+
+def serve_in_thread(latency=0.0):
+    """Start a stub server in a daemon thread. Returns (server, base_url)."""
+    srv = make_server(latency=latency)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    host, port = srv.server_address[:2]
+    return srv, f"http://{host}:{port}/v1"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="OpenAI-compatible stub server for PromptScribe.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--latency", type=float, default=0.0, help="Seconds to sleep per request.")
+    args = ap.parse_args()
+    srv = make_server(args.host, args.port, args.latency)
+    print(f"LLM stub listening on http://{args.host}:{args.port}/v1")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
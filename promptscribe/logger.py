@@ -7,6 +7,7 @@ import uuid
 import datetime
 from promptscribe.config import CONFIG
 from promptscribe.utils import safe_write_json
+from promptscribe import layout
 
 OUT_DIR = CONFIG["paths"]["logs"]
 META_DIR = CONFIG["paths"]["metadata"]
@@ -15,12 +16,15 @@ os.makedirs(OUT_DIR, exist_ok=True)
 os.makedirs(META_DIR, exist_ok=True)
 
 def _make_session_paths(name=None):
-    ts = datetime.datetime.utcnow().strftime("%Y%m%d_%H%M%SZ")
+    now = datetime.datetime.utcnow()
+    ts = now.strftime("%Y%m%d_%H%M%SZ")
     sid = f"S-{ts}-{uuid.uuid4().hex[:6]}"
     safe_name = name.replace(" ", "_") if name else None
     fname = f"{sid}{('__' + safe_name) if safe_name else ''}.jsonl"
     meta = f"{sid}.meta.json"
-    return sid, os.path.join(OUT_DIR, fname), os.path.join(META_DIR, meta)
+    start = now.replace(tzinfo=datetime.timezone.utc).timestamp()
+    return sid, os.path.join(layout.session_dir("logs", start), fname), \
+        os.path.join(layout.session_dir("metadata", start), meta)
 
 def start_session(name=None):
     sid, outpath, metapath = _make_session_paths(name)
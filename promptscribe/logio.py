@@ -0,0 +1,429 @@
+# promptscribe/logio.py
+"""
+Session log storage: plain JSONL files or segmented, compressed logs.
+
+A segmented log keeps the session's usual `.jsonl` path, but that path is a
+directory of rotated segments:
+
+    S-...__name.jsonl/000000.jsonl.gz     gzip members (or .zst zstd frames)
+    S-...__name.jsonl/000000.idx          one line per frame: [offset, length, raw length]
+
+Each frame holds whole JSONL lines and decompresses on its own, so
+`zcat 000000.jsonl.gz` shows the events. `open_log()` presents all segments
+as one seekable byte stream with the same offsets a plain file would have,
+decompressing only the frames a read touches. Readers use `open_log`,
+`open_text`, `log_size`, `log_stat` and `exists` instead of `open`/`os.stat`;
+the recorder writes through `open_writer`, which follows the
+`recorder.segments` config for new logs.
+
+`promptscribe compact` can also move segmented logs into a monthly pack
+file. Their path is then virtual, `<month>.pack/<log name>`: the frames sit
+in the pack and `<month>.pack.idx` lists them per log.
+"""
+import io
+import os
+import time
+import zlib
+import json
+import bisect
+import threading
+from collections import namedtuple
+
+CODECS = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+INDEX_SUFFIX = ".idx"
+PACK_SUFFIX = ".pack"
+FRAME_BYTES = 256 * 1024
+FRAME_SECONDS = 1.0
+SEGMENT_BYTES = 64 * 1024 * 1024
+
+LogStat = namedtuple("LogStat", "st_size st_mtime_ns")
+
+
+def is_segmented(path):
+    return os.path.isdir(path)
+
+
+def split_pack(path):
+    """(pack file, member name) for a log inside a pack, else None."""
+    pack, member = os.path.split(path)
+    if pack.endswith(PACK_SUFFIX) and os.path.isfile(pack):
+        return pack, member
+    return None
+
+
+_pack_indexes = {}  # pack path -> ((size, mtime_ns) of its index, parsed index)
+
+
+def read_pack_index(pack):
+    """{"sessions": {member: {"codec": ..., "frames": [[offset, length, raw length], ...]}}}."""
+    idx_path = pack + INDEX_SUFFIX
+    try:
+        st = os.stat(idx_path)
+    except OSError:
+        return {"sessions": {}}
+    key = (st.st_size, st.st_mtime_ns)
+    cached = _pack_indexes.get(pack)
+    if cached is None or cached[0] != key:
+        with open(idx_path, "r", encoding="utf-8") as f:
+            cached = _pack_indexes[pack] = (key, json.load(f))
+    return cached[1]
+
+
+def exists(path):
+    """True for an existing plain, segmented or packed log."""
+    if not path:
+        return False
+    if os.path.exists(path):
+        return True
+    packed = split_pack(path)
+    return packed is not None and packed[1] in read_pack_index(packed[0])["sessions"]
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd segments require the 'zstandard' package (pip install zstandard)")
+    return zstandard
+
+
+def _compress(codec, data, level):
+    if codec == "zstd":
+        return _zstd().ZstdCompressor(level=level or 3).compress(data)
+    c = zlib.compressobj(level or 6, zlib.DEFLATED, 31)   # 31: one gzip member
+    return c.compress(data) + c.flush()
+
+
+def _decompress_all(codec, data):
+    """Decode the complete frames at the start of `data`; returns (bytes, bytes consumed)."""
+    out, used = [], 0
+    while used < len(data):
+        d = _zstd().ZstdDecompressor().decompressobj() if codec == "zstd" else zlib.decompressobj(31)
+        try:
+            chunk = d.decompress(data[used:])
+        except Exception:
+            break
+        if not d.eof:
+            break   # a frame still being written
+        out.append(chunk)
+        used = len(data) - len(d.unused_data)
+    return b"".join(out), used
+
+
+def _segments(path):
+    """[(segment path, codec)] in order."""
+    segs = []
+    for name in sorted(os.listdir(path)):
+        for codec, suffix in CODECS.items():
+            if name.endswith(suffix):
+                segs.append((os.path.join(path, name), codec))
+    return segs
+
+
+def _read_index(seg_path):
+    idx_path = seg_path.rsplit(".jsonl", 1)[0] + INDEX_SUFFIX
+    frames = []
+    try:
+        with open(idx_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                try:
+                    off, clen, rlen = (int(x) for x in line.strip("[]\n").split(","))
+                except ValueError:
+                    break
+                frames.append((off, clen, rlen))
+    except OSError:
+        pass
+    return frames
+
+
+class _Frames:
+    """Frame table of a segmented log: logical start offsets and where each frame lives."""
+
+    def __init__(self, path):
+        self.starts = []    # logical offset of each frame
+        self.frames = []    # (segment path, codec, offset, length, raw bytes or None)
+        self.size = 0
+        self.mtime_ns = 0
+        packed = split_pack(path)
+        if packed is not None:
+            entry = read_pack_index(packed[0])["sessions"].get(packed[1])
+            if entry is None:
+                raise FileNotFoundError(f"Missing log file: {path}")
+            self.mtime_ns = os.stat(packed[0]).st_mtime_ns
+            for off, clen, rlen in entry["frames"]:
+                self._add(packed[0], entry["codec"], off, clen, rlen)
+            return
+        for seg, codec in _segments(path):
+            try:
+                st = os.stat(seg)
+            except OSError:
+                continue
+            self.mtime_ns = max(self.mtime_ns, st.st_mtime_ns)
+            end = 0
+            for off, clen, rlen in _read_index(seg):
+                if off + clen > st.st_size:
+                    break
+                self._add(seg, codec, off, clen, rlen)
+                end = off + clen
+            if end < st.st_size:
+                # frames without an index line (crash, or a write racing this read)
+                with open(seg, "rb") as f:
+                    f.seek(end)
+                    raw, used = _decompress_all(codec, f.read())
+                if used:
+                    self._add(seg, codec, end, used, len(raw), raw)
+
+    def _add(self, seg, codec, off, clen, rlen, raw=None):
+        self.starts.append(self.size)
+        self.frames.append((seg, codec, off, clen, raw))
+        self.size += rlen
+
+
+class _SegmentedRaw(io.RawIOBase):
+    """Raw, seekable reader over the frames of a segmented log."""
+
+    def __init__(self, path):
+        self.table = _Frames(path)
+        self.pos = 0
+        self._cur = (-1, memoryview(b""))   # (frame number, decoded bytes)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += self.table.size
+        self.pos = max(0, offset)
+        return self.pos
+
+    def _frame(self, i):
+        if self._cur[0] != i:
+            seg, codec, off, clen, raw = self.table.frames[i]
+            if raw is None:
+                with open(seg, "rb") as f:
+                    f.seek(off)
+                    comp = f.read(clen)
+                if codec == "zstd":
+                    raw = _zstd().ZstdDecompressor().decompressobj().decompress(comp)
+                else:
+                    raw = zlib.decompress(comp, 31)
+            self._cur = (i, memoryview(raw))
+        return self._cur[1]
+
+    def readinto(self, b):
+        if self.pos >= self.table.size:
+            return 0
+        i = bisect.bisect_right(self.table.starts, self.pos) - 1
+        data = self._frame(i)
+        start = self.pos - self.table.starts[i]
+        n = min(len(b), len(data) - start)
+        b[:n] = data[start:start + n]
+        self.pos += n
+        return n
+
+
+def open_log(path, buffering=1 << 18):
+    """Binary, seekable reader of a plain, segmented or packed log."""
+    if os.path.isfile(path):
+        return open(path, "rb")
+    return io.BufferedReader(_SegmentedRaw(path), buffering)
+
+
+def open_text(path):
+    """Text reader (utf-8) of a plain, segmented or packed log."""
+    if os.path.isfile(path):
+        return open(path, "r", encoding="utf-8")
+    return io.TextIOWrapper(open_log(path), encoding="utf-8")
+
+
+def log_stat(path):
+    """(uncompressed size, mtime_ns) of a log; os.stat for plain files."""
+    if os.path.isfile(path):
+        return os.stat(path)
+    table = _Frames(path)
+    return LogStat(table.size, table.mtime_ns)
+
+
+def log_size(path):
+    """Uncompressed size: the offsets readers of `open_log` see."""
+    return log_stat(path).st_size
+
+
+def disk_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    if is_segmented(path):
+        return sum(os.path.getsize(os.path.join(path, n)) for n in os.listdir(path))
+    return sum(f[3] for f in _Frames(path).frames)
+
+
+def iter_frames(path):
+    """
+    (codec, compressed frame, raw length) of a segmented or packed log, in
+    order, for copying it elsewhere without recompressing.
+    """
+    table = _Frames(path)
+    ends = table.starts[1:] + [table.size]
+    for (seg, codec, off, clen, raw), start, end in zip(table.frames, table.starts, ends):
+        if raw is not None:
+            yield codec, _compress(codec, raw, None), end - start
+            continue
+        with open(seg, "rb") as f:
+            f.seek(off)
+            yield codec, f.read(clen), end - start
+
+
+def recompress(codec, frame, to_codec):
+    """Convert one compressed frame between codecs."""
+    if codec == to_codec:
+        return frame
+    raw, _ = _decompress_all(codec, frame)
+    return _compress(to_codec, raw, None)
+
+
+# --- Writing ---
+def _config():
+    from promptscribe.config import CONFIG
+    return CONFIG.get("recorder") or {}
+
+
+class SegmentWriter:
+    """
+    Text writer producing a segmented log. Writes are buffered into a frame,
+    which is compressed and appended once it reaches `frame_bytes` or, at
+    most `frame_seconds` after its first line (a background thread flushes
+    idle sessions). Segments rotate after `segment_bytes` compressed bytes
+    or `segment_seconds`. Reopening an existing log appends to its last
+    segment.
+    """
+
+    def __init__(self, path, codec="gzip", level=None, frame_bytes=FRAME_BYTES,
+                 frame_seconds=FRAME_SECONDS, segment_bytes=SEGMENT_BYTES, segment_seconds=0):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec: {codec} (choose from {', '.join(CODECS)})")
+        if codec == "zstd":
+            _zstd()
+        self.path = path
+        self.codec = codec
+        self.level = level
+        self.frame_bytes = frame_bytes
+        self.frame_seconds = frame_seconds
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self._lock = threading.Lock()
+        self._buf = []
+        self._buffered = 0
+        self._first = None      # monotonic time of the oldest buffered line
+        self._seg_fd = self._idx_fd = None
+        os.makedirs(path, exist_ok=True)
+        segs = _segments(path)
+        self._seq = int(os.path.basename(segs[-1][0]).split(".")[0]) if segs else 0
+        if segs and segs[-1][1] == codec and os.path.getsize(segs[-1][0]) < segment_bytes:
+            self._open_segment()
+        else:
+            self._open_segment(self._seq + 1 if segs else 0)
+        self._closed = threading.Event()
+        self._thread = None
+        if frame_seconds:
+            self._thread = threading.Thread(target=self._flusher, name="segment-flusher", daemon=True)
+            self._thread.start()
+
+    def _open_segment(self, seq=None):
+        if seq is not None:
+            self._seq = seq
+        base = os.path.join(self.path, f"{self._seq:06d}")
+        for fd in (self._seg_fd, self._idx_fd):
+            if fd is not None:
+                os.close(fd)
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+        self._seg_fd = os.open(base + CODECS[self.codec], flags, 0o644)
+        self._idx_fd = os.open(base + INDEX_SUFFIX, flags, 0o644)
+        self._seg_size = os.fstat(self._seg_fd).st_size
+        self._seg_started = time.monotonic()
+
+    def _commit(self):
+        """Compress and append the buffered lines as one frame (lock held)."""
+        if not self._buf:
+            return
+        data = "".join(self._buf).encode("utf-8")
+        self._buf, self._buffered, self._first = [], 0, None
+        comp = _compress(self.codec, data, self.level)
+        off = self._seg_size
+        os.write(self._seg_fd, comp)
+        os.write(self._idx_fd, f"[{off},{len(comp)},{len(data)}]\n".encode())
+        self._seg_size += len(comp)
+        if self._seg_size >= self.segment_bytes or \
+                (self.segment_seconds and time.monotonic() - self._seg_started >= self.segment_seconds):
+            self._open_segment(self._seq + 1)
+
+    def _flusher(self):
+        while not self._closed.wait(self.frame_seconds / 2):
+            with self._lock:
+                if self._first is not None and time.monotonic() - self._first >= self.frame_seconds:
+                    self._commit()
+
+    def write(self, s):
+        with self._lock:
+            self._buf.append(s)
+            self._buffered += len(s)
+            if self._first is None:
+                self._first = time.monotonic()
+        return len(s)
+
+    def flush(self):
+        """Commit a frame when one is due; recorder calls this after every event."""
+        if self._buffered < self.frame_bytes and \
+                (self._first is None or time.monotonic() - self._first < self.frame_seconds):
+            return
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        if self._seg_fd is None:
+            return
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            self._commit()
+            os.close(self._seg_fd)
+            os.close(self._idx_fd)
+            self._seg_fd = self._idx_fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def open_writer(path):
+    """
+    Append-mode text writer for a log. Existing logs keep their format; a new
+    one is segmented when `recorder.segments` is enabled.
+    """
+    if os.path.isfile(path):
+        return open(path, "a", encoding="utf-8")
+    cfg = _config()
+    if not is_segmented(path) and not cfg.get("segments"):
+        return open(path, "a", encoding="utf-8")
+    return SegmentWriter(
+        path,
+        codec=cfg.get("codec") or "gzip",
+        level=cfg.get("compress_level"),
+        frame_bytes=int(cfg.get("frame_bytes") or FRAME_BYTES),
+        frame_seconds=float(cfg.get("frame_seconds", FRAME_SECONDS) or 0),
+        segment_bytes=int(cfg.get("segment_max_bytes") or SEGMENT_BYTES),
+        segment_seconds=float(cfg.get("segment_max_seconds") or 0),
+    )
@@ -0,0 +1,334 @@
+# promptscribe/metrics.py
+"""
+Live metrics for running recorders.
+
+The recorder thread is the only writer of a RecorderMetrics; the reporter
+thread reads plain ints and copies of small dicts, which is safe under the
+GIL, so updates need no lock and cost a few additions per event. Every
+`interval` seconds the reporter writes a status JSON (read by
+`promptscribe status`) and, when `metrics.textfile_dir` is configured, a
+Prometheus textfile-collector file.
+"""
+import os
+import json
+import time
+import bisect
+import socket
+import threading
+from promptscribe import logio
+
+WRITE_BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05, 0.1, 0.5, 1.0)
+COMMAND_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 1800.0, 3600.0)
+
+
+def _metrics_cfg():
+    from promptscribe.config import CONFIG
+    return CONFIG.get("metrics") or {}
+
+
+def status_dir():
+    from promptscribe.config import CONFIG
+    return os.path.join(CONFIG["paths"]["root"], "run")
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts[i] holds observations <= bounds[i], the last slot is +Inf."""
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self):
+        return {"bounds": list(self.bounds), "counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+
+def quantile(hist, q):
+    """Upper bucket bound containing quantile `q` of a Histogram snapshot (None if empty)."""
+    total = hist["count"]
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for bound, count in zip(hist["bounds"] + [float("inf")], hist["counts"]):
+        seen += count
+        if seen >= rank:
+            return bound
+    return float("inf")
+
+
+class RecorderMetrics:
+    """Counters and histograms for one recording session."""
+
+    def __init__(self, session_id, name=None, log_path=None):
+        self.session_id = session_id
+        self.name = name
+        self.log_path = log_path
+        self.pid = os.getpid()
+        self.host = socket.gethostname()
+        self.started = time.time()
+        self.events = {}                    # kind -> count
+        self.bytes_written = 0
+        self.dropped_bytes = 0
+        self.commands = 0
+        self.command_started = None         # wall time of the running command, if any
+        self.last_event_ts = None
+        self.write_seconds = Histogram(WRITE_BUCKETS)
+        self.command_seconds = Histogram(COMMAND_BUCKETS)
+        self._prev = (time.monotonic(), 0)  # (time, log size) at the previous snapshot
+
+    def record_event(self, kind, nbytes, write_seconds):
+        self.events[kind] = self.events.get(kind, 0) + 1
+        self.bytes_written += nbytes
+        self.last_event_ts = time.time()
+        self.write_seconds.observe(write_seconds)
+
+    def record_dropped(self, nbytes):
+        self.dropped_bytes += nbytes
+
+    def start_command(self):
+        self.command_started = time.time()
+
+    def finish_command(self):
+        if self.command_started is not None:
+            self.command_seconds.observe(time.time() - self.command_started)
+            self.command_started = None
+        self.commands += 1
+
+    def snapshot(self):
+        """Point-in-time copy; also advances the log growth-rate window."""
+        now_mono = time.monotonic()
+        try:
+            size = logio.log_size(self.log_path) if self.log_path else self.bytes_written
+        except OSError:
+            size = self.bytes_written
+        prev_t, prev_size = self._prev
+        elapsed = now_mono - prev_t
+        growth = (size - prev_size) / elapsed if elapsed > 0 else 0.0
+        self._prev = (now_mono, size)
+        now = time.time()
+        return {
+            "session_id": self.session_id,
+            "name": self.name,
+            "file": self.log_path,
+            "pid": self.pid,
+            "host": self.host,
+            "started": self.started,
+            "updated": now,
+            "events": dict(self.events),
+            "bytes_written": self.bytes_written,
+            "dropped_bytes": self.dropped_bytes,
+            "commands": self.commands,
+            "command_running_seconds": (now - self.command_started) if self.command_started else None,
+            "last_event_ts": self.last_event_ts,
+            "log_size_bytes": size,
+            "log_growth_bytes_per_second": growth,
+            "write_seconds": self.write_seconds.snapshot(),
+            "command_seconds": self.command_seconds.snapshot(),
+        }
+
+
+# --- Prometheus text exposition ---
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _histogram_lines(metric, labels, hist):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(hist["bounds"] + [float("inf")], hist["counts"]):
+        cumulative += count
+        le = "+Inf" if bound == float("inf") else repr(float(bound))
+        lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {cumulative}')
+    lines.append(f"{metric}_sum{{{labels}}} {hist['sum']:.9g}")
+    lines.append(f"{metric}_count{{{labels}}} {hist['count']}")
+    return lines
+
+
+def render_prometheus(snap):
+    """Prometheus text format for one session snapshot."""
+    labels = f'session_id="{_label(snap["session_id"])}",name="{_label(snap["name"] or "")}"'
+    out = []
+
+    def metric(name, kind, help_text, samples):
+        out.append(f"# HELP promptscribe_{name} {help_text}")
+        out.append(f"# TYPE promptscribe_{name} {kind}")
+        out.extend(samples)
+
+    metric("events_total", "counter", "Events written to the session log.",
+           [f'promptscribe_events_total{{{labels},kind="{_label(k)}"}} {n}' for k, n in sorted(snap["events"].items())])
+    metric("bytes_written_total", "counter", "Bytes of JSONL written to the session log.",
+           [f"promptscribe_bytes_written_total{{{labels}}} {snap['bytes_written']}"])
+    metric("dropped_bytes_total", "counter", "Output bytes not written because of recording limits.",
+           [f"promptscribe_dropped_bytes_total{{{labels}}} {snap['dropped_bytes']}"])
+    metric("commands_total", "counter", "Commands run in the session.",
+           [f"promptscribe_commands_total{{{labels}}} {snap['commands']}"])
+    metric("command_running", "gauge", "1 while a command is running.",
+           [f"promptscribe_command_running{{{labels}}} {0 if snap['command_running_seconds'] is None else 1}"])
+    metric("log_size_bytes", "gauge", "Current size of the session log.",
+           [f"promptscribe_log_size_bytes{{{labels}}} {snap['log_size_bytes']}"])
+    metric("log_growth_bytes_per_second", "gauge", "Log growth rate over the last reporting interval.",
+           [f"promptscribe_log_growth_bytes_per_second{{{labels}}} {snap['log_growth_bytes_per_second']:.3f}"])
+    metric("session_start_timestamp_seconds", "gauge", "Session start time.",
+           [f"promptscribe_session_start_timestamp_seconds{{{labels}}} {snap['started']:.3f}"])
+    if snap["last_event_ts"]:
+        metric("last_event_timestamp_seconds", "gauge", "Time of the last event written.",
+               [f"promptscribe_last_event_timestamp_seconds{{{labels}}} {snap['last_event_ts']:.3f}"])
+    metric("event_write_seconds", "histogram", "Time to write and flush one event.",
+           _histogram_lines("promptscribe_event_write_seconds", labels, snap["write_seconds"]))
+    metric("command_duration_seconds", "histogram", "Wall time of recorded commands.",
+           _histogram_lines("promptscribe_command_duration_seconds", labels, snap["command_seconds"]))
+    return "\n".join(out) + "\n"
+
+
+def _atomic_write(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+# --- Reporter ---
+class MetricsReporter:
+    """Background thread publishing a RecorderMetrics every `interval` seconds."""
+
+    def __init__(self, metrics, interval=None, textfile_dir=None, run_dir=None):
+        cfg = _metrics_cfg()
+        self.metrics = metrics
+        self.interval = float(interval or cfg.get("interval") or 10)
+        self.textfile_dir = textfile_dir or cfg.get("textfile_dir")
+        self.run_dir = run_dir or status_dir()
+        self.status_path = os.path.join(self.run_dir, f"{metrics.session_id}.json")
+        self.prom_path = (os.path.join(self.textfile_dir, f"promptscribe_{metrics.session_id}.prom")
+                          if self.textfile_dir else None)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="promptscribe-metrics", daemon=True)
+
+    def start(self):
+        os.makedirs(self.run_dir, exist_ok=True)
+        if self.textfile_dir:
+            os.makedirs(self.textfile_dir, exist_ok=True)
+        self.publish()
+        self._thread.start()
+        return self
+
+    def publish(self):
+        snap = self.metrics.snapshot()
+        snap["interval"] = self.interval
+        try:
+            _atomic_write(self.status_path, json.dumps(snap))
+            if self.prom_path:
+                _atomic_write(self.prom_path, render_prometheus(snap))
+        except OSError:
+            pass  # metrics must never break a recording
+        return snap
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.publish()
+
+    def stop(self):
+        """Stop publishing and remove this session's status and textfile entries."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=self.interval + 1)
+        for path in (self.status_path, self.prom_path):
+            if path and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def start_reporter(session_id, name, log_path):
+    """(metrics, reporter) for a new recording, or (None, None) when metrics are disabled."""
+    if not _metrics_cfg().get("enabled", True):
+        return None, None
+    metrics = RecorderMetrics(session_id, name, log_path)
+    try:
+        reporter = MetricsReporter(metrics).start()
+    except OSError:
+        return None, None
+    return metrics, reporter
+
+
+# --- Status ---
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def active_sessions(include_stale=False):
+    """Status snapshots of running recorders, newest first. Dead recorders on this host are skipped."""
+    run_dir = status_dir()
+    if not os.path.isdir(run_dir):
+        return []
+    host = socket.gethostname()
+    now = time.time()
+    out = []
+    for fname in os.listdir(run_dir):
+        if not fname.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(run_dir, fname), "r", encoding="utf-8") as f:
+                snap = json.load(f)
+        except (OSError, ValueError):
+            continue
+        dead = snap.get("host") == host and not _alive(snap.get("pid", -1))
+        snap["stale"] = dead or now - snap.get("updated", 0) > 3 * snap.get("interval", 10)
+        if snap["stale"] and not include_stale:
+            continue
+        out.append(snap)
+    out.sort(key=lambda s: s.get("started", 0), reverse=True)
+    return out
+
+
+def _fmt_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024 or unit == "GB":
+            return f"{n:.1f} {unit}" if unit != "B" else f"{int(n)} B"
+        n /= 1024.0
+
+
+def _fmt_secs(s):
+    s = int(s)
+    return f"{s // 3600}h{s % 3600 // 60:02d}m" if s >= 3600 else f"{s // 60}m{s % 60:02d}s"
+
+
+def show_status(include_stale=False):
+    """Print running recorders with their throughput."""
+    sessions = active_sessions(include_stale)
+    if not sessions:
+        print("No active recording sessions.")
+        return
+    now = time.time()
+    print(f"{'SESSION':32s} {'NAME':16s} {'PID':>7s} {'UPTIME':>8s} {'EVENTS':>9s} {'LOG':>10s} "
+          f"{'AVG RATE':>11s} {'NOW':>11s} {'DROPPED':>9s} {'P99 WRITE':>10s} STATE")
+    for s in sessions:
+        uptime = max(1e-9, now - s["started"])
+        events = sum(s["events"].values())
+        p99 = quantile(s["write_seconds"], 0.99)
+        p99_txt = "-" if p99 is None else ("> 1s" if p99 == float("inf") else f"<={p99 * 1000:g}ms")
+        if s["stale"]:
+            state = "stale"
+        elif s["command_running_seconds"] is not None:
+            state = f"running {_fmt_secs(s['command_running_seconds'])}"
+        else:
+            state = "idle"
+        print(f"{s['session_id']:32s} {(s.get('name') or '-')[:16]:16s} {s['pid']:>7d} {_fmt_secs(uptime):>8s} "
+              f"{events:>9d} {_fmt_bytes(s['log_size_bytes']):>10s} "
+              f"{_fmt_bytes(s['bytes_written'] / uptime) + '/s':>11s} "
+              f"{_fmt_bytes(s['log_growth_bytes_per_second']) + '/s':>11s} "
+              f"{_fmt_bytes(s['dropped_bytes']):>9s} {p99_txt:>10s} {state}")
@@ -0,0 +1,316 @@
+# promptscribe/pager.py
+"""
+Interactive pager for large sessions.
+
+Only the visible window of events is decoded and rendered. Line offsets are
+indexed sparsely (one entry per STRIDE lines) and lazily, as far as the
+current position, jump or search needs, so the first page paints without
+reading the rest of the file.
+"""
+import os
+import sys
+import json
+import bisect
+from typing import Any, Dict, List, Optional, Tuple
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+STRIDE = 256
+IN_MARKERS = (b'"kind": "in"', b'"kind":"in"')
+
+
+def _decode(raw: bytes) -> Dict[str, Any]:
+    try:
+        evt = json.loads(raw)
+        if not isinstance(evt, dict):
+            return {"kind": "?", "data": str(evt)}
+        if "blob" in evt:
+            from promptscribe import blobstore
+            evt = {"ts": evt.get("ts"), "kind": evt.get("kind"), "data": blobstore.resolve_data(evt)}
+        return evt
+    except (ValueError, UnicodeDecodeError):
+        return {"kind": "corrupt", "data": raw[:200].decode("utf-8", "replace")}
+
+
+class EventIndex:
+    """Sparse, incrementally built index of line offsets, commands and timestamps."""
+
+    def __init__(self, path: str):
+        self.path = path
+        from promptscribe import logio
+        self.f = logio.open_log(path)
+        self.block_offsets: List[int] = [0]   # offset of line i * STRIDE
+        self.block_ts: List[float] = []       # first known ts at or after each block start
+        self.commands: List[int] = []         # line numbers of "in" events
+        self.lines = 0                        # complete lines scanned so far
+        self.offset = 0                       # byte offset scanned so far
+        self.complete = False
+        self.start_ts: Optional[float] = None
+
+    def close(self):
+        self.f.close()
+
+    # --- incremental scanning ---
+    def _scan(self, stop, chunk_size: int = 1 << 20) -> None:
+        """Extend the index until `stop()` is true or the end of the file."""
+        if self.complete:
+            return
+        f = self.f
+        block_offsets, block_ts, commands = self.block_offsets, self.block_ts, self.commands
+        m1, m2 = IN_MARKERS
+        pending_ts_block = len(block_ts) < len(block_offsets)
+        while not stop():
+            # read a large chunk and walk its complete lines; `stop` is checked per chunk
+            f.seek(self.offset)
+            buf = f.read(chunk_size)
+            end = buf.rfind(b"\n")
+            if end < 0:
+                if len(buf) < chunk_size:
+                    self.complete = True  # only a partial line (or nothing) left
+                    break
+                chunk_size *= 2  # a single line longer than the chunk
+                continue
+            lines, offset = self.lines, self.offset
+            for raw in buf[:end].split(b"\n"):
+                if pending_ts_block or self.start_ts is None:
+                    ts = _decode(raw).get("ts")
+                    if isinstance(ts, (int, float)):
+                        if self.start_ts is None:
+                            self.start_ts = ts
+                        if pending_ts_block:
+                            block_ts.append(ts)
+                            pending_ts_block = False
+                if m1 in raw or m2 in raw:
+                    commands.append(lines)
+                lines += 1
+                offset += len(raw) + 1
+                if lines % STRIDE == 0:
+                    if pending_ts_block:  # block without timestamps: carry the last one forward
+                        block_ts.append(block_ts[-1] if block_ts else 0.0)
+                    block_offsets.append(offset)
+                    pending_ts_block = True
+            self.lines, self.offset = lines, offset
+            if len(buf) < chunk_size and end == len(buf) - 1:
+                self.complete = True
+                break
+        # a trailing block with no timestamps keeps the last known one, so bisect stays valid
+        while self.complete and len(block_ts) < len(block_offsets):
+            block_ts.append(block_ts[-1] if block_ts else 0.0)
+
+    def ensure_lines(self, n: int):
+        self._scan(lambda: self.lines >= n)
+
+    def ensure_all(self):
+        self._scan(lambda: False)
+
+    # --- reading ---
+    def read(self, start: int, count: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """Decode `count` events starting at line `start`."""
+        self.ensure_lines(start + count)
+        start = max(0, min(start, self.lines))
+        block = start // STRIDE
+        self.f.seek(self.block_offsets[block])
+        line = block * STRIDE
+        out = []
+        while line < start + count and line < self.lines:
+            raw = self.f.readline()
+            if line >= start:
+                out.append((line, _decode(raw)))
+            line += 1
+        return out
+
+    # --- navigation ---
+    def line_of_command(self, n: int) -> Optional[int]:
+        """Line number of the n-th command (1-based)."""
+        self._scan(lambda: len(self.commands) >= n)
+        return self.commands[n - 1] if 0 < n <= len(self.commands) else None
+
+    def command_number(self, line: int) -> int:
+        return bisect.bisect_right(self.commands, line)
+
+    def line_at_ts(self, target: float) -> int:
+        """First line whose ts is >= target."""
+        self._scan(lambda: bool(self.block_ts) and self.block_ts[-1] >= target)
+        block = max(0, bisect.bisect_left(self.block_ts, target) - 1)
+        for line, evt in self.read(block * STRIDE, STRIDE * 2):
+            ts = evt.get("ts")
+            if isinstance(ts, (int, float)) and ts >= target:
+                return line
+        return min(self.lines, (block + 2) * STRIDE)
+
+    def search(self, needle: str, start: int, backwards: bool = False) -> Optional[int]:
+        """Next line at or after `start` (or before, if backwards) whose data contains needle."""
+        needle_l = needle.lower()
+        # raw-bytes prefilter; skipped when JSON escaping could hide the needle,
+        # and for non-ASCII needles (bytes.lower() folds ASCII only, and
+        # json.dumps may write other characters as \uXXXX escapes)
+        quick = (needle_l.encode("ascii")
+                 if needle.isascii() and needle.isprintable() and not any(c in needle for c in '"\\')
+                 else b"")
+        if backwards:
+            line = start
+            while line > 0:
+                lo = max(0, line - STRIDE)
+                for ln, evt in reversed(self.read(lo, line - lo)):
+                    if needle_l in str(evt.get("data", "")).lower():
+                        return ln
+                line = lo
+            return None
+        line = start
+        while True:
+            self.ensure_lines(line + STRIDE)
+            if line >= self.lines:
+                return None
+            block = line // STRIDE
+            self.f.seek(self.block_offsets[block])
+            ln = block * STRIDE
+            while ln < min(self.lines, (block + 1) * STRIDE):
+                raw = self.f.readline()
+                # packed output lives in the blob store, not in the raw line
+                if ln >= line and (quick in raw.lower() or b'"blob"' in raw):
+                    if needle_l in str(_decode(raw).get("data", "")).lower():
+                        return ln
+                ln += 1
+            line = ln
+
+
+# --- rendering ---
+def _fmt_rel(ts, start):
+    if not isinstance(ts, (int, float)) or start is None:
+        return ""
+    rel = max(0.0, ts - start)
+    h, rem = divmod(rel, 3600)
+    m, s = divmod(rem, 60)
+    return f"+{int(h):02d}:{int(m):02d}:{s:06.3f}"
+
+
+def _render_page(index: EventIndex, top: int, rows: int, summary: bool, title: str,
+                 status: str, highlight: Optional[int] = None):
+    events = index.read(top, rows)
+    table = Table(show_header=True, header_style="bold magenta", expand=True, title=title)
+    table.add_column("#", justify="right", width=8, no_wrap=True)
+    table.add_column("Time", width=14, no_wrap=True)
+    table.add_column("Type", width=10, no_wrap=True)
+    table.add_column("Content", no_wrap=True, overflow="ellipsis", ratio=1)
+    for line, e in events:
+        kind = e.get("kind", "meta" if "meta" in e else "")
+        if summary and kind != "out":
+            continue
+        data = str(e.get("data", "")).strip().replace("\n", " ⏎ ")
+        style = "reverse" if line == highlight else ("bold green" if kind == "in" else None)
+        table.add_row(str(line), _fmt_rel(e.get("ts"), index.start_ts), kind, data, style=style)
+    console.clear()
+    console.print(table)
+    total = f"{index.lines}" if index.complete else f"{index.lines}+"
+    console.print(f"[dim]lines {top}-{top + len(events) - 1} of {total} | "
+                  f"cmd {index.command_number(top)} | {status}[/dim]")
+
+
+HELP = ("j/k: line  space/b: page  g/G: top/end  :N command  @HH:MM:SS time  "
+        "/text search  n/N next/prev  q quit")
+
+
+def _getch():
+    """Read one keypress (raw mode on POSIX terminals, line input otherwise)."""
+    if os.name != "nt" and sys.stdin.isatty():
+        import tty
+        import termios
+        fd = sys.stdin.fileno()
+        old = termios.tcgetattr(fd)
+        try:
+            tty.setcbreak(fd)
+            ch = sys.stdin.read(1)
+            if ch == "\x1b":  # arrow keys / page keys
+                seq = sys.stdin.read(2)
+                if seq[1:] in ("5", "6"):
+                    sys.stdin.read(1)
+                return {"[A": "k", "[B": "j", "[5": "b", "[6": " ", "[H": "g", "[F": "G"}.get(seq, "")
+            return ch
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, old)
+    line = sys.stdin.readline()
+    if not line:
+        return "q"
+    return line.rstrip("\n") or " "
+
+
+def _prompt(label):
+    return console.input(f"[bold]{label}[/bold]").strip()
+
+
+def _parse_time(text, start):
+    """Accept +HH:MM:SS[.fff] / HH:MM:SS / MM:SS offsets, or an absolute epoch timestamp."""
+    t = text.lstrip("+")
+    if ":" in t:
+        secs = 0.0
+        for part in t.split(":"):
+            secs = secs * 60 + float(part)
+        return (start or 0.0) + secs
+    return float(t)
+
+
+def run_pager(path: str, title: str = "", summary: bool = False, start_line: int = 0):
+    index = EventIndex(path)
+    rows = max(5, console.size.height - 7)
+    top = start_line
+    highlight = None
+    last_search = None
+    status = HELP
+    try:
+        while True:
+            _render_page(index, top, rows, summary, title, status, highlight)
+            status = HELP
+            key = _getch()
+            if key in ("q", "Q"):
+                break
+            elif key in ("j", "\r", "\n"):
+                top += 1
+            elif key == "k":
+                top -= 1
+            elif key in (" ", "f"):
+                top += rows
+            elif key == "b":
+                top -= rows
+            elif key == "g":
+                top = 0
+            elif key == "G":
+                index.ensure_all()
+                top = index.lines - rows
+            elif key.startswith(":"):
+                arg = key[1:] or _prompt("command #: ")
+                try:
+                    line = index.line_of_command(int(arg))
+                except ValueError:
+                    line = None
+                if line is None:
+                    status = f"no command {arg}"
+                else:
+                    top, highlight = line, line
+            elif key.startswith("@"):
+                arg = key[1:] or _prompt("time (+HH:MM:SS or epoch): ")
+                try:
+                    index.ensure_lines(1)
+                    top = highlight = index.line_at_ts(_parse_time(arg, index.start_ts))
+                except ValueError:
+                    status = f"bad time: {arg}"
+            elif key.startswith("/"):
+                last_search = key[1:] or _prompt("search: ")
+                key = "n"
+            if key in ("n", "N") and last_search:
+                found = index.search(last_search, (highlight + 1) if (key == "n" and highlight is not None) else
+                                     (highlight if highlight is not None else top),
+                                     backwards=(key == "N"))
+                if found is None:
+                    status = f"'{last_search}' not found"
+                else:
+                    top, highlight = max(0, found - rows // 3), found
+            index.ensure_lines(top + rows)
+            if index.complete:
+                top = min(top, max(0, index.lines - rows))
+            top = max(0, top)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        index.close()
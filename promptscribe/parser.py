@@ -1,52 +1,112 @@
 # promptscribe/parser.py
 import json
-import os
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, Iterator, List
+from promptscribe import blobstore, instrument, logio
 
 
-def load_jsonl(path: str) -> List[Dict[str, Any]]:
-    """Load all JSONL lines safely."""
-    if not os.path.exists(path):
+def iter_events(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield JSONL events one at a time, skipping blank or corrupted lines."""
+    if not logio.exists(path):
         raise FileNotFoundError(f"Missing log file: {path}")
-    events = []
-    with open(path, "r", encoding="utf-8") as f:
+    with logio.open_text(path) as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
             try:
-                events.append(json.loads(line))
+                evt = json.loads(line)
             except json.JSONDecodeError:
                 # Skip corrupted or partial lines gracefully
                 continue
-    return events
+            if isinstance(evt, dict) and "blob" in evt:
+                yield from blobstore.expand(evt)
+            else:
+                yield evt
 
 
-def parse_session(path: str) -> Dict[str, Any]:
-    """Parse a session JSONL file into structured form."""
-    events = load_jsonl(path)
+class LogCursor:
+    """
+    Incremental reader over a JSONL log.
+    Yields events from complete lines starting at byte `offset` and keeps
+    `offset` pointing just past the last complete line consumed, so a later
+    cursor can resume there. A trailing line without a newline (a recording
+    still in progress) is left for the next read. Blob references are
+    expanded; their events after the first are marked "_cont".
+    """
+
+    def __init__(self, path: str, offset: int = 0, hasher=None):
+        self.path = path
+        self.offset = offset
+        self.hasher = hasher  # optional hashlib object fed every consumed line
 
-    commands = []
-    current_cmd = {"input": "", "output": ""}
+    def events(self) -> Iterator[Dict[str, Any]]:
+        if not logio.exists(self.path):
+            raise FileNotFoundError(f"Missing log file: {self.path}")
+        with logio.open_log(self.path) as f:
+            f.seek(self.offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                self.offset += len(raw)
+                if self.hasher is not None:
+                    self.hasher.update(raw)
+                raw = raw.strip()
+                if not raw:
+                    continue
+                try:
+                    evt = json.loads(raw)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if isinstance(evt, dict) and "blob" in evt:
+                    yield from blobstore.expand(evt)
+                else:
+                    yield evt
+
+
+def load_jsonl(path: str) -> List[Dict[str, Any]]:
+    """Load all JSONL lines safely."""
+    return list(iter_events(path))
+
+
+def iter_commands(events: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, str]]:
+    """Group a stream of events into {"input", "output"} commands as they arrive."""
+    cur_input = ""
+    cur_output: List[str] = []
 
     for evt in events:
         kind = evt.get("kind")
         data = evt.get("data", "")
         if kind == "out":
             # Accumulate output until a new input appears
-            current_cmd["output"] += data
+            cur_output.append(data)
         elif kind == "in":
-            # Save the previous command if any content exists
-            if current_cmd["input"] or current_cmd["output"]:
-                commands.append(current_cmd)
-            current_cmd = {"input": data, "output": ""}
+            # Emit the previous command if any content exists
+            if cur_input or cur_output:
+                yield {"input": cur_input, "output": "".join(cur_output)}
+            cur_input, cur_output = data, []
+
+    # Emit the last command if exists
+    if cur_input or cur_output:
+        yield {"input": cur_input, "output": "".join(cur_output)}
+
+
+def parse_session(path: str) -> Dict[str, Any]:
+    """Parse a session JSONL file into structured form."""
+    counter = {"events": 0}
+
+    def counted():
+        for evt in iter_events(path):
+            counter["events"] += 1
+            yield evt
 
-    # Add the last command if exists
-    if current_cmd["input"] or current_cmd["output"]:
-        commands.append(current_cmd)
+    with instrument.span("parser.parse_session"):
+        commands = list(iter_commands(counted()))
+    if instrument.ENABLED:
+        instrument.add("parser.bytes_read", logio.log_size(path))
+        instrument.add("parser.events_decoded", counter["events"])
 
     summary = {
-        "total_events": len(events),
+        "total_events": counter["events"],
         "total_commands": len(commands),
         "log_path": path,
     }
@@ -1,7 +1,7 @@
 # promptscribe/preprocess.py
 import os
 from typing import Dict, Any
-from promptscribe import parser
+from promptscribe import logio, parser
 
 
 def compute_basic_stats(parsed: Dict[str, Any]) -> Dict[str, Any]:
@@ -28,7 +28,7 @@ def preprocess_session(session_path: str, update_db: bool = False) -> Dict[str,
     Parse + summarize a single session log.
     Optionally update metadata in DB.
     """
-    if not os.path.exists(session_path):
+    if not logio.exists(session_path):
         raise FileNotFoundError(f"Missing session log: {session_path}")
 
     parsed = parser.parse_session(session_path)
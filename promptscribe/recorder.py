@@ -6,13 +6,21 @@ import subprocess
 import platform
 import signal
 import re
+import codecs
 import termios
+from promptscribe import logio
 
 ANSI_ESCAPE_RE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
 STOP_CMD = "stoprec"
 KILL_CMD = ":kill"
 
 current_proc = None  # global active subprocess reference
+METRICS = None  # metrics.RecorderMetrics of the active recording, if any
+LIMITS = None   # output budgets of the active recording (see _load_limits); None = unlimited
+SESSION_USAGE = {"bytes": 0, "events": 0}
+READ_CHUNK = 1 << 16
+READ_LIMIT = 1 << 20  # longer lines are recorded as several events so one line can't exhaust memory
+EVENT_OVERHEAD = 48   # approximate JSON framing per event, counted against byte budgets
 
 
 # -------------------------
@@ -31,8 +39,16 @@ def _clean_output(data: str) -> str:
 def _write_event(fh, kind, data):
     clean_data = _strip_ansi(data)
     evt = {"ts": round(time.time(), 6), "kind": kind, "data": clean_data}
-    fh.write(json.dumps(evt, ensure_ascii=False) + "\n")
+    line = json.dumps(evt, ensure_ascii=False) + "\n"
+    m = METRICS
+    if m is None:
+        fh.write(line)
+        fh.flush()
+        return
+    t0 = time.perf_counter()
+    fh.write(line)
     fh.flush()
+    m.record_event(kind, len(line) if line.isascii() else len(line.encode("utf-8")), time.perf_counter() - t0)
 
 
 def _ensure_path(outpath):
@@ -43,37 +59,225 @@ def _ensure_path(outpath):
             "platform": platform.system(),
             "start_time": time.time(),
         }
-        with open(outpath, "w", encoding="utf-8") as fh:
+        with logio.open_writer(outpath) as fh:
             fh.write(json.dumps({"meta": meta}) + "\n")
 
 
+# -------------------------
+# Output Budgets
+# -------------------------
+def _load_limits():
+    """Budgets from the `recorder` config section, or None when nothing is limited."""
+    from promptscribe.config import CONFIG
+    cfg = CONFIG.get("recorder") or {}
+    limits = {k: int(cfg.get(k) or 0) for k in (
+        "command_max_bytes", "command_max_events", "session_max_bytes", "session_max_events", "tail_bytes")}
+    limits["sample_rate"] = float(cfg.get("sample_rate") or 0)
+    if not any(v for k, v in limits.items() if k != "tail_bytes"):
+        return None
+    return limits
+
+
+def _remaining(command_cap, session_cap, used):
+    caps = []
+    if command_cap:
+        caps.append(command_cap)
+    if session_cap:
+        caps.append(max(0, session_cap - used))
+    return min(caps) if caps else None
+
+
+def _fmt_size(n):
+    return f"{n / (1 << 20):.1f} MB" if n >= 1 << 20 else f"{n / 1024:.1f} KB"
+
+
+class _OutputBudget:
+    """
+    Decides which output lines of one command are written to the log.
+    Lines are written until the command's or the session's byte/event budget
+    runs out (the head); after that only the last `tail_bytes` of output are
+    kept and written, after a drop-count event, when the command ends (the
+    tail also counts against the session budget). Past
+    the head, output is handled in blocks rather than lines, so a runaway
+    command costs little more than reading its pipe. With `sample_rate`,
+    head lines beyond that many per second are skipped.
+    """
+
+    def __init__(self, limits, usage):
+        self.usage = usage
+        self.bytes_left = _remaining(limits["command_max_bytes"], limits["session_max_bytes"], usage["bytes"])
+        self.events_left = _remaining(limits["command_max_events"], limits["session_max_events"], usage["events"])
+        self.session_max_bytes = limits["session_max_bytes"]
+        self.session_max_events = limits["session_max_events"]
+        self.tail_bytes = limits["tail_bytes"]
+        self.rate = limits["sample_rate"]
+        self.burst = max(1.0, self.rate)  # a fractional rate still lets one line through
+        self.tokens = self.burst
+        self.t_last = time.monotonic()
+        self.truncated = False
+        self.tail = ""
+        self.dropped_lines = self.dropped_bytes = 0
+        self.sampled_lines = self.sampled_bytes = 0
+
+    def _take_token(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.t_last) * self.rate)
+        self.t_last = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def _keep_tail(self, text):
+        text = self.tail + text
+        cut = len(text) - self.tail_bytes
+        if cut > 0:
+            # start the tail at a line boundary; a partial first line counts as dropped
+            nl = text.find("\n", cut - 1)
+            cut = len(text) if nl < 0 else nl + 1
+            self.dropped_lines += text.count("\n", 0, cut)
+            self.dropped_bytes += cut
+            text = text[cut:]
+        self.tail = text
+
+    def accept(self, lines):
+        """The subset of `lines` to write now; the rest is sampled out or kept for the tail."""
+        if self.truncated:
+            self._keep_tail("".join(lines))
+            return ()
+        out = []
+        for i, line in enumerate(lines):
+            n = len(line) + EVENT_OVERHEAD
+            if (self.bytes_left is not None and n > self.bytes_left) or self.events_left == 0:
+                self.truncated = True
+                self._keep_tail("".join(lines[i:]))
+                break
+            if self.rate and not self._take_token():
+                self.sampled_lines += 1
+                self.sampled_bytes += len(line)
+                continue
+            if self.bytes_left is not None:
+                self.bytes_left -= n
+            if self.events_left is not None:
+                self.events_left -= 1
+            self.usage["bytes"] += n
+            self.usage["events"] += 1
+            out.append(line)
+        return out
+
+    def finish(self, fh):
+        """Write the sampling/drop summary and the retained tail."""
+        # the tail counts against the session budget: once that is used up,
+        # later commands keep only their drop notice
+        tail = _split_lines(self.tail)
+        bytes_room = _remaining(0, self.session_max_bytes, self.usage["bytes"])
+        events_room = _remaining(0, self.session_max_events, self.usage["events"])
+        start = len(tail)
+        used = 0
+        while start:
+            n = len(tail[start - 1]) + EVENT_OVERHEAD
+            if (bytes_room is not None and used + n > bytes_room) or \
+                    (events_room is not None and len(tail) - start >= events_room):
+                break
+            used += n
+            start -= 1
+        if start:
+            self.dropped_lines += start
+            self.dropped_bytes += sum(len(line) for line in tail[:start])
+            tail = tail[start:]
+            self.tail = "".join(tail)
+        if self.sampled_lines:
+            _write_event(fh, "info", f"output_sampled:lines={self.sampled_lines},bytes={self.sampled_bytes},"
+                                     f"rate={self.rate:g}/s")
+        if self.dropped_bytes:
+            _write_event(fh, "info", f"output_dropped:lines={self.dropped_lines},bytes={self.dropped_bytes},"
+                                     f"tail_bytes={len(self.tail)}")
+            _write_event(fh, "out", f"[... {self.dropped_lines} lines ({_fmt_size(self.dropped_bytes)}) "
+                                    f"not recorded: output budget exceeded ...]\n")
+        for line in tail:
+            _write_event(fh, "out", line)
+        self.usage["bytes"] += len(self.tail) + EVENT_OVERHEAD * len(tail)
+        self.usage["events"] += len(tail)
+        if METRICS is not None:
+            METRICS.record_dropped(self.dropped_bytes + self.sampled_bytes)
+
+
 # -------------------------
 # Command Execution
 # -------------------------
+def _newlines(text):
+    # same translation text-mode pipes did: \r\n and a lone \r become \n
+    return text.replace("\r\n", "\n").replace("\r", "\n") if "\r" in text else text
+
+
+def _iter_output(stdout):
+    """
+    Output of a command as blocks of complete, cleaned lines, as it arrives.
+    Reads the pipe in large chunks; undecodable bytes are replaced instead of
+    aborting the loop (which would leave the child blocked on a full pipe).
+    A line longer than READ_LIMIT is split so it can't exhaust memory.
+    """
+    fd = stdout.fileno()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    while True:
+        chunk = os.read(fd, READ_CHUNK)
+        pending += decoder.decode(chunk, final=not chunk)
+        if not chunk:
+            if pending:
+                yield _clean_output(_newlines(pending))
+            return
+        # a trailing \r may be the first half of \r\n, so it waits for the next chunk
+        cut = max(pending.rfind("\n"), pending.rfind("\r", 0, len(pending) - 1)) + 1
+        if not cut:
+            if len(pending) < READ_LIMIT:
+                continue
+            cut = len(pending)
+        block, pending = pending[:cut], pending[cut:]
+        yield _clean_output(_newlines(block))
+
+
+def _split_lines(text):
+    """Lines of `text` with their newlines (only \\n separates lines)."""
+    parts = text.split("\n")
+    lines = [p + "\n" for p in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    return lines
+
+
 def _run_command(command, fh):
     """Run a single command in its own process group for clean signal control."""
     global current_proc
+    if METRICS is not None:
+        METRICS.start_command()
     current_proc = subprocess.Popen(
         command,
         shell=True,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        text=True,
         preexec_fn=os.setsid,  # new process group
-        bufsize=1,
+        bufsize=0,
     )
+    budget = _OutputBudget(LIMITS, SESSION_USAGE) if LIMITS else None
 
     try:
-        for line in iter(current_proc.stdout.readline, ""):
-            cleaned = _clean_output(line)
-            sys.stdout.write(cleaned)
+        for block in _iter_output(current_proc.stdout):
+            sys.stdout.write(block)
             sys.stdout.flush()
-            _write_event(fh, "out", cleaned)
+            lines = _split_lines(block)
+            for line in (lines if budget is None else budget.accept(lines)):
+                _write_event(fh, "out", line)
     except Exception as e:
         _write_event(fh, "error", f"cmd_output_error:{repr(e)}")
     finally:
         current_proc.wait()
+        current_proc.stdout.close()
         current_proc = None
+        if budget is not None:
+            budget.finish(fh)
+        if METRICS is not None:
+            METRICS.finish_command()
 
 
 def _kill_current(fh):
@@ -122,7 +326,7 @@ def record_unix(outpath):
 
     print(f"Recording active. Type commands below ({STOP_CMD} to stop, {KILL_CMD} to interrupt current command).")
 
-    with open(outpath, "a", encoding="utf-8") as fh:
+    with logio.open_writer(outpath) as fh:
         _write_event(fh, "info", f"session_start:{shell_name}")
         while True:
             try:
@@ -161,7 +365,7 @@ def record_windows(outpath):
     shell = os.environ.get("COMSPEC", "cmd.exe")
     print(f"Recording active. Type commands below ({STOP_CMD} to stop, {KILL_CMD} to interrupt current command).")
 
-    with open(outpath, "a", encoding="utf-8") as fh:
+    with logio.open_writer(outpath) as fh:
         while True:
             sys.stdout.write("> ")
             sys.stdout.flush()
@@ -186,8 +390,17 @@ def record_windows(outpath):
 # -------------------------
 # Cross-platform Entrypoint
 # -------------------------
-def record(outpath):
-    if os.name == "nt":
-        record_windows(outpath)
-    else:
-        record_unix(outpath)
+def record(outpath, metrics=None):
+    """Record into `outpath`; `metrics` (a metrics.RecorderMetrics) is updated live if given."""
+    global METRICS, LIMITS
+    METRICS = metrics
+    LIMITS = _load_limits()
+    SESSION_USAGE.update(bytes=0, events=0)
+    try:
+        if os.name == "nt":
+            record_windows(outpath)
+        else:
+            record_unix(outpath)
+    finally:
+        METRICS = None
+        LIMITS = None
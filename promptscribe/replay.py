@@ -0,0 +1,283 @@
+# promptscribe/replay.py
+"""
+Timed playback of a recorded session.
+
+Events are scheduled against one absolute clock (start + offset / speed), so
+sleep jitter never accumulates over long sessions. Seeking uses periodic
+keyframes of the emulated screen (byte offset, event index, session time,
+visible lines) that are cached next to the analysis data; jumping to any time
+replays only the events since the nearest keyframe.
+"""
+import os
+import re
+import sys
+import time
+import bisect
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+from promptscribe import logio, parser
+from promptscribe.config import CONFIG
+from promptscribe.utils import safe_write_json
+
+KEYFRAME_SECONDS = 30.0    # session time between keyframes ...
+KEYFRAME_EVENTS = 2000     # ... or this many events, whichever comes first
+SCREEN_ROWS = 100          # lines kept per keyframe (a full terminal screen)
+CACHE_VERSION = 1
+MAX_PENDING = 64 * 1024    # chars of late output written at once while catching up
+
+_TOKENS = re.compile(r"(\x1b\[[0-9;?]*[ -/]*[@-~]|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)?|\x1b.|[\r\n\b])")
+
+
+def _cache_dir():
+    return os.path.join(CONFIG["paths"]["analysis"], "keyframes")
+
+
+def _event_text(evt: Dict[str, Any]) -> str:
+    """What an event put on the terminal (same rendering as cast exports)."""
+    kind = evt.get("kind")
+    if kind == "in":
+        return "".join(f"$ {ln}\r\n" for ln in str(evt.get("data", "")).splitlines())
+    if kind == "out":
+        return str(evt.get("data", "")).replace("\r\n", "\n").replace("\n", "\r\n")
+    return ""
+
+
+class _Screen:
+    """
+    Approximate screen model: the last `rows` lines of text plus the cursor
+    column. Handles CR/LF/BS, erase-line and clear-screen; other escape
+    sequences are dropped. Enough to repaint a seek point faithfully for
+    shell-style output.
+    """
+
+    def __init__(self, rows=SCREEN_ROWS, lines=None, col=None):
+        self.rows = rows
+        self.lines: List[str] = list(lines) if lines else [""]
+        self.col = len(self.lines[-1]) if col is None else col
+
+    def feed(self, text: str):
+        lines = self.lines
+        for tok in _TOKENS.split(text):
+            if not tok:
+                continue
+            if tok == "\n":
+                lines.append("")
+                self.col = 0
+                if len(lines) > self.rows:
+                    del lines[:len(lines) - self.rows]
+            elif tok == "\r":
+                self.col = 0
+            elif tok == "\b":
+                self.col = max(0, self.col - 1)
+            elif tok[0] == "\x1b":
+                if tok.endswith("J") and tok[2:-1] in ("2", "3"):
+                    lines[:] = [""]
+                    self.col = 0
+                elif tok.endswith("K") and tok[2:-1] in ("", "0"):
+                    lines[-1] = lines[-1][:self.col]
+            else:
+                cur = lines[-1]
+                if self.col >= len(cur):
+                    cur = cur + " " * (self.col - len(cur)) + tok
+                else:
+                    cur = cur[:self.col] + tok + cur[self.col + len(tok):]
+                lines[-1] = cur
+                self.col += len(tok)
+
+    def paint(self, out, height: int):
+        """Clear the terminal and draw the last `height` lines, cursor in place."""
+        visible = self.lines[-height:]
+        out.write("\x1b[2J\x1b[H" + "\r\n".join(visible))
+        out.write("\r" + (f"\x1b[{self.col}C" if self.col else ""))
+
+
+class KeyframeIndex:
+    """Screen keyframes for one log, built lazily and persisted between runs."""
+
+    def __init__(self, path: str, use_cache: bool = True):
+        self.path = path
+        self.cache_path = os.path.join(
+            _cache_dir(), hashlib.blake2b(os.path.abspath(path).encode(), digest_size=16).hexdigest() + ".json")
+        self.keyframes: List[Dict[str, Any]] = []
+        self.times: List[float] = []
+        self.start_ts: Optional[float] = None
+        self.scanned = 0          # byte offset the keyframes are known up to
+        self.complete = False
+        self.dirty = False
+        if use_cache:
+            self._load()
+        if not self.keyframes:
+            self._add(0, 0, 0.0, _Screen())
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            size = logio.log_size(self.path)
+        except (OSError, ValueError):
+            return
+        # logs are append-only: keyframes stay valid while the file has not shrunk
+        if data.get("version") != CACHE_VERSION or data.get("path") != os.path.abspath(self.path) \
+                or size < data.get("scanned", 0):
+            return
+        self.keyframes = data["keyframes"]
+        self.times = [kf["t"] for kf in self.keyframes]
+        self.start_ts = data.get("start_ts")
+        self.scanned = data.get("scanned", 0)
+        self.complete = data.get("complete", False) and size == self.scanned
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(_cache_dir(), exist_ok=True)
+        safe_write_json(self.cache_path, {
+            "version": CACHE_VERSION, "path": os.path.abspath(self.path), "start_ts": self.start_ts,
+            "scanned": self.scanned, "complete": self.complete, "keyframes": self.keyframes,
+        })
+        self.dirty = False
+
+    def _add(self, offset, index, t, screen):
+        self.keyframes.append({"offset": offset, "index": index, "t": t,
+                               "lines": list(screen.lines), "col": screen.col})
+        self.times.append(t)
+        self.dirty = True
+
+    def _start_ts_of(self, evt):
+        if self.start_ts is None:
+            if "meta" in evt:
+                st = (evt.get("meta") or {}).get("start_time")
+                if isinstance(st, (int, float)):
+                    self.start_ts = float(st)
+            elif isinstance(evt.get("ts"), (int, float)):
+                self.start_ts = float(evt["ts"])
+        return self.start_ts
+
+    def _rel(self, evt, last):
+        ts = evt.get("ts")
+        if not isinstance(ts, (int, float)) or self.start_ts is None:
+            return last
+        return max(last, ts - self.start_ts)
+
+    def _extend(self, target: float):
+        """Scan past the last keyframe, adding keyframes, until `target` is covered."""
+        kf = self.keyframes[-1]
+        screen = _Screen(lines=kf["lines"], col=kf["col"])
+        cursor = parser.LogCursor(self.path, kf["offset"])
+        index, t, since = kf["index"], kf["t"], 0
+        offset, t_before = kf["offset"], kf["t"]
+        for evt in cursor.events():
+            self._start_ts_of(evt)
+            t = self._rel(evt, t)
+            due = t - self.times[-1] >= KEYFRAME_SECONDS or since >= KEYFRAME_EVENTS
+            # events expanded from one blob line share its offset: only its first can start a keyframe
+            if due and offset > self.keyframes[-1]["offset"] and not evt.get("_cont"):
+                # keyframe = state *before* this event, so playback can start on it
+                self._add(offset, index, t_before, screen)
+                since = 0
+                if self.times[-1] > target:
+                    self.scanned = max(self.scanned, offset)
+                    return
+            screen.feed(_event_text(evt))
+            index += 1
+            since += 1
+            offset = cursor.offset
+            t_before = t
+        self.scanned = max(self.scanned, offset)
+        self.complete = True
+        self.dirty = True
+
+    def seek(self, target: float):
+        """
+        Screen state, byte offset, event index and session time of the first
+        event at or after `target` seconds into the session.
+        """
+        if not self.complete and self.times[-1] <= target:
+            self._extend(target)
+        kf = self.keyframes[max(0, bisect.bisect_right(self.times, target) - 1)]
+        screen = _Screen(lines=kf["lines"], col=kf["col"])
+        cursor = parser.LogCursor(self.path, kf["offset"])
+        index, t, offset = kf["index"], kf["t"], kf["offset"]
+        for evt in cursor.events():
+            self._start_ts_of(evt)
+            t_evt = self._rel(evt, t)
+            if t_evt >= target and "meta" not in evt and not evt.get("_cont"):
+                break
+            screen.feed(_event_text(evt))
+            index += 1
+            t = t_evt
+            offset = cursor.offset
+        return screen, offset, index, t
+
+
+def parse_speed(spec) -> float:
+    """"4x", "0.5x" or a bare number."""
+    text = str(spec).strip().lower().rstrip("x")
+    try:
+        speed = float(text)
+    except ValueError:
+        raise ValueError(f"Unrecognized speed '{spec}' (use e.g. 2x or 0.5x)") from None
+    if speed <= 0:
+        raise ValueError("Speed must be positive")
+    return speed
+
+
+def play(path: str, speed: float = 1.0, max_idle: Optional[float] = None, start: float = 0.0,
+         out=None, height: Optional[int] = None, use_cache: bool = True):
+    """
+    Play `path` to `out` (default stdout) in real time divided by `speed`,
+    with gaps capped at `max_idle` seconds, starting `start` seconds in.
+    Returns the number of events played.
+    """
+    out = out or sys.stdout
+    if height is None:
+        try:
+            height = os.get_terminal_size().lines
+        except OSError:
+            height = 24
+    index = KeyframeIndex(path, use_cache=use_cache)
+    played = 0
+    try:
+        if start > 0:
+            screen, offset, _, prev = index.seek(start)
+            screen.paint(out, height)
+            prev = max(prev, start)
+        else:
+            offset, prev = 0, 0.0
+        out.flush()
+
+        clock = 0.0                     # playback seconds after idle capping, before speed
+        t0 = time.perf_counter()
+        pending = []
+        pending_len = 0
+        for evt in parser.LogCursor(path, offset).events():
+            index._start_ts_of(evt)
+            text = _event_text(evt)
+            if not text:
+                continue
+            t = index._rel(evt, prev)
+            gap = t - prev
+            if max_idle is not None:
+                gap = min(gap, max_idle)
+            clock += gap
+            prev = t
+            # absolute deadline: lateness on one event never shifts the next ones
+            delay = t0 + clock / speed - time.perf_counter()
+            # events that are already late are batched, but never held back
+            # for long: a burst that outruns the terminal is written in slices
+            if pending and (delay > 0 or pending_len >= MAX_PENDING):
+                out.write("".join(pending))
+                out.flush()
+                pending = []
+                pending_len = 0
+            if delay > 0:
+                time.sleep(delay)
+            pending.append(text)
+            pending_len += len(text)
+            played += 1
+        if pending:
+            out.write("".join(pending))
+            out.flush()
+    finally:
+        index.save()
+    return played
@@ -3,9 +3,11 @@ import os
 import json
 import time
 import uuid
+import io
+import hashlib
 from datetime import datetime
 from typing import Optional
-from promptscribe import db
+from promptscribe import db, instrument, logio, parser
 
 
 EXPORT_DIR = None
@@ -22,42 +24,173 @@ def _ensure_export_dir():
     return EXPORT_DIR
 
 
-def _load_events(log_path):
-    """Read and parse all JSONL events from a log file."""
-    events = []
-    if not os.path.exists(log_path):
-        raise FileNotFoundError(log_path)
-    with open(log_path, "r", encoding="utf-8") as fh:
-        for ln in fh:
-            ln = ln.strip()
-            if not ln:
-                continue
-            try:
-                events.append(json.loads(ln))
-            except Exception:
-                continue
-    return events
+COMPRESSORS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+WRITE_BUFFER = 1024 * 1024
 
 
-def _build_raw_text(events):
-    """Reconstruct raw terminal transcript preserving input/output order and spacing."""
-    out_lines = []
-    buffer_out = []
+def _iter_raw_text(events, pad_empty=True):
+    """Yield the raw terminal transcript line by line, preserving input/output order and spacing."""
+    wrote = False
     for evt in events:
         kind = evt.get("kind")
         data = evt.get("data", "")
         if kind == "in":
-            if buffer_out:
-                out_lines.extend(buffer_out)
-                buffer_out = []
             for line in str(data).splitlines():
-                out_lines.append(f"$ {line}")
+                wrote = True
+                yield f"$ {line}\n"
         elif kind == "out":
             for line in str(data).splitlines():
-                buffer_out.append(line)
-    if buffer_out:
-        out_lines.extend(buffer_out)
-    return "\n".join(out_lines) + "\n"
+                wrote = True
+                yield line + "\n"
+    if not wrote and pad_empty:
+        yield "\n"
+
+
+class _CastRenderer:
+    """
+    Streams recorder events into asciinema v2 lines.
+    - `max_idle` caps gaps between events (seconds) for smoother playback.
+    - `coalesce` merges events closer than this many seconds into one frame.
+    Only the pending frame is buffered, so memory stays constant. The timing
+    state survives `state()`/`restore()` so a render can be resumed later.
+    """
+
+    def __init__(self, title="", width=120, height=40, max_idle=None, coalesce=0.0,
+                 max_coalesce_bytes=64 * 1024):
+        self.title = title
+        self.width = width
+        self.height = height
+        self.max_idle = max_idle
+        self.coalesce = coalesce
+        self.max_coalesce_bytes = max_coalesce_bytes
+        self.header_done = False
+        self.start = None
+        self.prev_ts = None
+        self.clock = 0.0  # playback time after idle capping
+
+    def state(self):
+        return {"header_done": self.header_done, "start": self.start,
+                "prev_ts": self.prev_ts, "clock": self.clock}
+
+    def restore(self, state):
+        for k, v in (state or {}).items():
+            setattr(self, k, v)
+        return self
+
+    def _header(self):
+        header = {"version": 2, "width": self.width, "height": self.height,
+                  "timestamp": int(self.start if self.start is not None else time.time()),
+                  "env": {"TERM": "xterm-256color"}}
+        if self.title:
+            header["title"] = self.title
+        self.header_done = True
+        return json.dumps(header, ensure_ascii=False) + "\n"
+
+    @staticmethod
+    def _frame(t, text):
+        return json.dumps([round(t, 6), "o", text], ensure_ascii=False) + "\n"
+
+    def render(self, events):
+        pending_t = None
+        pending = []
+        pending_len = 0
+        for evt in events:
+            if "meta" in evt:
+                meta = evt.get("meta") or {}
+                if self.start is None and meta.get("start_time"):
+                    self.start = self.prev_ts = float(meta["start_time"])
+                continue
+            kind = evt.get("kind")
+            if kind == "in":
+                text = "".join(f"$ {ln}\r\n" for ln in str(evt.get("data", "")).splitlines())
+            elif kind == "out":
+                text = str(evt.get("data", "")).replace("\r\n", "\n").replace("\n", "\r\n")
+            else:
+                continue
+            ts = evt.get("ts")
+            if ts is None:
+                ts = self.prev_ts if self.prev_ts is not None else 0.0
+            if self.start is None:
+                self.start = self.prev_ts = ts
+            if not self.header_done:
+                yield self._header()
+            gap = max(0.0, ts - self.prev_ts)
+            if self.max_idle is not None:
+                gap = min(gap, self.max_idle)
+            self.clock += gap
+            self.prev_ts = max(self.prev_ts, ts)
+            if not text:
+                continue
+            if pending and (self.clock - pending_t > self.coalesce or pending_len >= self.max_coalesce_bytes):
+                yield self._frame(pending_t, "".join(pending))
+                pending, pending_len = [], 0
+            if not pending:
+                pending_t = self.clock
+            pending.append(text)
+            pending_len += len(text)
+
+        if not self.header_done:
+            yield self._header()
+        if pending:
+            yield self._frame(pending_t, "".join(pending))
+
+
+def _open_export(path, compress="none", append=False):
+    """
+    Open a buffered text writer for an export, optionally compressing on the fly.
+    Appending to a compressed export adds a new gzip member / zstd frame, which
+    standard decompressors read as one continuous stream.
+    """
+    mode = "ab" if append else "wb"
+    if compress == "gzip":
+        import gzip
+        raw = gzip.open(path, mode, compresslevel=6)
+    elif compress == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd compression requires the 'zstandard' package (pip install zstandard)")
+        raw = zstandard.ZstdCompressor(level=3).stream_writer(open(path, mode), closefd=True)
+    elif compress in (None, "none"):
+        return open(path, "a" if append else "w", encoding="utf-8", buffering=WRITE_BUFFER)
+    else:
+        raise ValueError(f"Unknown compression: {compress}")
+    return io.TextIOWrapper(io.BufferedWriter(raw, WRITE_BUFFER), encoding="utf-8")
+
+
+def _meta_path_for(out_full):
+    base = out_full
+    for suffix in COMPRESSORS.values():
+        if suffix and base.endswith(suffix):
+            base = base[: -len(suffix)]
+    return os.path.splitext(base)[0] + ".meta.json"
+
+
+def _stored_description(log_path):
+    """Description recorded next to a session log, if any."""
+    try:
+        meta_file = os.path.splitext(log_path)[0] + ".meta.json"
+        if os.path.exists(meta_file):
+            with open(meta_file, "r", encoding="utf-8") as mf:
+                meta = json.load(mf)
+                return meta.get("user_description") or meta.get("description") or meta.get("name") or ""
+    except Exception:
+        pass
+    return ""
+
+
+def _safe_label(label):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in (label or "session"))
+
+
+def _export_header(session_id, label, description):
+    return (
+        "# PromptScribe Raw Terminal Log\n"
+        f"# Origin Session ID: {session_id}\n"
+        f"# Export Label: {label}\n"
+        f"# Description: {description}\n"
+        f"# Exported: {datetime.utcnow().isoformat()}Z\n\n"
+    )
 
 
 def export_raw(
@@ -65,22 +198,33 @@ def export_raw(
     name: Optional[str] = None,
     out_path: Optional[str] = None,
     override_desc: Optional[str] = None,
+    compress: str = "none",
+    fmt: str = "txt",
+    max_idle: Optional[float] = None,
+    coalesce: float = 0.0,
+    reuse: bool = True,
 ):
     """
     Export raw terminal transcript for a given session.
     - If session_id is None → exports the most recent session.
     - `name` → optional user label used in output filename.
     - `override_desc` → optional header description override.
+    - `compress` → "none", "gzip" or "zstd"; the transcript is compressed while streaming.
+    - `fmt` → "txt" transcript or "cast" asciinema v2 recording with timing
+      (`max_idle` caps pauses, `coalesce` merges events closer than N seconds).
+    - `reuse` → return the previous export of an unchanged source, or append the
+      new tail of a growing log onto it, instead of rendering from scratch.
     - Automatically creates .meta.json and inserts it into DB.
     - Returns absolute path to exported file.
     """
     # --- Fetch source session ---
     DB = db.SessionLocal()
     try:
-        if session_id:
-            entry = DB.query(db.SessionEntry).filter(db.SessionEntry.id == session_id).first()
-        else:
-            entry = DB.query(db.SessionEntry).order_by(db.SessionEntry.start_ts.desc()).first()
+        with instrument.span("db.lookup_session"):
+            if session_id:
+                entry = DB.query(db.SessionEntry).filter(db.SessionEntry.id == session_id).first()
+            else:
+                entry = DB.query(db.SessionEntry).order_by(db.SessionEntry.start_ts.desc()).first()
     finally:
         DB.close()
 
@@ -88,51 +232,74 @@ def export_raw(
         raise ValueError("No session found." if not session_id else f"No session with ID {session_id}")
 
     log_path = entry.file
-    events = _load_events(log_path)
-    raw_text = _build_raw_text(events)
+    if not logio.exists(log_path):
+        raise FileNotFoundError(log_path)
+    if fmt not in ("txt", "cast"):
+        raise ValueError(f"Unknown export format: {fmt}")
 
-    # --- Load metadata description if exists ---
-    stored_desc = ""
-    try:
-        meta_file = os.path.splitext(log_path)[0] + ".meta.json"
-        if os.path.exists(meta_file):
-            with open(meta_file, "r", encoding="utf-8") as mf:
-                meta = json.load(mf)
-                stored_desc = meta.get("user_description") or meta.get("description") or meta.get("name") or ""
-    except Exception:
-        pass
+    description = override_desc if override_desc is not None else _stored_description(log_path)
+    safe_label = _safe_label(name or entry.name)
+    header = _export_header(entry.id, safe_label, description)
 
-    description = override_desc if override_desc is not None else stored_desc
-    safe_label = name or entry.name or "session"
-    safe_label = "".join(c if c.isalnum() or c in "-_" else "_" for c in safe_label)
+    title = f"{safe_label} ({entry.id})" + (f" - {description}" if description else "")
+    options = {
+        "fmt": fmt, "compress": compress or "none", "max_idle": max_idle, "coalesce": coalesce,
+        "label": safe_label, "description": description,
+        "out": os.path.abspath(out_path) if out_path else None,
+    }
 
-    # --- Header for export file ---
-    header = (
-        "# PromptScribe Raw Terminal Log\n"
-        f"# Origin Session ID: {entry.id}\n"
-        f"# Export Label: {safe_label}\n"
-        f"# Description: {description}\n"
-        f"# Exported: {datetime.utcnow().isoformat()}Z\n\n"
-    )
+    def render(fh, events, state=None):
+        """Write rendered events; returns the renderer state to resume from."""
+        if fmt == "cast":
+            renderer = _CastRenderer(title=title, max_idle=max_idle, coalesce=coalesce).restore(state)
+            fh.writelines(renderer.render(events))
+            return renderer.state()
+        if state is None:
+            fh.write(header)
+        fh.writelines(_iter_raw_text(events, pad_empty=state is None))
+        return {}
+
+    # --- Reuse or extend a previous export of the same source and options ---
+    index = _ExportIndex(entry.id, log_path, options) if reuse else None
+    if index is not None:
+        with instrument.span("scraper.reuse_or_append"):
+            hit = index.reuse_or_append(render, compress)
+        if hit:
+            return hit
 
     # --- Prepare output path ---
     dest_dir = _ensure_export_dir()
-    if out_path:
+    previous = index.previous_file() if index is not None else None
+    if previous:
+        # source was rewritten: regenerate in place instead of piling up a new artifact
+        out_full = previous
+    elif out_path:
         out_full = os.path.abspath(out_path)
         os.makedirs(os.path.dirname(out_full), exist_ok=True)
     else:
         ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        out_full = os.path.join(dest_dir, f"{safe_label}__{entry.id}__{ts}.txt")
+        out_full = os.path.join(dest_dir, f"{safe_label}__{entry.id}__{ts}.{fmt}")
+    suffix = COMPRESSORS.get(compress or "none", "")
+    if suffix and not out_full.endswith(suffix):
+        out_full += suffix
 
-    # --- Write export file atomically ---
+    # --- Stream export file atomically (memory use independent of log size) ---
     tmp_path = out_full + ".tmp"
-    with open(tmp_path, "w", encoding="utf-8") as fh:
-        fh.write(header)
-        fh.write(raw_text)
-    os.replace(tmp_path, out_full)
+    src_stat = logio.log_stat(log_path)
+    cursor = parser.LogCursor(log_path, hasher=hashlib.sha256())
+    try:
+        with instrument.span("scraper.render"), _open_export(tmp_path, compress) as fh:
+            state = render(fh, cursor.events())
+        os.replace(tmp_path, out_full)
+        instrument.add("scraper.bytes_read", cursor.offset)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
     # --- Create new export metadata (unique ID) ---
-    export_session_id = f"EXP-{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    export_session_id = (index.previous_export_id() if index is not None else None) or \
+        f"EXP-{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:6]}"
     meta_data = {
         "session_id": export_session_id,
         "origin_session_id": entry.id,
@@ -144,7 +311,7 @@ def export_raw(
         "exported_at": datetime.utcnow().isoformat() + "Z",
     }
 
-    meta_path = os.path.splitext(out_full)[0] + ".meta.json"
+    meta_path = _meta_path_for(out_full)
     with open(meta_path, "w", encoding="utf-8") as mf:
         json.dump(meta_data, mf, indent=2)
 
@@ -154,4 +321,337 @@ def export_raw(
     except Exception as e:
         print(f"⚠️ Warning: failed to index export in DB ({e})")
 
+    if index is not None:
+        index.record(out_full, export_session_id, cursor, src_stat, state)
+
     return out_full
+
+
+# --- Export reuse keyed by source fingerprint ---
+ANCHOR_BYTES = 1024 * 1024
+
+
+def _window_sha(path, end, size=ANCHOR_BYTES):
+    """Digest of the `size` bytes ending at offset `end`."""
+    start = max(0, end - size)
+    h = hashlib.sha256()
+    with logio.open_log(path) as f:
+        f.seek(start)
+        h.update(f.read(end - start))
+    return h.hexdigest()
+
+
+class _ExportIndex:
+    """
+    Looks up previous exports of a source log in the `exports` table.
+    An unchanged source (same size and mtime) returns the stored artifact; a
+    source that only grew has the new tail rendered onto the end of it.
+    """
+
+    def __init__(self, origin_id, log_path, options):
+        self.origin_id = origin_id
+        self.log_path = os.path.abspath(log_path)
+        self.key = hashlib.sha256(
+            json.dumps({"src": self.log_path, "origin": origin_id, "opts": options}, sort_keys=True).encode()
+        ).hexdigest()
+        self.row = None
+        self.available = True
+        try:
+            db.ensure_schema()
+            DB = db.SessionLocal()
+            try:
+                self.row = DB.get(db.ExportEntry, self.key)
+            finally:
+                DB.close()
+        except Exception as e:
+            print(f"⚠️ Export reuse unavailable ({e})")
+            self.available = False
+        if self.row is not None and not (self.row.file and os.path.exists(self.row.file)):
+            self.row = None
+
+    def previous_file(self):
+        return self.row.file if self.row is not None else None
+
+    def previous_export_id(self):
+        return self.row.export_session_id if self.row is not None else None
+
+    def reuse_or_append(self, render, compress):
+        row = self.row
+        if row is None:
+            return None
+        if row.anchor_sha256 is None:
+            return None  # an earlier append never finished: regenerate
+        st = logio.log_stat(self.log_path)
+        if st.st_size == row.src_total and st.st_mtime_ns == row.src_mtime_ns:
+            return row.file
+        if st.st_size < row.src_size or _window_sha(self.log_path, row.src_size) != row.anchor_sha256:
+            return None  # rewritten rather than appended: regenerate
+        cursor = parser.LogCursor(self.log_path, offset=row.src_size, hasher=hashlib.sha256())
+        out_size = os.path.getsize(row.file)
+        # the export is extended in place; the row stays marked until the new
+        # state is committed, so a run killed in between cannot append twice
+        self._mark_dirty()
+        try:
+            with _open_export(row.file, compress, append=True) as fh:
+                state = render(fh, cursor.events(), state=json.loads(row.state or "{}"))
+        except BaseException:
+            try:
+                os.truncate(row.file, out_size)
+            except OSError:
+                pass
+            raise
+        chained = hashlib.sha256(f"{row.src_sha256}:{cursor.hasher.hexdigest()}".encode()).hexdigest()
+        self._update(cursor, st, state, chained)
+        return row.file
+
+    def record(self, out_file, export_id, cursor, st, state):
+        if not self.available:
+            return
+        self.row = db.ExportEntry(
+            key=self.key, origin_session_id=self.origin_id, export_session_id=export_id,
+            file=out_file, src_path=self.log_path,
+        )
+        self._update(cursor, st, state, cursor.hasher.hexdigest())
+
+    def _update(self, cursor, st, state, src_sha256):
+        row = self.row
+        row.src_size = cursor.offset
+        row.src_total = st.st_size
+        row.src_mtime_ns = st.st_mtime_ns
+        row.src_sha256 = src_sha256
+        row.anchor_sha256 = _window_sha(self.log_path, cursor.offset)
+        row.state = json.dumps(state)
+        row.updated_ts = time.time()
+        DB = db.SessionLocal()
+        try:
+            DB.merge(row)
+            DB.commit()
+        finally:
+            DB.close()
+
+    def _mark_dirty(self):
+        row = self.row
+        row.anchor_sha256 = None
+        DB = db.SessionLocal()
+        try:
+            DB.merge(row)
+            DB.commit()
+        finally:
+            DB.close()
+
+
+# --- Bulk export into a single archive ---
+ARCHIVE_INLINE_LIMIT = 64 * 1024 * 1024  # larger logs are rendered by the writer itself
+
+
+def _archive_kind(path):
+    p = path.lower()
+    if p.endswith(".zip"):
+        return "zip"
+    if p.endswith((".tar.zst", ".tzst")):
+        return "tar.zst"
+    if p.endswith((".tar.gz", ".tgz")):
+        return "tar.gz"
+    if p.endswith(".tar"):
+        return "tar"
+    raise ValueError(f"Unsupported archive type: {path} (use .tar, .tar.gz, .tar.zst or .zip)")
+
+
+def _select_sessions(session_ids=None, since=None):
+    """Recorded (non-export) sessions matching the given ids or start time, oldest first."""
+    DB = db.SessionLocal()
+    try:
+        q = DB.query(db.SessionEntry).filter(~db.SessionEntry.id.like("EXP-%"))
+        if session_ids:
+            q = q.filter(db.SessionEntry.id.in_(list(session_ids)))
+        if since is not None:
+            q = q.filter(db.SessionEntry.start_ts >= since)
+        return q.order_by(db.SessionEntry.start_ts.asc()).all()
+    finally:
+        DB.close()
+
+
+def _member_pieces(sid, label, log_path, opts):
+    """Text pieces of one archive member, rendered as a single-session export would be."""
+    description = opts.get("description")
+    if description is None:
+        description = _stored_description(log_path)
+    events = parser.iter_events(log_path)
+    if opts.get("fmt") == "cast":
+        title = f"{label} ({sid})" + (f" - {description}" if description else "")
+        renderer = _CastRenderer(title=title, max_idle=opts.get("max_idle"), coalesce=opts.get("coalesce", 0.0))
+        return renderer.render(events)
+    return _prepend(_export_header(sid, label, description), _iter_raw_text(events))
+
+
+def _render_member(job):
+    """Worker: render one session transcript into bytes (runs in a process pool)."""
+    sid, label, log_path, opts = job
+    buf = io.StringIO()
+    buf.writelines(_member_pieces(sid, label, log_path, opts))
+    return buf.getvalue().encode("utf-8")
+
+
+class _ArchiveWriter:
+    """Sequential writer over tar (plain/gz/zstd) or zip, fed one member at a time."""
+
+    def __init__(self, path, kind):
+        import tarfile
+        import zipfile
+        self.kind = kind
+        self._raw = None
+        if self.kind == "zip":
+            self.zf = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+            return
+        if self.kind == "tar.zst":
+            try:
+                import zstandard
+            except ImportError:
+                raise RuntimeError("zstd archives require the 'zstandard' package (pip install zstandard)")
+            self._raw = zstandard.ZstdCompressor(level=3, threads=-1).stream_writer(open(path, "wb"), closefd=True)
+            self.tf = tarfile.open(fileobj=self._raw, mode="w|")
+        elif self.kind == "tar.gz":
+            self.tf = tarfile.open(path, mode="w|gz")
+        else:
+            self.tf = tarfile.open(path, mode="w|")
+
+    def add_bytes(self, name, data, mtime=None):
+        if self.kind == "zip":
+            self.zf.writestr(name, data)
+            return
+        import tarfile
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(mtime or time.time())
+        info.mode = 0o644
+        self.tf.addfile(info, io.BytesIO(data))
+
+    def add_stream(self, name, chunks, mtime=None):
+        """Add a member from an iterable of text pieces without holding it all in memory."""
+        if self.kind == "zip":
+            with self.zf.open(name, "w", force_zip64=True) as zf_member:
+                with io.TextIOWrapper(zf_member, encoding="utf-8") as out:
+                    out.writelines(chunks)
+            return
+        # tar needs the size up front: spool to memory, spilling to disk only when large
+        import tarfile
+        import tempfile
+        with tempfile.SpooledTemporaryFile(max_size=ARCHIVE_INLINE_LIMIT) as spool:
+            text = io.TextIOWrapper(spool, encoding="utf-8")
+            text.writelines(chunks)
+            text.flush()
+            size = spool.tell()
+            spool.seek(0)
+            info = tarfile.TarInfo(name)
+            info.size = size
+            info.mtime = int(mtime or time.time())
+            info.mode = 0o644
+            self.tf.addfile(info, spool)
+            text.detach()
+
+    def close(self):
+        if self.kind == "zip":
+            self.zf.close()
+            return
+        self.tf.close()
+        if self._raw is not None:
+            self._raw.close()
+
+
+def export_archive(archive_path, session_ids=None, since=None, workers=None, fmt="txt",
+                   override_desc=None, max_idle=None, coalesce=0.0):
+    """
+    Export many sessions into one archive (.tar, .tar.gz, .tar.zst or .zip).
+    Members are txt transcripts or .cast recordings (`fmt`), with the same
+    `override_desc`, `max_idle` and `coalesce` options as export_raw.
+    Transcripts are rendered in a process pool and streamed into the archive in
+    session order; a single MANIFEST.json (also written next to the archive)
+    replaces the per-export meta files. No DB rows are added: members are not
+    session logs that `view` could open.
+    Returns (archive_path, manifest).
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    entries = [e for e in _select_sessions(session_ids, since) if logio.exists(e.file)]
+    if not entries:
+        raise ValueError("No sessions matched for export.")
+    if fmt not in ("txt", "cast"):
+        raise ValueError(f"Unknown export format: {fmt}")
+    opts = {"fmt": fmt, "description": override_desc, "max_idle": max_idle, "coalesce": coalesce}
+
+    archive_full = os.path.abspath(archive_path)
+    os.makedirs(os.path.dirname(archive_full), exist_ok=True)
+    kind = _archive_kind(archive_full)  # validate before doing any work
+    exported_at = datetime.utcnow().isoformat() + "Z"
+    workers = workers or os.cpu_count() or 1
+    window = workers * 2  # rendered members held in memory at most
+
+    jobs = []
+    for e in entries:
+        label = _safe_label(e.name)
+        jobs.append((e, label, f"{label}__{e.id}.{fmt}"))
+
+    manifest = {"exported_at": exported_at, "archive": archive_full, "sessions": []}
+    tmp_path = archive_full + ".tmp"
+    writer = _ArchiveWriter(tmp_path, kind)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            next_submit = 0
+
+            def _fill():
+                nonlocal next_submit
+                while next_submit < len(jobs) and len(futures) < window:
+                    e, label, _ = jobs[next_submit]
+                    if logio.log_size(e.file) <= ARCHIVE_INLINE_LIMIT:
+                        futures[next_submit] = pool.submit(_render_member, (e.id, label, e.file, opts))
+                    next_submit += 1
+
+            for i, (e, label, member) in enumerate(jobs):
+                _fill()
+                fut = futures.pop(i, None)
+                if fut is not None:
+                    data = fut.result()
+                    writer.add_bytes(member, data, mtime=e.start_ts)
+                    size = len(data)
+                else:
+                    writer.add_stream(member, _member_pieces(e.id, label, e.file, opts), mtime=e.start_ts)
+                    size = None
+                manifest["sessions"].append({
+                    "origin_session_id": e.id,
+                    "name": label,
+                    "member": member,
+                    "bytes": size,
+                    "source": e.file,
+                    "start_ts": e.start_ts,
+                    "end_ts": e.end_ts,
+                })
+                print(f"\rArchived {i + 1}/{len(jobs)} sessions", end="", flush=True)
+        print()
+        writer.add_bytes("MANIFEST.json", json.dumps(manifest, indent=2).encode("utf-8"))
+        writer.close()
+        os.replace(tmp_path, archive_full)
+    except BaseException:
+        try:
+            writer.close()
+        except Exception:
+            pass
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    base = archive_full
+    for ext in (".tar.zst", ".tzst", ".tar.gz", ".tgz", ".tar", ".zip"):
+        if base.lower().endswith(ext):
+            base = base[: -len(ext)]
+            break
+    manifest_path = base + ".manifest.json"
+    with open(manifest_path, "w", encoding="utf-8") as mf:
+        json.dump(manifest, mf, indent=2)
+
+    return archive_full, manifest
+
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
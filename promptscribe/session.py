@@ -4,7 +4,7 @@ import time
 import uuid
 from promptscribe.config import CONFIG
 from promptscribe.utils import safe_write_json
-from promptscribe import recorder, db
+from promptscribe import recorder, db, metrics, layout
 
 LOG_DIR = CONFIG["paths"]["logs"]
 META_DIR = CONFIG["paths"]["metadata"]
@@ -13,14 +13,16 @@ os.makedirs(LOG_DIR, exist_ok=True)
 os.makedirs(META_DIR, exist_ok=True)
 
 def _make_paths(name=None):
-    ts = time.strftime("%Y%m%d_%H%M%SZ", time.gmtime())
+    now = time.time()
+    ts = time.strftime("%Y%m%d_%H%M%SZ", time.gmtime(now))
     sid = f"S-{ts}-{uuid.uuid4().hex[:6]}"
     safe_name = None
     if name:
         safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)[:64]
     fname = f"{sid}{('__' + safe_name) if safe_name else ''}.jsonl"
     meta_name = f"{sid}.meta.json"
-    return sid, os.path.join(LOG_DIR, fname), os.path.join(META_DIR, meta_name)
+    return sid, os.path.join(layout.session_dir("logs", now), fname), \
+        os.path.join(layout.session_dir("metadata", now), meta_name)
 
 def start(name=None, user_description=None, register_db=True):
     sid, outpath, metapath = _make_paths(name)
@@ -34,11 +36,24 @@ def start(name=None, user_description=None, register_db=True):
     safe_write_json(metapath, meta)
     print(f"Starting session {sid}")
     print(f"Log file: {outpath}")
-    # run recorder (blocking) until shell exit
-    recorder.record(outpath)
+    # run recorder (blocking) until shell exit, publishing live metrics meanwhile
+    live, reporter = metrics.start_reporter(sid, name, outpath)
+    try:
+        recorder.record(outpath, metrics=live)
+    finally:
+        if reporter:
+            reporter.stop()
     # finalize metadata
     meta["end_ts"] = time.time()
     safe_write_json(metapath, meta)
+    if (CONFIG.get("blobstore") or {}).get("enabled"):
+        try:
+            from promptscribe import blobstore
+            stats = blobstore.pack_log(outpath)
+            if stats["runs"]:
+                print(f"Packed {stats['runs']} output run(s): {stats['bytes_before']} -> {stats['bytes_after']} bytes")
+        except Exception as e:
+            print("Failed to pack session output:", e)
     print(f"Session finished. Metadata: {metapath}")
     # register in DB if requested
     if register_db:
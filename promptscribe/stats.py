@@ -7,6 +7,7 @@ from typing import Dict, Any, Optional
 from rich.console import Console
 from rich.table import Table
 from promptscribe import db
+from promptscribe import instrument
 from promptscribe import parser
 
 console = Console()
@@ -15,8 +16,10 @@ console = Console()
 def _get_all_sessions(limit: int = 1000):
     s = db.SessionLocal()
     try:
-        q = s.query(db.SessionEntry).order_by(db.SessionEntry.start_ts.desc()).limit(limit)
-        return q.all()
+        with instrument.span("db.fetch_sessions"):
+            rows = s.query(db.SessionEntry).order_by(db.SessionEntry.start_ts.desc()).limit(limit).all()
+        instrument.add("db.rows_fetched", len(rows))
+        return rows
     finally:
         s.close()
 
@@ -30,6 +33,11 @@ def session_command_count(session_entry) -> int:
 
 
 def aggregate_stats(limit: int = 500) -> Dict[str, Any]:
+    with instrument.span("stats.aggregate"):
+        return _aggregate(limit)
+
+
+def _aggregate(limit):
     sessions = _get_all_sessions(limit=limit)
     total_sessions = len(sessions)
     counts = []
@@ -89,6 +97,17 @@ def export_csv(stats: Dict[str, Any], path: Optional[str] = None) -> str:
 
 def show_stats(limit: int = 200, top: int = 10, csv_out: bool = False, csv_path: Optional[str] = None):
     stats = aggregate_stats(limit=limit)
+    with instrument.span("stats.render"):
+        _render_stats(stats, limit, top)
+
+    # CSV export (optional)
+    if csv_out:
+        with instrument.span("stats.export_csv"):
+            path = export_csv(stats, path=csv_path)
+        console.print(f"[green]✅ CSV exported to:[/green] {path}")
+
+
+def _render_stats(stats, limit, top):
     console.print(f"[bold]PromptScribe Activity (last {limit} sessions)[/bold]\n")
 
     # Summary
@@ -124,8 +143,3 @@ def show_stats(limit: int = 200, top: int = 10, csv_out: bool = False, csv_path:
         bar = spark[i] if i < len(spark) else ""
         t2.add_row(day, str(cnt), bar)
     console.print(t2)
-
-    # CSV export (optional)
-    if csv_out:
-        path = export_csv(stats, path=csv_path)
-        console.print(f"[green]✅ CSV exported to:[/green] {path}")
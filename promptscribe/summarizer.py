@@ -0,0 +1,191 @@
+# promptscribe/summarizer.py
+import os
+import json
+import time
+import asyncio
+import hashlib
+from typing import Dict, List, Optional
+from promptscribe.config import CONFIG
+from promptscribe import chunker
+
+AI_CFG = CONFIG.get("ai") or {}
+
+MAP_PROMPT = (
+    "You are reviewing part of a recorded terminal session. "
+    "Summarize what the user did and what happened (commands, errors, results) "
+    "in a few concise bullet points."
+)
+REDUCE_PROMPT = (
+    "The following are summaries of consecutive parts of terminal sessions. "
+    "Merge them into one concise summary of the overall work, keeping errors and outcomes."
+)
+
+
+def _cache_dir():
+    d = AI_CFG.get("cache_dir") or os.path.join(CONFIG["paths"]["analysis"], "llm_cache")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+# --- Response cache ---
+class ResponseCache:
+    """On-disk cache of model responses keyed by a hash of model, prompt and chunk."""
+
+    def __init__(self, root=None):
+        self.root = root or _cache_dir()
+
+    @staticmethod
+    def key(model, system, text):
+        h = hashlib.sha256()
+        for part in (model, system, text):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + ".json")
+
+    def get(self, key) -> Optional[str]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)["response"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key, response):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"response": response, "ts": time.time()}, f)
+        os.replace(tmp, path)
+
+
+# --- Rate limiting ---
+class RateLimiter:
+    """Spaces request starts so no more than `per_minute` begin in any minute."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# --- Summarizer ---
+class Summarizer:
+    """
+    Map-reduce summarization over an OpenAI-compatible chat completions API.
+    Chunks are summarized concurrently (bounded by `concurrency` and the rate
+    limit), then partial summaries are merged until one remains.
+    """
+
+    def __init__(self, model=None, base_url=None, api_key=None, chunk_tokens=None,
+                 max_tokens=None, concurrency=None, requests_per_minute=None, cache=None):
+        self.model = model or AI_CFG.get("model", "gpt-4o-mini")
+        self.base_url = base_url or AI_CFG.get("base_url") or os.environ.get("OPENAI_BASE_URL")
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        self.chunk_tokens = int(chunk_tokens or AI_CFG.get("chunk_tokens", 3000))
+        self.max_tokens = int(max_tokens or AI_CFG.get("max_tokens", 1200))
+        self.concurrency = int(concurrency or AI_CFG.get("concurrency", 4))
+        self.requests_per_minute = requests_per_minute or AI_CFG.get("requests_per_minute", 0)
+        self.count_tokens = chunker.get_estimator(AI_CFG.get("tokenizer"), self.model)
+        self.cache = cache if cache is not None else ResponseCache()
+        self.calls = 0
+        self.cache_hits = 0
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            try:
+                from dotenv import load_dotenv
+                load_dotenv()
+            except Exception:
+                pass
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(
+                base_url=self.base_url,
+                api_key=self.api_key or os.environ.get("OPENAI_API_KEY") or "unset",
+            )
+        return self._client
+
+    async def _complete(self, system, text, sem, limiter):
+        key = ResponseCache.key(self.model, system, text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+        async with sem:
+            await limiter.wait()
+            resp = await self._get_client().chat.completions.create(
+                model=self.model,
+                messages=[{"role": "system", "content": system}, {"role": "user", "content": text}],
+                max_tokens=self.max_tokens,
+            )
+        self.calls += 1
+        answer = (resp.choices[0].message.content or "").strip()
+        self.cache.put(key, answer)
+        return answer
+
+    async def _reduce(self, summaries: List[str], sem, limiter) -> str:
+        """Merge summaries in token-budgeted groups until a single summary remains."""
+        while len(summaries) > 1:
+            groups, cur, used = [], [], 0
+            for s in summaries:
+                cost = self.count_tokens(s)
+                if cur and used + cost > self.chunk_tokens:
+                    groups.append(cur)
+                    cur, used = [], 0
+                cur.append(s)
+                used += cost
+            if cur:
+                groups.append(cur)
+            if len(groups) == len(summaries):
+                # every summary alone fills the budget; pair them up to make progress
+                groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+            summaries = await asyncio.gather(*[
+                self._complete(REDUCE_PROMPT, "\n\n---\n\n".join(g), sem, limiter) for g in groups
+            ])
+        return summaries[0] if summaries else ""
+
+    async def _summarize_many(self, chunk_lists: List[List[str]], merge: bool):
+        sem = asyncio.Semaphore(self.concurrency)
+        limiter = RateLimiter(self.requests_per_minute)
+        # the HTTP client is bound to the running loop; build a fresh one per run
+        self._client = None
+        try:
+            mapped = await asyncio.gather(*[
+                asyncio.gather(*[self._complete(MAP_PROMPT, c, sem, limiter) for c in chunks])
+                for chunks in chunk_lists
+            ])
+            if merge:
+                return [await self._reduce([s for part in mapped for s in part], sem, limiter)]
+            return await asyncio.gather(*[self._reduce(list(part), sem, limiter) for part in mapped])
+        finally:
+            if self._client is not None:
+                await self._client.close()
+                self._client = None
+
+    def session_chunks(self, path) -> List[str]:
+        chunks = chunker.chunk_session(path, self.chunk_tokens, count_tokens=self.count_tokens)
+        return [c.text for c in chunks]
+
+    def summarize_sessions(self, paths: List[str]) -> Dict[str, str]:
+        """Summarize each session separately; all chunks are in flight together."""
+        chunk_lists = [self.session_chunks(p) for p in paths]
+        results = asyncio.run(self._summarize_many(chunk_lists, merge=False))
+        return dict(zip(paths, results))
+
+    def summarize_merged(self, paths: List[str]) -> str:
+        """Summarize several sessions into one combined summary."""
+        chunk_lists = [self.session_chunks(p) for p in paths]
+        return asyncio.run(self._summarize_many(chunk_lists, merge=True))[0]
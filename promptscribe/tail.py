@@ -0,0 +1,150 @@
+# promptscribe/tail.py
+"""Follow a growing session log: inotify on Linux, stat polling elsewhere."""
+import os
+import sys
+import time
+import select
+import struct
+from typing import Any, Dict, Iterator, List
+from promptscribe import logio, parser
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVE_SELF = 0x00000800
+IN_DELETE_SELF = 0x00000400
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+POLL_MIN = 0.01   # polling fallback starts here after activity ...
+POLL_MAX = 0.04   # ... and backs off to this when idle (keeps latency < 50 ms)
+
+
+class _Inotify:
+    """Tiny ctypes wrapper: one watch, used only as a wakeup signal."""
+
+    def __init__(self, path):
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVE_SELF | IN_DELETE_SELF
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch failed for {path}")
+
+    def wait(self, timeout):
+        """Block until the file changes or `timeout` elapses; returns True on change."""
+        r, _, _ = select.select([self.fd], [], [], timeout)
+        if not r:
+            return False
+        try:
+            data = os.read(self.fd, 4096)
+        except BlockingIOError:
+            return False
+        # drain: several events may be queued, we only need to know something happened
+        off = 0
+        while off + 16 <= len(data):
+            _, _, _, name_len = struct.unpack_from("iIII", data, off)
+            off += 16 + name_len
+        return True
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class _Poller:
+    """Fallback: stat() the file with a short adaptive interval."""
+
+    def __init__(self, path):
+        self.path = path
+        self.interval = POLL_MIN
+        self.last = self._stat()
+
+    def _stat(self):
+        try:
+            st = logio.log_stat(self.path)
+            return st.st_size, st.st_mtime_ns
+        except OSError:
+            return None
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            cur = self._stat()
+            if cur != self.last:
+                self.last = cur
+                self.interval = POLL_MIN
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.interval, remaining))
+            self.interval = min(self.interval * 1.5, POLL_MAX)
+
+    def close(self):
+        pass
+
+
+def _watcher(path):
+    if sys.platform.startswith("linux"):
+        try:
+            return _Inotify(path)
+        except Exception:
+            pass
+    return _Poller(path)
+
+
+def tail_offset(path: str, n: int, block: int = 64 * 1024) -> int:
+    """Byte offset where the last `n` complete lines start, found by scanning backwards."""
+    size = logio.log_size(path)
+    if n <= 0:
+        return size
+    with logio.open_log(path) as f:
+        pos = size
+        # the first newline from the end terminates the last complete line;
+        # anything after it is a partial line that LogCursor will not consume
+        seen = -1
+        while pos > 0:
+            start = max(0, pos - block)
+            f.seek(start)
+            buf = f.read(pos - start)
+            idx = len(buf)
+            while True:
+                idx = buf.rfind(b"\n", 0, idx)
+                if idx < 0:
+                    break
+                seen += 1
+                if seen == n:
+                    return start + idx + 1
+            pos = start
+    return 0
+
+
+def follow(path: str, offset: int = 0, idle_timeout: float = 0.5,
+           stop_on_end: bool = True) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield batches of new events appended to `path`, starting at byte `offset`.
+    Only new bytes are read on each wakeup; partial trailing lines wait for
+    their newline. An empty batch is yielded every `idle_timeout` seconds so
+    callers can refresh or stop. Ends after a session_end event when
+    `stop_on_end` is set.
+    """
+    cursor = parser.LogCursor(path, offset)
+    watcher = _watcher(path)
+    try:
+        while True:
+            batch = list(cursor.events())
+            yield batch
+            if stop_on_end and any(e.get("kind") == "session_end" for e in batch):
+                return
+            if not batch:
+                watcher.wait(idle_timeout)
+    finally:
+        watcher.close()
+
@@ -1,7 +1,9 @@
 # promptscribe/utils.py
+import calendar
 import hashlib
 import json
 import os
+import time
 
 def file_sha256(path):
     h = hashlib.sha256()
@@ -15,3 +17,46 @@ def safe_write_json(path, obj):
     with open(tmp, "w", encoding="utf-8") as f:
         json.dump(obj, f, indent=2)
     os.replace(tmp, path)
+
+def file_stat_key(path):
+    """Cheap change detector: (size, mtime_ns) of a file or segmented log."""
+    from promptscribe import logio
+    st = logio.log_stat(path)
+    return st.st_size, st.st_mtime_ns
+
+def parse_time_spec(spec):
+    """
+    Turn a user time spec into a UNIX timestamp.
+    Accepts an age relative to now ("45m", "12h", "30d", "2w") or a date
+    ("YYYY-MM-DD", "YYYY-MM-DDTHH:MM:SS", interpreted as UTC).
+    """
+    spec = spec.strip()
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+    if spec and spec[-1].lower() in units and spec[:-1].replace(".", "", 1).isdigit():
+        return time.time() - float(spec[:-1]) * units[spec[-1].lower()]
+    for fmt in ("%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return float(calendar.timegm(time.strptime(spec, fmt)))
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized time '{spec}' (use e.g. 30d, 12h or YYYY-MM-DD)")
+
+def parse_duration(spec):
+    """
+    Turn a duration into seconds: "90", "2.5s", "10m", "1h", or a clock
+    offset "HH:MM:SS[.fff]" / "MM:SS".
+    """
+    spec = str(spec).strip().lstrip("+")
+    try:
+        if ":" in spec:
+            secs = 0.0
+            for part in spec.split(":"):
+                secs = secs * 60 + float(part)
+            return secs
+        units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+        for suffix in ("ms", "s", "m", "h"):
+            if spec.lower().endswith(suffix):
+                return float(spec[:-len(suffix)]) * units[suffix]
+        return float(spec)
+    except ValueError:
+        raise ValueError(f"Unrecognized duration '{spec}' (use e.g. 2s, 10m or 00:10:00)") from None
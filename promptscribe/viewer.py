@@ -1,34 +1,35 @@
 # promptscribe/viewer.py
-import os
 import json
 from rich.console import Console
 from rich.table import Table
-from promptscribe import db
+from promptscribe import blobstore, db, instrument, logio
 
 console = Console()
 
 def _load_logfile(path):
-    if not os.path.exists(path):
+    if not logio.exists(path):
         console.print(f"[red]Log file not found:[/red] {path}")
         return []
     events = []
-    with open(path, "r", encoding="utf-8") as f:
+    with instrument.span("viewer.load_log"), logio.open_text(path) as f:
         for line in f:
             try:
-                events.append(json.loads(line))
+                evt = json.loads(line)
             except json.JSONDecodeError:
                 continue
+            if isinstance(evt, dict) and "blob" in evt:
+                events.extend(blobstore.expand(evt))
+            else:
+                events.append(evt)
+    if instrument.ENABLED:
+        instrument.add("viewer.bytes_read", logio.log_size(path))
+        instrument.add("viewer.events_decoded", len(events))
     return events
 
 
 def display_session(session_id, summary=False, tail=None):
     """Display or replay a recorded session from its ID."""
-    session = None
-    session_db = db.SessionLocal()
-    try:
-        session = session_db.query(db.SessionEntry).filter_by(id=session_id).first()
-    finally:
-        session_db.close()
+    session = _get_session(session_id)
 
     if not session:
         console.print(f"[red]No session found with ID:[/red] {session_id}")
@@ -42,7 +43,12 @@ def display_session(session_id, summary=False, tail=None):
     if tail is not None:
         events = events[-tail:]
 
-    console.rule(f"[bold cyan]Session Replay[/bold cyan] - {session.name or session_id}")
+    with instrument.span("viewer.render"):
+        _render_table(events, session.name or session_id, summary)
+
+
+def _render_table(events, title, summary):
+    console.rule(f"[bold cyan]Session Replay[/bold cyan] - {title}")
 
     table = Table(show_header=True, header_style="bold magenta")
     table.add_column("Timestamp", width=20)
@@ -59,3 +65,119 @@ def display_session(session_id, summary=False, tail=None):
 
     console.print(table)
     console.rule("[green]End of Session[/green]")
+
+
+def _get_session(session_id):
+    session_db = db.SessionLocal()
+    try:
+        with instrument.span("db.lookup_session"):
+            return session_db.query(db.SessionEntry).filter_by(id=session_id).first()
+    finally:
+        session_db.close()
+
+
+def _event_table(rows):
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("Timestamp", width=20)
+    table.add_column("Type", width=10)
+    table.add_column("Content", overflow="fold")
+    for row in rows:
+        table.add_row(*row)
+    return table
+
+
+def follow_session(session_id, summary=False, tail=None):
+    """
+    Live view of a session that is still being recorded.
+    Shows the last `tail` events (default: one screenful), then renders new
+    events as they are appended, reading only the new bytes of the log.
+    """
+    from collections import deque
+    from rich.live import Live
+    from promptscribe import tail as tailer
+
+    session = _get_session(session_id)
+    if not session:
+        console.print(f"[red]No session found with ID:[/red] {session_id}")
+        return
+    if not logio.exists(session.file):
+        console.print(f"[red]Log file not found:[/red] {session.file}")
+        return
+
+    window = max(5, console.size.height - 8)
+    rows = deque(maxlen=window)
+    offset = tailer.tail_offset(session.file, tail if tail is not None else window)
+    title = f"[bold cyan]Following[/bold cyan] - {session.name or session_id}  [dim](Ctrl+C to stop)[/dim]"
+    console.rule(title)
+    ended = False
+    try:
+        with Live(_event_table(rows), console=console, auto_refresh=False, transient=False) as live:
+            for batch in tailer.follow(session.file, offset):
+                if not batch:
+                    continue
+                for e in batch:
+                    kind = e.get("kind", "")
+                    if kind == "session_end":
+                        ended = True
+                    if summary and kind != "out":
+                        continue
+                    if "kind" not in e:
+                        continue  # header/meta line
+                    rows.append((f"{e.get('ts', 0):.3f}", kind, str(e.get("data", "")).strip()))
+                live.update(_event_table(rows), refresh=True)
+    except KeyboardInterrupt:
+        pass
+    console.rule("[green]Session ended[/green]" if ended else "[yellow]Stopped following[/yellow]")
+
+
+def page_session(session_id, summary=False, tail=None):
+    """
+    Interactive pager: renders one screen at a time from a lazily built index,
+    so multi-hundred-MB sessions open instantly.
+    """
+    from promptscribe import pager
+
+    session = _get_session(session_id)
+    if not session:
+        console.print(f"[red]No session found with ID:[/red] {session_id}")
+        return
+    if not logio.exists(session.file):
+        console.print(f"[red]Log file not found:[/red] {session.file}")
+        return
+
+    start_line = 0
+    if tail:
+        index = pager.EventIndex(session.file)
+        try:
+            index.ensure_all()
+            start_line = max(0, index.lines - tail)
+        finally:
+            index.close()
+    title = f"[bold cyan]Session[/bold cyan] - {session.name or session_id}"
+    pager.run_pager(session.file, title=title, summary=summary, start_line=start_line)
+
+
+def replay_session(session_id, speed="1x", max_idle=None, start=None):
+    """Play a session back in real time (scaled by `speed`), optionally from an offset."""
+    from promptscribe import replay
+    from promptscribe.utils import parse_duration
+
+    session = _get_session(session_id)
+    if not session:
+        console.print(f"[red]No session found with ID:[/red] {session_id}")
+        return
+    if not logio.exists(session.file):
+        console.print(f"[red]Log file not found:[/red] {session.file}")
+        return
+
+    speed = replay.parse_speed(speed)
+    max_idle = parse_duration(max_idle) if max_idle else None
+    start = parse_duration(start) if start else 0.0
+    console.rule(f"[bold cyan]Replaying[/bold cyan] - {session.name or session_id}  "
+                 f"[dim]({speed:g}x, Ctrl+C to stop)[/dim]")
+    try:
+        replay.play(session.file, speed=speed, max_idle=max_idle, start=start)
+    except KeyboardInterrupt:
+        pass
+    console.print()
+    console.rule("[green]End of Replay[/green]")
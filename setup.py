@@ -15,6 +15,9 @@ setup(
         "python-dotenv",
         "openai"
     ],
+    extras_require={
+        "fast": ["numpy"],
+    },
     entry_points={
         "console_scripts": [
             "promptscribe=promptscribe.cli:main",
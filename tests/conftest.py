@@ -0,0 +1,56 @@
+# tests/conftest.py
+import pathlib
+import shutil
+import tempfile
+
+import pytest
+import yaml
+
+from promptscribe import config
+
+
+def _write_config(base):
+    """config.yaml with every path under `base`/data; returns its path."""
+    root = base / "data"
+    with open(config.ROOT / "config.yaml", "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+    cfg["paths"] = {k: str(root / v.replace("./data/", "").replace("./data", ".")) for k, v in cfg["paths"].items()}
+    cfg_path = base / "config.yaml"
+    with open(cfg_path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(cfg, f)
+    return cfg_path
+
+
+# modules that read CONFIG at import time must never see the repo's own data dir
+_SESSION_DIR = pathlib.Path(tempfile.mkdtemp(prefix="promptscribe-tests-"))
+config.CFG_PATH = _write_config(_SESSION_DIR)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_SESSION_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def vault(tmp_path, monkeypatch):
+    """
+    Config, data directories and database under tmp_path; returns the config
+    dict. Modules that bound CONFIG at import time see the change because the
+    cached dict is updated in place.
+    """
+    shared = config._config
+    monkeypatch.setattr(config, "CFG_PATH", _write_config(tmp_path))
+    monkeypatch.setattr(config, "_config", None)
+    fresh = config.load_config()
+    if shared is not None:
+        shared.clear()
+        shared.update(fresh)
+        monkeypatch.setattr(config, "_config", shared)
+        fresh = shared
+
+    from promptscribe import blobstore, db
+    monkeypatch.setattr(db, "_engine", None)
+    monkeypatch.setattr(db, "_session_factory", None)
+    monkeypatch.setattr(blobstore, "_store", None)
+    db.ensure_schema()
+    yield fresh
+    db.get_engine().dispose()
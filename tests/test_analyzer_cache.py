@@ -0,0 +1,60 @@
+# tests/test_analyzer_cache.py
+"""Analysis cache: content hits must not hand out artifacts naming another path."""
+import json
+import os
+
+from promptscribe import analyzer, db
+
+
+def _write_log(path, n=50):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"meta": {"session_id": "S-CACHE"}}) + "\n")
+        for i in range(n):
+            f.write(json.dumps({"ts": 1700000000 + i, "kind": "out", "data": f"line {i}\n"}) + "\n")
+
+
+def _load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _entries():
+    s = db.SessionLocal()
+    try:
+        return {e.file: (e.session_ids, e.stat_key) for e in s.query(db.AnalysisEntry).all()}
+    finally:
+        s.close()
+
+
+def test_touched_log_reuses_analysis(vault):
+    log = os.path.join(vault["paths"]["logs"], "S-CACHE__a.jsonl")
+    _write_log(log)
+    [first] = analyzer.run_analysis([log], workers=1)
+    st = os.stat(log)
+    os.utime(log, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    [again] = analyzer.run_analysis([log], workers=1)
+    assert again == first
+    assert len(_entries()) == 1
+
+
+def test_moved_log_gets_its_own_analysis(vault):
+    logs = vault["paths"]["logs"]
+    old = os.path.join(logs, "S-CACHE__a.jsonl")
+    new = os.path.join(logs, "2024", "01", "02", "S-CACHE__a.jsonl")
+    _write_log(old)
+    [first] = analyzer.run_analysis([old], workers=1)
+    before = _entries()[first]
+
+    os.makedirs(os.path.dirname(new), exist_ok=True)
+    os.rename(old, new)     # what migrate-layout does: same bytes, new path
+    [second] = analyzer.run_analysis([new], workers=1)
+
+    assert second != first
+    assert _load(second)["input"] == [new]
+    assert _load(first)["input"] == [old]
+    entries = _entries()
+    assert entries[first] == before     # the old entry keeps its own keys
+    assert json.loads(entries[second][0]) == [os.path.abspath(new)]
+    # the new path now hits its own entry
+    assert analyzer.run_analysis([new], workers=1) == [second]
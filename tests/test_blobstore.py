@@ -0,0 +1,104 @@
+# tests/test_blobstore.py
+"""Content-defined chunking and log packing in the blob store."""
+import json
+import os
+import random
+import statistics
+
+from promptscribe import blobstore, parser
+
+
+def _plan_lines(n, seed=1):
+    """Terraform-plan-like output: short, similar, mostly unique lines."""
+    rng = random.Random(seed)
+    kinds = ("aws_instance", "aws_s3_bucket", "module.vpc.aws_subnet", "aws_iam_role")
+    return [
+        f"  # {rng.choice(kinds)}.r{rng.randrange(10 ** 6)} will be created: id-{rng.randrange(10 ** 9)}\n".encode()
+        for _ in range(n)
+    ]
+
+
+def test_chunk_sizes_follow_average():
+    lines = _plan_lines(20000)
+    chunks = list(blobstore.chunk_lines(lines))
+    assert b"".join(chunks) == b"".join(lines)
+    sizes = [len(c) for c in chunks[:-1]]
+    assert all(blobstore.MIN_CHUNK <= s <= blobstore.MAX_CHUNK for s in sizes)
+    assert blobstore.AVG_CHUNK * 0.75 <= statistics.mean(sizes) <= blobstore.AVG_CHUNK * 1.5
+    # cuts come from content, not from hitting the size limit
+    assert sum(s >= blobstore.MAX_CHUNK for s in sizes) == 0
+
+
+def test_chunking_resyncs_after_prefix_shift():
+    lines = _plan_lines(5000)
+    shifted = _plan_lines(37, seed=2) + lines
+    original = list(blobstore.chunk_lines(lines))
+    again = set(blobstore.chunk_lines(shifted))
+    # only the first few chunks differ once the boundaries line up again
+    shared = sum(c in again for c in original)
+    assert shared >= len(original) - 3
+
+
+def _write_session(path, seed=3):
+    """A recorder-style log: meta line, commands with long line-by-line output."""
+    rng = random.Random(seed)
+    ts = 1700000000.0
+    events = [{"meta": {"session_id": "S-TEST", "start_time": ts}}]
+    for cmd in range(4):
+        ts += 1.0
+        events.append({"ts": round(ts, 6), "kind": "in", "data": f"terraform plan -target=m{cmd}\n"})
+        for line in _plan_lines(600 + cmd * 100, seed=seed + cmd):
+            ts += rng.uniform(0, 0.01)
+            events.append({"ts": round(ts, 6), "kind": "out", "data": line.decode()})
+        events.append({"ts": round(ts, 6), "kind": "out", "data": "partial prompt $ "})
+    events.append({"ts": round(ts + 1, 6), "kind": "session_end", "data": ""})
+    with open(path, "w", encoding="utf-8") as f:
+        for evt in events:
+            f.write(json.dumps(evt) + "\n")
+
+
+def _triples(events):
+    return [(e.get("ts"), e.get("kind"), e.get("data")) for e in events if "meta" not in e]
+
+
+def _cursor_events(path, offset=0):
+    """Events from one LogCursor pass, plus (event index, offset) resume points."""
+    cursor = parser.LogCursor(path, offset)
+    events, marks, last = [], [], offset
+    for evt in cursor.events():
+        if not evt.get("_cont"):
+            marks.append((len(events), last))
+        events.append(evt)
+        last = cursor.offset
+    return events, marks
+
+
+def test_pack_log_round_trip_and_gc(vault):
+    os.makedirs(vault["paths"]["logs"], exist_ok=True)
+    path = os.path.join(vault["paths"]["logs"], "S-TEST__pack.jsonl")
+    _write_session(path)
+    before = _triples(parser.iter_events(path))
+    size_before = os.path.getsize(path)
+
+    stats = blobstore.pack_log(path, threshold=4096)
+    assert stats["runs"] == 4
+    assert os.path.getsize(path) < size_before
+
+    assert _triples(parser.iter_events(path)) == before
+    events, marks = _cursor_events(path)
+    assert _triples(events) == before
+    # each blob line expands to one event, then continuations at dt offsets
+    assert sum(not e.get("_cont") for e in events if e.get("kind") == "out") == 4 * 2
+    for i, offset in marks:
+        resumed, _ = _cursor_events(path, offset)
+        assert _triples(resumed) == _triples(events[i:])
+
+    store = blobstore.default_store()
+    chunks = dict(store.iter_chunks())
+    stray, _ = store.put_chunk(b"referenced by no log\n")
+    removed, _, kept = blobstore.gc(grace_seconds=0)
+    assert removed == 1 and kept == len(chunks)
+    assert set(dict(store.iter_chunks())) == set(chunks) and stray not in chunks
+    store._cache.clear()
+    assert _triples(parser.iter_events(path)) == before
+
@@ -0,0 +1,138 @@
+# tests/test_compact.py
+"""Tiered compaction: warm segmented logs, cold monthly packs, redraw dropping."""
+import json
+import os
+import time
+
+from promptscribe import compact, db, logio
+
+OLD = time.mktime((2024, 3, 5, 12, 0, 0, 0, 0, 0))
+
+
+def _session_events(n, start):
+    ts = start
+    events = [{"meta": {"session_id": f"S-OLD-{n}", "start_time": start}}]
+    for cmd in range(3):
+        ts += 1.0
+        events.append({"ts": round(ts, 6), "kind": "in", "data": f"make step{cmd}\n"})
+        for pct in range(0, 101, 10):
+            ts += 0.1
+            events.append({"ts": round(ts, 6), "kind": "out", "data": f"\rbuilding {pct:3d}% [{'#' * (pct // 10):<10}]"})
+        for i in range(20):
+            ts += 0.01
+            events.append({"ts": round(ts, 6), "kind": "out", "data": f"\x1b[32mok\x1b[0m obj{n}-{cmd}-{i}.o {i * 17} bytes\n"})
+    events.append({"ts": round(ts + 1, 6), "kind": "session_end", "data": ""})
+    return events
+
+
+def _make_vault(paths, sessions=4):
+    """Plain logs, metadata and DB rows for `sessions` sessions a few days apart in 2024."""
+    os.makedirs(paths["logs"], exist_ok=True)
+    os.makedirs(paths["metadata"], exist_ok=True)
+    metas, originals = [], {}
+    for n in range(sessions):
+        start = OLD + n * 3 * 86400
+        sid = f"S-OLD-{n}"
+        events = _session_events(n, start)
+        log = os.path.join(paths["logs"], f"{sid}__build.jsonl")
+        with open(log, "w", encoding="utf-8") as f:
+            for evt in events:
+                f.write(json.dumps(evt) + "\n")
+        meta = {"session_id": sid, "name": "build", "file": log, "start_ts": start, "end_ts": events[-1]["ts"]}
+        with open(os.path.join(paths["metadata"], f"{sid}.meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        metas.append(meta)
+        originals[sid] = (log, events)
+    db.insert_session_metas(metas)
+    return originals
+
+
+def _read(path):
+    with logio.open_log(path) as f:
+        return [json.loads(raw) for raw in f]
+
+
+def _rows():
+    s = db.SessionLocal()
+    try:
+        return {r.id: r.file for r in s.query(db.SessionEntry).all()}
+    finally:
+        s.close()
+
+
+def _meta_file(paths, sid):
+    with open(os.path.join(paths["metadata"], f"{sid}.meta.json"), encoding="utf-8") as f:
+        return json.load(f)["file"]
+
+
+def test_warm_then_cold_keeps_every_event(vault):
+    paths = vault["paths"]
+    originals = _make_vault(paths)
+    now = time.time()
+
+    summary = compact.run_compaction(now, workers=1, redraws=False, echo=lambda *a: None)
+    assert summary["converted"] == len(originals) and summary["failed"] == 0
+    rows = _rows()
+    for sid, (log, events) in originals.items():
+        assert rows[sid] != log and logio.is_segmented(rows[sid])
+        assert not os.path.exists(log)
+        assert logio.exists(rows[sid]) and _read(rows[sid]) == events
+        assert _meta_file(paths, sid) == rows[sid]
+
+    summary = compact.run_compaction(now, pack_older_than=now, workers=1, redraws=False, echo=lambda *a: None)
+    assert summary["packed"] == len(originals)
+    rows = _rows()
+    for sid, (_, events) in originals.items():
+        pack, member = logio.split_pack(rows[sid])
+        assert pack.endswith("2024-03" + logio.PACK_SUFFIX)
+        assert logio.exists(rows[sid]) and _read(rows[sid]) == events
+        assert _meta_file(paths, sid) == rows[sid]
+    # the warm copies are gone, only the pack and its index remain
+    assert sorted(os.listdir(paths["archive"])) == ["2024-03" + logio.PACK_SUFFIX,
+                                                   "2024-03" + logio.PACK_SUFFIX + logio.INDEX_SUFFIX]
+
+    # a second run finds nothing left to do
+    again = compact.run_compaction(now, pack_older_than=now, workers=1, echo=lambda *a: None)
+    assert again["converted"] == again["packed"] == 0
+
+
+def _out(ts, data):
+    return {"ts": ts, "kind": "out", "data": data}
+
+
+def test_drop_redraws_collapses_progress_bar_runs():
+    bar = [_out(10 + i * 0.2, f"Downloading {i * 10:3d}% [{'=' * i}>{' ' * (10 - i)}] {i * 1.5:.1f} MB\n")
+           for i in range(11)]
+    events = [{"ts": 9.0, "kind": "in", "data": "pip download big\n"}] + bar + [_out(13.0, "done\n")]
+    stats = {"redraws_dropped": 0}
+    out = list(compact.drop_redraws(events, stats))
+    assert stats["redraws_dropped"] == 10
+    assert out == [events[0],
+                   {"ts": bar[-1]["ts"], "kind": "info", "data": "redraws_dropped:10"},
+                   bar[-1], events[-1]]
+
+
+def test_drop_redraws_resolves_carriage_returns_in_one_event():
+    stats = {"redraws_dropped": 0}
+    out = list(compact.drop_redraws([_out(1.0, "\r 10%\r 50%\r100% done\n")], stats))
+    assert out == [_out(1.0, "100% done\n")]
+
+
+def test_drop_redraws_keeps_ordinary_numeric_output():
+    events = [_out(1.0 + i * 0.01, f"obj{i}.o {i * 17} bytes, \x1b[32m{i} warnings\x1b[0m\n") for i in range(30)]
+    events += [_out(2.0 + i * 0.01, f"tests/test_mod{i}.py ....    [{(i + 1) * 20:3d}%]\n") for i in range(5)]
+    events += [_out(3.0, "5 passed in 0.42s\n")]
+    stats = {"redraws_dropped": 0}
+    expected = [dict(e) for e in events]
+    assert list(compact.drop_redraws(events, stats)) == expected
+    assert stats["redraws_dropped"] == 0
+
+
+def test_drop_redraws_collapses_tqdm_bars():
+    bar = [_out(1.0 + i * 0.1, f"{i * 5:3d}%|{'█' * (i // 2)}{'▌' * (i % 2)}{' ' * (10 - (i + 1) // 2)}| "
+                               f"{i * 50}/1000 [00:{i:02d}<00:{20 - i:02d}, {90 + i:.1f}it/s]\n")
+           for i in range(1, 21)]
+    stats = {"redraws_dropped": 0}
+    out = list(compact.drop_redraws(bar, stats))
+    assert stats["redraws_dropped"] == 19
+    assert out[-1] == bar[-1]
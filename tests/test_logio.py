@@ -0,0 +1,94 @@
+# tests/test_logio.py
+"""Segmented and packed logs must read exactly like the plain file, at any byte offset."""
+import json
+import os
+import random
+
+import pytest
+
+from promptscribe import logio
+
+
+def _lines(n, seed=5):
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        data = "".join(rng.choice("abcdefgh ✓\t") for _ in range(rng.randrange(0, 200)))
+        out.append(json.dumps({"ts": 1700000000 + i * 0.01, "kind": "out", "data": data + "\n"},
+                              ensure_ascii=False) + "\n")
+    return out
+
+
+def _write(tmp_path, codec, lines):
+    plain = tmp_path / "plain.jsonl"
+    seg = str(tmp_path / "seg.jsonl")
+    with open(plain, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+    half = len(lines) // 2
+    # two writer sessions: reopening appends to the last segment
+    for part in (lines[:half], lines[half:]):
+        with logio.SegmentWriter(seg, codec=codec, frame_bytes=700, frame_seconds=0, segment_bytes=3000) as w:
+            for line in part:
+                w.write(line)
+                w.flush()
+    return plain.read_bytes(), seg
+
+
+def _codecs():
+    codecs = ["gzip"]
+    try:
+        import zstandard  # noqa: F401
+        codecs.append("zstd")
+    except ImportError:
+        pass
+    return codecs
+
+
+def _check_offsets(path, expected, seed=11):
+    assert logio.log_size(path) == len(expected)
+    assert logio.log_stat(path).st_size == len(expected)
+    rng = random.Random(seed)
+    offsets = [0, len(expected), len(expected) - 1] + [rng.randrange(len(expected)) for _ in range(300)]
+    with logio.open_log(path) as f:
+        assert f.read() == expected
+        for off in offsets:
+            f.seek(off)
+            assert f.tell() == off
+            n = rng.randrange(1, 5000)
+            assert f.read(n) == expected[off:off + n]
+            f.seek(off)
+            end = expected.find(b"\n", off)
+            assert f.readline() == expected[off:end + 1 if end >= 0 else len(expected)]
+        # relative and end-relative seeks
+        f.seek(-100, os.SEEK_END)
+        assert f.read() == expected[-100:]
+        f.seek(50)
+        f.seek(25, os.SEEK_CUR)
+        assert f.read(10) == expected[75:85]
+    # line iteration from a mid-file offset, as LogCursor resumes
+    start = expected.index(b"\n", len(expected) // 3) + 1
+    with logio.open_log(path) as f:
+        f.seek(start)
+        assert b"".join(f) == expected[start:]
+
+
+@pytest.mark.parametrize("codec", _codecs())
+def test_segmented_log_matches_plain_bytes(tmp_path, codec):
+    expected, seg = _write(tmp_path, codec, _lines(400))
+    segments = [s for s in os.listdir(seg) if s.endswith(logio.CODECS[codec])]
+    frames = sum(1 for s in os.listdir(seg) if s.endswith(logio.INDEX_SUFFIX)
+                 for _ in open(os.path.join(seg, s)))
+    assert len(segments) > 3 and frames > len(segments)
+    assert logio.is_segmented(seg) and logio.exists(seg)
+    _check_offsets(seg, expected)
+    with logio.open_text(seg) as f:
+        assert f.read() == expected.decode("utf-8")
+
+
+def test_packed_log_matches_plain_bytes(tmp_path, vault):
+    from promptscribe import compact
+    expected, seg = _write(tmp_path, "gzip", _lines(300))
+    pack = str(tmp_path / "2024-01.pack")
+    [(_, _, member)] = compact.pack_logs(pack, [("S-1", seg)])
+    assert logio.split_pack(member) == (pack, "seg.jsonl")
+    _check_offsets(member, expected)
@@ -0,0 +1,45 @@
+# tests/test_recorder_budget.py
+"""Output sampling in the recorder's per-command budget."""
+from promptscribe import recorder
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _budget(monkeypatch, rate):
+    clock = _Clock()
+    monkeypatch.setattr(recorder.time, "monotonic", clock)
+    limits = {k: 0 for k in ("command_max_bytes", "command_max_events", "session_max_bytes",
+                             "session_max_events", "tail_bytes")}
+    limits["sample_rate"] = rate
+    return recorder._OutputBudget(limits, {"bytes": 0, "events": 0}), clock
+
+
+def _lines(n):
+    return [f"line{i}\n" for i in range(n)]
+
+
+def test_fractional_rate_keeps_one_line_per_period(monkeypatch):
+    budget, clock = _budget(monkeypatch, 0.5)
+    assert len(budget.accept(_lines(100))) == 1
+    clock.now += 1.0
+    assert len(budget.accept(_lines(10))) == 0
+    clock.now += 1.0
+    assert len(budget.accept(_lines(10))) == 1
+    assert budget.sampled_lines == 99 + 10 + 9
+
+
+def test_rate_limits_lines_per_second(monkeypatch):
+    budget, clock = _budget(monkeypatch, 5)
+    assert len(budget.accept(_lines(100))) == 5
+    clock.now += 1.0
+    assert len(budget.accept(_lines(100))) == 5
+    clock.now += 10.0  # idle time does not build up more than one second's burst
+    assert len(budget.accept(_lines(100))) == 5
+    assert budget.sampled_lines == 3 * 95
+    assert budget.sampled_bytes == sum(len(line) for line in _lines(100)[5:]) * 3
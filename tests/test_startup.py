@@ -0,0 +1,34 @@
+# tests/test_startup.py
+"""Startup regression: `promptscribe --help` must not import heavy dependencies."""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# imported only inside the subcommands that need them
+HEAVY = ("sqlalchemy", "rich", "tkinter", "openai", "rapidfuzz")
+
+
+def _imported_modules(args):
+    """Top-level names of every module `python -X importtime -m promptscribe <args>` imported."""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-m", "promptscribe"] + args,
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    names = set()
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            names.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+    return names
+
+
+def test_help_skips_heavy_imports():
+    imported = _imported_modules(["--help"])
+    assert "promptscribe" in imported
+    assert not sorted(imported.intersection(HEAVY))
+
+
+def test_version_skips_heavy_imports():
+    imported = _imported_modules(["--version"])
+    assert not sorted(imported.intersection(HEAVY))
@@ -0,0 +1,53 @@
+# tests/test_summarizer.py
+"""Summarizer against the local LLM stub: a repeat run is served from the response cache."""
+import json
+import os
+
+import pytest
+
+from promptscribe import llm_stub, summarizer
+
+pytest.importorskip("openai")
+
+
+def _write_log(path, sid, commands=6):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"meta": {"session_id": sid}}) + "\n")
+        ts = 1700000000.0
+        for cmd in range(commands):
+            ts += 1.0
+            f.write(json.dumps({"ts": ts, "kind": "in", "data": f"make target{cmd}\n"}) + "\n")
+            for i in range(30):
+                ts += 0.01
+                f.write(json.dumps({"ts": ts, "kind": "out", "data": f"{sid} step {cmd}.{i}: compiled obj{i}.o\n"}) + "\n")
+
+
+def test_second_run_is_served_from_cache(vault):
+    logs = vault["paths"]["logs"]
+    os.makedirs(logs, exist_ok=True)
+    paths = [os.path.join(logs, f"S-SUM-{n}__build.jsonl") for n in range(2)]
+    for n, path in enumerate(paths):
+        _write_log(path, f"S-SUM-{n}")
+
+    srv, base_url = llm_stub.serve_in_thread()
+    try:
+        cache = summarizer.ResponseCache(os.path.join(vault["paths"]["analysis"], "llm_cache"))
+
+        def run():
+            s = summarizer.Summarizer(base_url=base_url, api_key="test", chunk_tokens=300,
+                                      requests_per_minute=60000, cache=cache)
+            return s, s.summarize_sessions(paths)
+
+        first, out = run()
+        requests = srv.requests
+        # several chunks per session, so both the map and the reduce step hit the stub
+        assert requests == first.calls and requests > 2 * len(paths)
+        assert set(out) == set(paths) and all(out.values())
+
+        second, again = run()
+        assert srv.requests == requests and second.calls == 0
+        assert second.cache_hits == first.calls
+        assert again == out
+    finally:
+        srv.shutdown()
+        srv.server_close()